@@ -1,6 +1,6 @@
 {
     'name': 'Waiting List - Base',
-    'version': '18.0.1.26.0',
+    'version': '18.0.1.30.0',
     'summary': 'Core waiting list functionality with allergen tracking and survey integration (Community compatible)',
     'description': """
 Restaurant Waiting List System - Base Module
@@ -40,12 +40,15 @@ install the waiting_list_enterprise module.
         'data/ir_sequence_data.xml',
         'data/customer_categories.xml',
         'data/waiting_list_allergen_data.xml',
+        'data/ir_cron_data.xml',
         
         # Views
         'views/dashboard_views.xml',
         'views/waiting_list_views.xml',
         'views/waiting_list_allergen_views.xml',
         'views/res_partner_views.xml',
+        'views/waiting_list_duplicate_partner_views.xml',
+        'views/waiting_list_perf_views.xml',
         'views/res_config_settings_views.xml',
         'views/waiting_list_customer_wizard_views.xml',
     ],
@@ -53,6 +56,8 @@ install the waiting_list_enterprise module.
         'web.assets_backend': [
             'waiting_list_base/static/src/scss/waiting_list.scss',
             'waiting_list_base/static/src/js/dashboard.js',
+            'waiting_list_base/static/src/js/customer_lookup_field.js',
+            'waiting_list_base/static/src/xml/customer_lookup_field.xml',
         ],
     },
     'demo': [],
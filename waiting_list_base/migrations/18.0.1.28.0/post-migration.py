@@ -0,0 +1,13 @@
+# -*- coding: utf-8 -*-
+import logging
+
+from odoo import api, SUPERUSER_ID
+
+_logger = logging.getLogger(__name__)
+
+
+def migrate(cr, version):
+    """Backfill res_partner.phone_normalized in chunks"""
+    env = api.Environment(cr, SUPERUSER_ID, {})
+    total = env['res.partner']._backfill_phone_normalized()
+    _logger.info('Backfilled phone_normalized of %d partners', total)
@@ -0,0 +1,17 @@
+# -*- coding: utf-8 -*-
+import logging
+
+_logger = logging.getLogger(__name__)
+
+
+def migrate(cr, version):
+    """Create the res_partner.phone_normalized column up front
+    
+    With the column already present the ORM does not recompute the field for
+    every partner in one go; post-migration backfills it in chunks instead.
+    """
+    cr.execute("""
+        ALTER TABLE res_partner
+        ADD COLUMN IF NOT EXISTS phone_normalized VARCHAR
+    """)
+    _logger.info('phone_normalized column ready on res_partner')
@@ -0,0 +1,17 @@
+# -*- coding: utf-8 -*-
+import logging
+
+from odoo import api, SUPERUSER_ID
+from odoo.tools import parse_version
+
+_logger = logging.getLogger(__name__)
+
+
+def migrate(cr, version):
+    """Recompute res_partner.phone_normalized with the country code trie parser"""
+    if parse_version(version) < parse_version('18.0.1.28.0'):
+        # The 18.0.1.28.0 backfill already used the current parser
+        return
+    env = api.Environment(cr, SUPERUSER_ID, {})
+    total = env['res.partner']._backfill_phone_normalized(recompute=True)
+    _logger.info('Recomputed phone_normalized of %d partners', total)
@@ -0,0 +1,13 @@
+# -*- coding: utf-8 -*-
+import logging
+
+from odoo import api, SUPERUSER_ID
+
+_logger = logging.getLogger(__name__)
+
+
+def migrate(cr, version):
+    """Backfill res_partner.phone_secondary_normalized of partners with a mobile and a phone"""
+    env = api.Environment(cr, SUPERUSER_ID, {})
+    total = env['res.partner']._backfill_phone_normalized(recompute=True)
+    _logger.info('Backfilled the secondary phone of %d partners', total)
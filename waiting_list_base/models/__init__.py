@@ -3,5 +3,9 @@
 from . import waiting_list_allergen
 from . import waiting_list
 from . import res_partner
+from . import waiting_list_settings
+from . import waiting_list_phone
 from . import res_config_settings
-from . import waiting_list_customer_wizard
\ No newline at end of file
+from . import waiting_list_customer_wizard
+from . import waiting_list_duplicate_partner
+from . import waiting_list_perf_sample
\ No newline at end of file
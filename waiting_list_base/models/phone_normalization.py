@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+"""Phone number normalization shared by the waiting list models
+
+Numbers are parsed against a prefix trie of the country calling codes (built
+from res.country.phone_code by the waiting.list.phone service) into a country
+code and a national number, from which the canonical E.164 form and the core
+number used for customer lookups are derived.
+"""
+
+from collections import namedtuple
+
+# Minimum digits of a phone number that can identify a customer
+MIN_PHONE_DIGITS = 9
+
+# Shortest national number accepted after the country code
+MIN_NATIONAL_DIGITS = 4
+
+# Parsed phone number: country calling code and national number (digits only,
+# without trunk prefix "0")
+PhoneNumber = namedtuple('PhoneNumber', ['country_code', 'national_number'])
+
+# Key marking the end of a country code in the trie
+_CODE = '$'
+
+
+def phone_digits(phone):
+    """Digits of a phone number (spaces, dashes, parentheses, plus signs removed)"""
+    return ''.join(filter(str.isdigit, phone or ''))
+
+
+def build_country_code_trie(country_codes):
+    """Prefix trie {digit: {digit: ..., '$': code}} of country calling codes"""
+    trie = {}
+    for code in country_codes:
+        node = trie
+        for digit in str(code):
+            node = node.setdefault(digit, {})
+        node[_CODE] = str(code)
+    return trie
+
+
+def match_country_code(trie, digits):
+    """Longest country code of the trie that prefixes digits, or None"""
+    node = trie
+    match = None
+    for digit in digits:
+        node = node.get(digit)
+        if node is None:
+            break
+        match = node.get(_CODE, match)
+    return match
+
+
+def parse_phone_number(phone, trie, default_country_code=None):
+    """Parse a phone number into a PhoneNumber, or None if it cannot be parsed
+
+    - "+971 50 123 4567" / "00971501234567": international, the country code is
+      the longest trie match
+    - "050 123 4567": national with trunk prefix, default country code
+    - "971501234567": starts with the default country code, or is long enough
+      to carry a country code matched by the trie
+    - "501234567": national, default country code
+    """
+    if not phone:
+        return None
+    stripped = phone.strip()
+    digits = phone_digits(stripped)
+
+    if stripped.startswith('+') or digits.startswith('00'):
+        # International prefix ("+" or "00")
+        if not stripped.startswith('+'):
+            digits = digits[2:]
+        country_code = match_country_code(trie, digits)
+        if not country_code:
+            return None
+        national = digits[len(country_code):]
+    elif digits.startswith('0'):
+        country_code = default_country_code
+        national = digits
+    elif default_country_code and digits.startswith(default_country_code) \
+            and len(digits) - len(default_country_code) >= MIN_PHONE_DIGITS:
+        country_code = default_country_code
+        national = digits[len(country_code):]
+    else:
+        matched = match_country_code(trie, digits) if len(digits) > 10 else None
+        if matched and len(digits) - len(matched) >= MIN_PHONE_DIGITS:
+            country_code = matched
+            national = digits[len(matched):]
+        else:
+            country_code = default_country_code
+            national = digits
+
+    # Trunk prefix is not part of the international form
+    national = national.lstrip('0')
+    if len(national) < MIN_NATIONAL_DIGITS:
+        return None
+    return PhoneNumber(country_code or None, national)
+
+
+def format_e164(number):
+    """E.164 form (+<country code><national number>) of a PhoneNumber"""
+    return f'+{number.country_code or ""}{number.national_number}'
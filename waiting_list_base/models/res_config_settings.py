@@ -12,3 +12,56 @@ class ResConfigSettings(models.TransientModel):
         config_parameter='waiting_list.default_survey_id',
         help='Default survey to send to customers after their visit'
     )
+    
+    waiting_list_fuzzy_customer_search = fields.Boolean(
+        string='Fuzzy Customer Search',
+        config_parameter='waiting_list.fuzzy_customer_search',
+        help='Find customers by digits anywhere in their phone number and by misspelled names, '
+             'with trigram (pg_trgm) indexes on the customer phone and name. When disabled, '
+             'partial phone numbers only match from the start of the number'
+    )
+    
+    waiting_list_merge_duplicate_partners = fields.Boolean(
+        string='Merge Duplicate Customers',
+        config_parameter='waiting_list.merge_duplicate_partners',
+        help='Let the nightly duplicate detection merge customers sharing the same phone number '
+             'into the one with the most visits'
+    )
+    
+    waiting_list_debug_loggers = fields.Char(
+        string='Debug Logging',
+        config_parameter='waiting_list.debug_loggers',
+        help='Comma-separated waiting list addons logging at DEBUG level, '
+             'e.g. "whatsapp_waitinglist,waiting_list_enterprise"'
+    )
+    
+    waiting_list_log_sample_rate = fields.Integer(
+        string='Log Sampling',
+        config_parameter='waiting_list.log_sample_rate',
+        default=1,
+        help='Log one successful operation out of this many; slow and failed operations are always logged'
+    )
+    
+    waiting_list_log_slow_ms = fields.Integer(
+        string='Slow Operation (ms)',
+        config_parameter='waiting_list.log_slow_ms',
+        default=1000,
+        help='Operations taking longer than this are always logged'
+    )
+    
+    waiting_list_perf_instrumentation = fields.Boolean(
+        string='Performance Monitoring',
+        config_parameter='waiting_list.perf_instrumentation',
+        help='Record the duration and SQL queries of the host actions, crons and notification sends'
+    )
+    
+    def set_values(self):
+        """Create or drop the trigram indexes when fuzzy customer search is switched
+        
+        The cached settings snapshot needs no refresh: the system parameter
+        writes already clear it in every worker.
+        """
+        fuzzy_search_was_enabled = self.env['waiting.list.settings']._get_snapshot()['fuzzy_customer_search']
+        super().set_values()
+        if self.waiting_list_fuzzy_customer_search != fuzzy_search_was_enabled:
+            self.env['res.partner']._update_trigram_indexes(self.waiting_list_fuzzy_customer_search)
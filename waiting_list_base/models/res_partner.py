@@ -1,6 +1,38 @@
 # -*- coding: utf-8 -*-
 
-from odoo import models, fields, api
+from odoo import models, fields, api, tools, _
+from odoo.exceptions import UserError
+from odoo.tools import sql
+import logging
+import psycopg2
+
+_logger = logging.getLogger(__name__)
+
+# Optional pg_trgm GIN indexes of the fuzzy customer search: {index name: column}
+PARTNER_TRIGRAM_INDEXES = {
+    'res_partner_phone_normalized_trgm_idx': 'phone_normalized',
+    'res_partner_phone_secondary_normalized_trgm_idx': 'phone_secondary_normalized',
+    'res_partner_name_trgm_idx': 'name',
+}
+
+# Pattern indexes of the prefix match on partial phone numbers: {index name: column}
+PARTNER_PHONE_PREFIX_INDEXES = {
+    'res_partner_phone_normalized_prefix_idx': 'phone_normalized',
+    'res_partner_phone_secondary_normalized_prefix_idx': 'phone_secondary_normalized',
+}
+
+# Fields whose change can alter the result of a cached phone lookup
+PHONE_LOOKUP_FIELDS = {'mobile', 'phone', 'active', 'is_company', 'company_id'}
+
+# Ranking of customers sharing a phone number: most recent visitor first
+PHONE_MATCH_ORDER = 'last_visit_date desc nulls last, id desc'
+
+# Append-only log of phone lookup generations, written by the transactions that
+# change phones: its latest generation and row count key the cached lookups
+PHONE_LOOKUP_GENERATION_TABLE = 'res_partner_phone_lookup_generation'
+
+# Transaction flag: phones changed, cached lookups are stale until the commit
+PHONE_LOOKUP_CHANGED = 'res.partner.phone_lookup_changed'
 
 
 class ResPartner(models.Model):
@@ -13,6 +45,26 @@ class ResPartner(models.Model):
         help='Automatically set to True when customer is added via waiting list or POS'
     )
     
+    # Digits-only core number (no country code / leading zero) of the mobile,
+    # or of the phone when there is no mobile: exact-match customer lookup key
+    phone_normalized = fields.Char(
+        string='Normalized Phone',
+        compute='_compute_phone_normalized',
+        store=True,
+        index=True,
+        help='Core phone number used to find customers by phone with an index lookup'
+    )
+    
+    # Core number of the phone when the partner also has a (different) mobile:
+    # customers are found by either of their numbers
+    phone_secondary_normalized = fields.Char(
+        string='Normalized Secondary Phone',
+        compute='_compute_phone_normalized',
+        store=True,
+        index=True,
+        help='Core number of the phone of customers who also have a mobile number'
+    )
+    
     # Birthday field for customer
     birthday = fields.Date(
         string='Birthday',
@@ -79,6 +131,233 @@ class ResPartner(models.Model):
         help='Formatted allergen warning message for display'
     )
     
+    def init(self):
+        """Phone lookup generation log, and pattern indexes for the prefix
+        search on partial phone numbers
+        
+        The plain indexes of the normalized phones only serve equality under
+        the database collation; LIKE 'digits%' needs varchar_pattern_ops.
+        """
+        super().init()
+        self.env.cr.execute(f"""
+            CREATE TABLE IF NOT EXISTS {PHONE_LOOKUP_GENERATION_TABLE} (
+                generation BIGINT NOT NULL
+            )
+        """)
+        self.env.cr.execute(f"CREATE SEQUENCE IF NOT EXISTS {PHONE_LOOKUP_GENERATION_TABLE}_seq")
+        for indexname, column in PARTNER_PHONE_PREFIX_INDEXES.items():
+            sql.create_index(
+                self.env.cr, indexname, self._table, [f'"{column}" varchar_pattern_ops'],
+                where=f'"{column}" IS NOT NULL',
+            )
+    
+    @api.depends('mobile', 'phone')
+    def _compute_phone_normalized(self):
+        """Compute the core numbers of the mobile and phone for indexed lookups"""
+        for partner in self:
+            partner.phone_normalized, partner.phone_secondary_normalized = \
+                self._get_normalized_phones(partner.mobile, partner.phone)
+    
+    @api.model
+    def _get_normalized_phones(self, mobile, phone):
+        """(phone_normalized, phone_secondary_normalized) of a mobile and phone
+        
+        The main key is the mobile, or the phone when there is no mobile; the
+        phone is the secondary key when it differs from the mobile.
+        """
+        phone_engine = self.env['waiting.list.phone']
+        mobile_core = phone_engine.get_core_number(mobile)
+        phone_core = phone_engine.get_core_number(phone)
+        if not mobile_core:
+            return phone_core or False, False
+        return mobile_core, phone_core if phone_core and phone_core != mobile_core else False
+    
+    @api.model_create_multi
+    def create(self, vals_list):
+        """Drop the cached phone lookups (misses included) when partners with a phone are created"""
+        partners = super().create(vals_list)
+        if any(vals.get('mobile') or vals.get('phone') for vals in vals_list):
+            self._invalidate_phone_lookup_cache()
+        return partners
+    
+    def write(self, vals):
+        """Drop the cached phone lookups when a phone (or the lookup scope) changes"""
+        result = super().write(vals)
+        if PHONE_LOOKUP_FIELDS.intersection(vals):
+            self._invalidate_phone_lookup_cache()
+        return result
+    
+    def unlink(self):
+        """Drop the cached phone lookups when partners with a phone are deleted (e.g. merged)"""
+        had_phone = any(self.mapped('phone_normalized'))
+        result = super().unlink()
+        if had_phone:
+            self._invalidate_phone_lookup_cache()
+        return result
+    
+    @api.model
+    def _get_partner_id_by_phone(self, core_number):
+        """Id of the individual customer with this core phone number, or False
+        
+        The most recent visitor wins when several customers share the number.
+        Cached per worker in the registry LRU, misses included, and keyed on
+        the phone lookup generation: repeat guests are resolved with a read of
+        the generation log instead of a partner search. A transaction that
+        changed phones searches directly until it commits.
+        """
+        if self.env.cr.postcommit.data.get(PHONE_LOOKUP_CHANGED):
+            return self._search_by_phone(core_number, limit=1).id or False
+        return self._lookup_partner_id_by_phone(core_number, self._get_phone_lookup_generation())
+    
+    @api.model
+    @tools.ormcache('self.env.uid', 'tuple(self.env.companies.ids)', 'core_number', 'generation')
+    def _lookup_partner_id_by_phone(self, core_number, generation):
+        """Cached phone lookup of _get_partner_id_by_phone for one generation"""
+        return self._search_by_phone(core_number, limit=1).id or False
+    
+    @api.model
+    def _get_phone_lookup_generation(self):
+        """Current phone lookup generation: (latest generation, number of generations)
+        
+        The log is read in the transaction snapshot, like the partners the
+        lookup searches, so a lookup is never cached under a generation newer
+        than the phones it saw. The count makes a change visible even when a
+        transaction holding an older generation number commits after a newer
+        one.
+        """
+        self.env.cr.execute(f"""
+            SELECT COALESCE(MAX(generation), 0), COUNT(generation)
+              FROM {PHONE_LOOKUP_GENERATION_TABLE}
+        """)
+        return self.env.cr.fetchone()
+    
+    @api.model
+    def _search_by_phone(self, core_numbers, limit=None):
+        """Individual customers with these core phone numbers (one or a list) as
+        mobile or phone, most recent visitor first, on the normalized indexes"""
+        operator = 'in' if isinstance(core_numbers, (list, tuple, set)) else '='
+        return self.search([
+            '|',
+            ('phone_normalized', operator, core_numbers),
+            ('phone_secondary_normalized', operator, core_numbers),
+            ('is_company', '=', False),
+        ], order=PHONE_MATCH_ORDER, limit=limit)
+    
+    @api.model
+    def _invalidate_phone_lookup_cache(self):
+        """Start a new phone lookup generation, visible when the transaction commits
+        
+        The generation is logged in the transaction that changes the phones,
+        so other workers see it together with the new phones; the other
+        registry caches stay valid. Until the commit this transaction bypasses
+        the cache (the flag is dropped on commit and rollback).
+        """
+        cr = self.env.cr
+        if cr.postcommit.data.get(PHONE_LOOKUP_CHANGED):
+            return
+        cr.postcommit.data[PHONE_LOOKUP_CHANGED] = True
+        cr.execute(f"""
+            INSERT INTO {PHONE_LOOKUP_GENERATION_TABLE} (generation)
+                 VALUES (nextval('{PHONE_LOOKUP_GENERATION_TABLE}_seq'))
+        """)
+    
+    @api.model
+    def _cron_prune_phone_lookup_generations(self):
+        """Replace the phone lookup generation log by one new generation (nightly cron)
+        
+        Only the latest generation and the row count are read; the new
+        generation keeps the key from going back to one that was cached for
+        older phones. Transactions still running keep their own rows.
+        """
+        self.env.cr.execute(f"""
+            WITH pruned AS (
+                DELETE FROM {PHONE_LOOKUP_GENERATION_TABLE} RETURNING 1
+            )
+            INSERT INTO {PHONE_LOOKUP_GENERATION_TABLE} (generation)
+                 SELECT nextval('{PHONE_LOOKUP_GENERATION_TABLE}_seq')
+                  WHERE EXISTS (SELECT 1 FROM pruned)
+        """)
+        _logger.info('Pruned the phone lookup generations')
+    
+    @api.model
+    def _backfill_phone_normalized(self, recompute=False, chunk_size=10000):
+        """Fill phone_normalized (and the secondary phone) in chunks, with one UPDATE per chunk
+        
+        Only partners without value are processed, unless recompute is set
+        (e.g. after the normalization rules changed). Returns the number of
+        partners updated.
+        """
+        phone_engine = self.env['waiting.list.phone']
+        missing_filter = '' if recompute else 'AND phone_normalized IS NULL'
+        self.flush_model(['mobile', 'phone', 'phone_normalized', 'phone_secondary_normalized'])
+        last_id = 0
+        total = 0
+        while True:
+            self.env.cr.execute(f"""
+                SELECT id, mobile, phone
+                  FROM res_partner
+                 WHERE id > %s
+                   AND (mobile IS NOT NULL OR phone IS NOT NULL)
+                   {missing_filter}
+              ORDER BY id
+                 LIMIT %s
+            """, (last_id, chunk_size))
+            rows = self.env.cr.fetchall()
+            if not rows:
+                break
+            last_id = rows[-1][0]
+            
+            ids, core_numbers, secondary_numbers = [], [], []
+            for partner_id, mobile, phone in rows:
+                core_number, secondary_number = self._get_normalized_phones(mobile, phone)
+                ids.append(partner_id)
+                core_numbers.append(core_number or None)
+                secondary_numbers.append(secondary_number or None)
+            self.env.cr.execute("""
+                UPDATE res_partner AS p
+                   SET phone_normalized = v.phone_normalized,
+                       phone_secondary_normalized = v.phone_secondary_normalized
+                  FROM unnest(%s::int[], %s::varchar[], %s::varchar[])
+                       AS v(id, phone_normalized, phone_secondary_normalized)
+                 WHERE p.id = v.id
+                   AND (p.phone_normalized IS DISTINCT FROM v.phone_normalized
+                        OR p.phone_secondary_normalized IS DISTINCT FROM v.phone_secondary_normalized)
+            """, (ids, core_numbers, secondary_numbers))
+            total += self.env.cr.rowcount
+            _logger.info('Backfilled phone_normalized up to partner %d (%d updated so far)', last_id, total)
+        
+        self.invalidate_model(['phone_normalized', 'phone_secondary_normalized'])
+        self._invalidate_phone_lookup_cache()
+        return total
+    
+    @api.model
+    def _update_trigram_indexes(self, enabled):
+        """Create (or drop) the pg_trgm GIN indexes of the fuzzy customer search
+        
+        The pg_trgm extension is created if needed; raises a UserError when the
+        database user is not allowed to create it.
+        """
+        cr = self.env.cr
+        if not enabled:
+            for indexname in PARTNER_TRIGRAM_INDEXES:
+                sql.drop_index(cr, indexname, self._table)
+            return
+        
+        if not sql.has_trigram(cr):
+            try:
+                with cr.savepoint():
+                    cr.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+            except psycopg2.Error as e:
+                _logger.warning('Could not create the pg_trgm extension: %s', e)
+                raise UserError(_(
+                    'Fuzzy customer search needs the PostgreSQL extension "pg_trgm". '
+                    'Ask your database administrator to run "CREATE EXTENSION pg_trgm;" on this database.'
+                ))
+        
+        for indexname, column in PARTNER_TRIGRAM_INDEXES.items():
+            sql.create_index(cr, indexname, self._table, [f'"{column}" gin_trgm_ops'], method='gin')
+        _logger.info('Created the trigram indexes of the fuzzy customer search')
+    
     @api.depends('allergen_ids')
     def _compute_has_allergens(self):
         """Check if customer has any allergen restrictions"""
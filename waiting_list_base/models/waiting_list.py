@@ -2,11 +2,21 @@
 
 from odoo import models, fields, api, _
 from odoo.exceptions import ValidationError, UserError
+from odoo.tools import SQL
+from odoo.tools.sql import escape_psql
 from datetime import datetime, timedelta
 import logging
+from .phone_normalization import MIN_PHONE_DIGITS, phone_digits
+from .waiting_list_perf import instrumented
 
 _logger = logging.getLogger(__name__)
 
+# Shortest search term of the customer typeahead (shortest trigram)
+CUSTOMER_SEARCH_MIN_CHARS = 3
+
+# Default number of candidates returned by the customer typeahead
+CUSTOMER_SEARCH_LIMIT = 8
+
 
 class WaitingListBase(models.Model):
     @api.depends('party_size', 'create_date')
@@ -262,7 +272,13 @@ class WaitingListBase(models.Model):
             record.customer_mobile = record.customer_id.mobile if record.customer_id else record.customer_mobile
     
     def _inverse_customer_mobile(self):
-        pass
+        """Save the mobile on customers that have no phone number on file"""
+        for record in self:
+            customer = record.customer_id
+            if customer and record.customer_mobile and not (
+                customer.phone_normalized or customer.phone_secondary_normalized
+            ):
+                customer.mobile = record.customer_mobile
     
     @api.depends('customer_id', 'customer_id.email')
     def _compute_customer_email(self):
@@ -286,9 +302,9 @@ class WaitingListBase(models.Model):
     @api.depends('survey_id', 'survey_token')
     def _compute_survey_url(self):
         """Generate public survey URL"""
+        base_url = self.env['waiting.list.settings']._get_snapshot()['base_url']
         for record in self:
             if record.survey_id:
-                base_url = record.env['ir.config_parameter'].sudo().get_param('web.base.url')
                 # Use public survey URL without token - customer can start fresh
                 # Token is stored separately and linked after survey submission
                 record.survey_url = f"{base_url}/survey/start/{record.survey_id.access_token}"
@@ -314,166 +330,204 @@ class WaitingListBase(models.Model):
     def _normalize_phone_number(self, phone):
         """Normalize phone number for search - UNIVERSAL (works with any country code)
         
-        Handles all formats including spaces, dashes, parentheses, and plus signs.
-        Automatically detects and removes ANY country code (2-3 digits with +/00 or without)
+        Parsed in one pass against the country calling code trie of the
+        waiting.list.phone engine (company country as default code).
         
         Examples: 
         - "+971 50 123 4567" -> core: "501234567"
-        - "00 44 20 1234 5678" -> core: "201234567"
+        - "00 44 20 1234 5678" -> core: "2012345678"
         - "+1 555 123 4567" -> core: "5551234567"
         - "0501234567" -> core: "501234567"
         
         Returns tuple: (core_number, search_patterns)
-        - core_number: The base number without country code or leading zero
-        - search_patterns: List of variations to search for (handles spaces in DB)
+        - core_number: The national number without country code or leading zero
+        - search_patterns: The core number and its E.164 form
         """
         if not phone:
             return None, []
         
-        # Clean the phone number (remove all non-digit characters: spaces, dashes, parentheses, plus signs, etc.)
-        cleaned = ''.join(filter(str.isdigit, phone))
-        
-        _logger.info(f'Normalizing phone number: "{phone}" -> "{cleaned}"')
-        
-        if len(cleaned) < 9:
-            _logger.warning(f'Phone number too short after cleaning: {cleaned} (length: {len(cleaned)})')
+        phone_engine = self.env['waiting.list.phone']
+        core_number = phone_engine.get_core_number(phone)
+        if not core_number:
+            _logger.debug('Phone number too short or invalid: %s', phone)
             return None, []
         
-        # Universal country code detection
-        # Try to detect if first 2-3 digits are a country code
-        country_code = None
-        core_number = cleaned
-        
-        # Check for 3-digit country code (e.g., 971, 966, 001)
-        if len(cleaned) >= 12:  # 3-digit code + 9-digit number minimum
-            potential_code = cleaned[:3]
-            remaining = cleaned[3:]
-            if len(remaining) >= 9:
-                country_code = potential_code
-                core_number = remaining
-                _logger.info(f'Detected 3-digit country code: {country_code}')
-        
-        # Check for 2-digit country code (e.g., 20, 44, 91)
-        if not country_code and len(cleaned) >= 11:  # 2-digit code + 9-digit number minimum
-            potential_code = cleaned[:2]
-            remaining = cleaned[2:]
-            if len(remaining) >= 9:
-                country_code = potential_code
-                core_number = remaining
-                _logger.info(f'Detected 2-digit country code: {country_code}')
-        
-        # Check for 1-digit country code (e.g., 1 for US/Canada)
-        if not country_code and len(cleaned) >= 11:  # 1-digit code + 10-digit number
-            potential_code = cleaned[:1]
-            remaining = cleaned[1:]
-            if len(remaining) == 10:  # Typical for US/Canada
-                country_code = potential_code
-                core_number = remaining
-                _logger.info(f'Detected 1-digit country code: {country_code}')
-        
-        # Remove leading zero from core number if present
-        if core_number.startswith('0'):
-            core_number = core_number[1:]
-        
-        _logger.info(f'Core number extracted: {core_number} (country code: {country_code or "none"})')
-        
-        # Generate comprehensive search patterns to handle various DB storage formats
-        # IMPORTANT: All patterns must include the FULL core number to avoid false matches
-        patterns = []
-        
-        # 1. Core patterns (no country code)
-        patterns.append(core_number)  # "501234567"
-        patterns.append('0' + core_number)  # "0501234567"
-        
-        # 2. Patterns with spaces (handle various spacing formats)
-        if len(core_number) >= 9:
-            # Format: XX XXX XXXX (common in many countries)
-            spaced = f"{core_number[:2]} {core_number[2:5]} {core_number[5:]}"
-            patterns.append(spaced)  # "50 123 4567"
-            patterns.append('0 ' + spaced)  # "0 50 123 4567"
-            patterns.append(f"0{core_number[:2]} {core_number[2:5]} {core_number[5:]}")  # "050 123 4567"
-            
-            # Format: XXX XXX XXXX (common in US)
-            if len(core_number) >= 10:
-                spaced_us = f"{core_number[:3]} {core_number[3:6]} {core_number[6:]}"
-                patterns.append(spaced_us)  # "555 123 4567"
-        
-        # 3. With detected country code (if any)
-        if country_code:
-            patterns.append(country_code + core_number)  # "971501234567"
-            patterns.append(country_code + ' ' + core_number)  # "971 501234567"
-            patterns.append(country_code + '0' + core_number)  # "9710501234567"
-            
-            # With country code and spacing (FULL number only - no partial matches)
-            if len(core_number) >= 9:
-                patterns.append(f"{country_code} {core_number[:2]} {core_number[2:5]} {core_number[5:]}")  # "971 50 123 4567"
-                patterns.append(f"+{country_code} {core_number[:2]} {core_number[2:5]} {core_number[5:]}")  # "+971 50 123 4567"
-                patterns.append(f"+{country_code} 0{core_number[:2]} {core_number[2:5]} {core_number[5:]}")  # "+971 050 123 4567"
-        
-        _logger.info(f'Generated {len(patterns)} search patterns including: {patterns[:3]}')
+        return core_number, [core_number, phone_engine.to_e164(phone)]
+    
+    def _find_customer_by_phone(self, phone):
+        """Existing individual customer with this phone number, or an empty recordset
         
-        return core_number, patterns
+        Resolved through the per-worker phone lookup cache; a cache miss is one
+        exact-match probe on the indexed normalized mobile and phone of res.partner.
+        """
+        Partner = self.env['res.partner']
+        core_number = self.env['waiting.list.phone'].get_core_number(phone)
+        if not core_number:
+            return Partner
+        return Partner.browse(Partner._get_partner_id_by_phone(core_number))
     
-    @api.onchange('customer_mobile')
-    def _onchange_customer_mobile(self):
-        """Search for existing customer by mobile number
+    @api.model
+    def resolve_customers_by_phone(self, numbers, names=None, create_missing=True):
+        """Resolve many phone numbers to customers at once (imports, POS sync)
+        
+        All numbers are normalized first, existing customers are read with one
+        query on the indexed normalized phone and the missing ones are created
+        with a single create() call.
+        
+        :param numbers: list of phone numbers, in any format
+        :param names: optional {number: customer name} used for new customers
+                      (the number is the name otherwise)
+        :param create_missing: create customers for unknown numbers
+        :return: {number: partner id}, False for invalid (or unknown, when not
+                 created) numbers
+        """
+        Partner = self.env['res.partner']
+        phone_engine = self.env['waiting.list.phone']
+        names = names or {}
+        
+        core_numbers = {number: phone_engine.get_core_number(number) for number in dict.fromkeys(numbers) if number}
+        partner_ids = {}
+        
+        # First match (most recent visitor), like the single number lookup
+        wanted = set(filter(None, core_numbers.values()))
+        existing = Partner._search_by_phone(list(wanted))
+        for partner in existing:
+            for core_number in (partner.phone_normalized, partner.phone_secondary_normalized):
+                if core_number in wanted:
+                    partner_ids.setdefault(core_number, partner.id)
+        
+        if create_missing:
+            # One new customer per unknown core number (first spelling in the input wins)
+            new_customers = {}
+            for number, core_number in core_numbers.items():
+                if core_number and core_number not in partner_ids and core_number not in new_customers:
+                    new_customers[core_number] = {
+                        'name': names.get(number) or number,
+                        'mobile': number,
+                        'is_waiting_list_customer': True,
+                        'is_company': False,
+                    }
+            if new_customers:
+                created = Partner.create(list(new_customers.values()))
+                partner_ids.update(zip(new_customers, created.ids))
+                _logger.info('Created %d customers while resolving %d phone numbers', len(created), len(core_numbers))
         
-        Automatically searches when mobile number is entered.
-        Handles all formats: +971 50 123 4567, 971501234567, 0501234567, etc.
+        return {
+            number: partner_ids.get(core_numbers.get(number), False)
+            for number in numbers
+        }
+    
+    @api.model
+    def search_customer_candidates(self, term, limit=CUSTOMER_SEARCH_LIMIT):
+        """Top customer candidates for a partial phone number or name typed by the host
+        
+        Digits-only terms ("4567", "050 12") match the start of the normalized
+        mobile or phone, or anywhere in it when fuzzy customer search is
+        enabled (pg_trgm GIN indexes), exact and trailing matches first; other
+        terms match the name, ranked by trigram word similarity when fuzzy
+        search is enabled, by prefix match otherwise. Ties go to the most
+        recent visitor. Only customers the user may read (record rules) are
+        returned. One query, candidates with their allergens:
+        
+        [{'id', 'name', 'mobile', 'phone', 'last_visit_date', 'visit_count',
+          'has_allergens', 'allergens', 'exact_match'}, ...]
+        
+        Called by the customer lookup widget of the mobile field (debounced
+        while the host types), in place of a form onchange per edit.
         """
-        if self.customer_mobile:
-            _logger.info(f'Mobile onchange triggered with value: "{self.customer_mobile}"')
-            
-            # Normalize and get search patterns
-            core_number, patterns = self._normalize_phone_number(self.customer_mobile)
-            
-            if core_number and len(core_number) >= 9:
-                _logger.info(f'Searching for customer with core number: {core_number}')
-                _logger.info(f'Search patterns: {patterns}')
-                
-                # Build OR domain for all patterns (to handle various DB formats like "+971 50 123 4567")
-                # Domain structure: (pattern1 OR pattern2 OR ... OR patternN) AND is_company=False
-                pattern_conditions = []
-                for pattern in patterns:
-                    pattern_conditions.append(('mobile', 'ilike', pattern))
-                    pattern_conditions.append(('phone', 'ilike', pattern))
-                
-                # Build domain with proper OR structure
-                if len(pattern_conditions) == 2:
-                    # Only one pattern: simple OR
-                    domain = ['&', '|', pattern_conditions[0], pattern_conditions[1], ('is_company', '=', False)]
-                else:
-                    # Multiple patterns: chain ORs
-                    domain = ['&']
-                    # Build OR chain: '|', '|', '|', cond1, cond2, cond3, cond4, ...
-                    domain.extend(['|'] * (len(pattern_conditions) - 1))
-                    domain.extend(pattern_conditions)
-                    domain.append(('is_company', '=', False))
-                
-                _logger.info(f'Search domain (showing first 10 elements): {domain[:10]}')
-                
-                # Search for existing partner
-                partner = self.env['res.partner'].search(domain, limit=1)
-                
-                if partner:
-                    # Found existing customer - populate fields
-                    _logger.info(f'Found existing customer: {partner.name} (ID: {partner.id}, mobile: {partner.mobile}, phone: {partner.phone})')
-                    self.customer_id = partner
-                    self.customer_name = partner.name
-                    self.customer_phone = partner.phone
-                    self.customer_email = partner.email
-                    # return {
-                    #     'warning': {
-                    #         'title': _('Existing Customer Found'),
-                    #         'message': _('Customer "%s" found with this mobile number. Details have been loaded.') % partner.name
-                    #     }
-                    # }
-                else:
-                    # No existing customer - clear customer_id to allow new creation
-                    _logger.info('No existing customer found with this mobile number')
-                    self.customer_id = False
+        term = (term or '').strip()
+        if len(term) < CUSTOMER_SEARCH_MIN_CHARS:
+            return []
+        
+        Partner = self.env['res.partner']
+        Partner.check_access('read')
+        Partner.flush_model([
+            'name', 'phone_normalized', 'phone_secondary_normalized', 'mobile', 'phone',
+            'active', 'is_company', 'company_id',
+            'last_visit_date', 'waiting_list_count', 'has_allergens', 'allergen_ids',
+        ])
+        
+        fuzzy = self.env['waiting.list.settings']._get_snapshot()['fuzzy_customer_search']
+        digits = phone_digits(term)
+        phone_search = bool(digits) and not any(char.isalpha() for char in term)
+        if phone_search:
+            # Partial phone number: core number when complete, else the typed digits
+            number = digits.lstrip('0')
+            if len(digits) >= MIN_PHONE_DIGITS:
+                number = self.env['waiting.list.phone'].get_core_number(term) or number
+            if len(number) < CUSTOMER_SEARCH_MIN_CHARS:
+                return []
+            # Matching inside the number is a sequential scan without the trigram
+            # indexes: the prefix match runs on the varchar_pattern_ops indexes
+            pattern = f'%{number}%' if fuzzy else f'{number}%'
+            match = SQL(
+                """(res_partner.phone_normalized LIKE %(pattern)s
+                    OR res_partner.phone_secondary_normalized LIKE %(pattern)s)""",
+                pattern=pattern,
+            )
+            score = SQL(
+                """CASE WHEN %(number)s IN (res_partner.phone_normalized,
+                                           res_partner.phone_secondary_normalized) THEN 2.0
+                          WHEN res_partner.phone_normalized LIKE %(suffix)s
+                            OR res_partner.phone_secondary_normalized LIKE %(suffix)s THEN 1.0
+                          ELSE 0.0 END""",
+                number=number, suffix=f'%{number}',
+            )
+        else:
+            escaped = escape_psql(term)
+            contains = f'%{escaped}%'
+            if fuzzy:
+                match = SQL(
+                    "(%(term)s <%% res_partner.name OR res_partner.name ILIKE %(contains)s)",
+                    term=term, contains=contains,
+                )
+                score = SQL("word_similarity(%s, res_partner.name)", term)
             else:
-                _logger.warning(f'Mobile number too short or invalid: {self.customer_mobile}')
+                match = SQL("res_partner.name ILIKE %s", contains)
+                score = SQL("CASE WHEN res_partner.name ILIKE %s THEN 1.0 ELSE 0.0 END", f'{escaped}%')
+        
+        # Active individuals of the allowed companies, within the record rules of the user
+        query = Partner._search([
+            ('is_company', '=', False),
+            ('company_id', 'in', [False] + self.env.companies.ids),
+        ])
+        query.add_where(match)
+        query.order = SQL("score DESC, res_partner.last_visit_date DESC NULLS LAST, res_partner.id")
+        query.limit = limit
+        candidates = query.select(SQL(
+            """res_partner.id, res_partner.name, res_partner.mobile, res_partner.phone,
+               res_partner.last_visit_date, res_partner.waiting_list_count,
+               res_partner.has_allergens, %s AS score""",
+            score,
+        ))
+        
+        self.env.cr.execute(SQL("""
+            WITH candidates AS MATERIALIZED (%(candidates)s)
+            SELECT c.*, COALESCE(a.allergens, ARRAY[]::varchar[]) AS allergens
+              FROM candidates c
+         LEFT JOIN LATERAL (
+                SELECT array_agg(COALESCE(al.name->>%(lang)s, al.name->>'en_US')
+                                 ORDER BY al.sequence, al.id) AS allergens
+                  FROM partner_allergen_rel rel
+                  JOIN waiting_list_allergen al ON al.id = rel.allergen_id
+                 WHERE rel.partner_id = c.id
+                   AND al.active
+                   ) a ON c.has_allergens
+          ORDER BY c.score DESC, c.last_visit_date DESC NULLS LAST, c.id
+        """, candidates=candidates, lang=self.env.lang or 'en_US'))
+        
+        return [{
+            'id': row['id'],
+            'name': row['name'],
+            'mobile': row['mobile'] or False,
+            'phone': row['phone'] or False,
+            'last_visit_date': fields.Datetime.to_string(row['last_visit_date']) if row['last_visit_date'] else False,
+            'visit_count': row['waiting_list_count'] or 0,
+            'has_allergens': bool(row['has_allergens']),
+            'allergens': row['allergens'],
+            # Whole number typed and found: the customer can be linked directly
+            'exact_match': phone_search and row['score'] >= 2.0,
+        } for row in self.env.cr.dictfetchall()]
     
     @api.onchange('customer_id')
     def _onchange_customer_allergens(self):
@@ -494,32 +548,11 @@ class WaitingListBase(models.Model):
         if not self.customer_mobile:
             raise UserError(_('Please enter a mobile number to search.'))
         
-        # Normalize and get search patterns
-        core_number, patterns = self._normalize_phone_number(self.customer_mobile)
-        
-        if not core_number or len(core_number) < 9:
+        if not self.env['waiting.list.phone'].get_core_number(self.customer_mobile):
             raise UserError(_('Mobile number must be at least 9 digits long.'))
         
-        # Build OR domain for all patterns (to handle various DB formats like "+971 50 123 4567")
-        pattern_conditions = []
-        for pattern in patterns:
-            pattern_conditions.append(('mobile', 'ilike', pattern))
-            pattern_conditions.append(('phone', 'ilike', pattern))
-        
-        # Build domain with proper OR structure
-        if len(pattern_conditions) == 2:
-            # Only one pattern: simple OR
-            domain = ['&', '|', pattern_conditions[0], pattern_conditions[1], ('is_company', '=', False)]
-        else:
-            # Multiple patterns: chain ORs
-            domain = ['&']
-            # Build OR chain: '|', '|', '|', cond1, cond2, cond3, cond4, ...
-            domain.extend(['|'] * (len(pattern_conditions) - 1))
-            domain.extend(pattern_conditions)
-            domain.append(('is_company', '=', False))
-        
-        # Search for existing partner
-        partner = self.env['res.partner'].search(domain, limit=1)
+        # Search for existing partner (indexed normalized phone)
+        partner = self._find_customer_by_phone(self.customer_mobile)
         
         if partner:
             # Found existing customer - populate fields
@@ -581,7 +614,12 @@ class WaitingListBase(models.Model):
                 record.actual_wait_time = 0
     
     @api.model
+    @instrumented
     def create(self, vals):
+        # Link the existing customer with this mobile (cached phone lookup)
+        if not vals.get('customer_id') and vals.get('customer_mobile'):
+            vals['customer_id'] = self._find_customer_by_phone(vals['customer_mobile']).id
+        
         # Auto-create customer if mobile/name provided but no customer_id
         if not vals.get('customer_id'):
             # Check if we have enough info to create a customer
@@ -650,6 +688,11 @@ class WaitingListBase(models.Model):
         for record in self:
             if not vals.get('customer_id') and not record.customer_id:
                 if vals.get('customer_mobile') or (record.customer_mobile and 'customer_name' in vals):
+                    # Link the existing customer with this mobile first
+                    existing = self._find_customer_by_phone(vals.get('customer_mobile', record.customer_mobile))
+                    if existing:
+                        vals['customer_id'] = existing.id
+                        continue
                     customer_vals = {
                         'name': vals.get('customer_name', record.customer_name or 'Guest'),
                         'mobile': vals.get('customer_mobile', record.customer_mobile),
@@ -683,6 +726,7 @@ class WaitingListBase(models.Model):
         
         return result
     
+    @instrumented
     def action_mark_seated(self):
         """Mark customer as seated"""
         for record in self:
@@ -809,7 +853,7 @@ class WaitingListBase(models.Model):
                     'survey_token': token,
                     'survey_input_id': survey_input.id
                 })
-                _logger.info(f'Generated survey token for waiting list {record.name}: {token} (survey_input: {survey_input.id})')
+                _logger.debug('Generated survey token for waiting list %s (survey_input: %s)', record.name, survey_input.id)
     
     def _queue_survey_notification(self):
         """Queue feedback survey notification to be sent via SMS/WhatsApp"""
@@ -817,10 +861,9 @@ class WaitingListBase(models.Model):
         
         if not self.survey_id:
             # Get default survey from config
-            config = self.env['ir.config_parameter'].sudo()
-            default_survey_id = config.get_param('waiting_list.default_survey_id')
+            default_survey_id = self.env['waiting.list.settings']._get_snapshot()['default_survey_id']
             if default_survey_id:
-                self.survey_id = int(default_survey_id)
+                self.survey_id = default_survey_id
             else:
                 _logger.warning('No default survey configured for waiting list %s', self.name)
                 return False
@@ -850,10 +893,10 @@ class WaitingListBase(models.Model):
                 'state': 'pending',
                 'scheduled_time': fields.Datetime.now(),
             })
-            _logger.info('Survey notification queued for %s', self.name)
-            # Try to send immediately
+            _logger.debug('Survey notification queued for %s', self.name)
+            # Sent after commit by the notification cron (or right away when configured)
             try:
-                notification.action_send()
+                notification._dispatch()
             except Exception as e:
                 _logger.warning('Failed to send survey notification immediately: %s', str(e))
         else:
@@ -897,10 +940,10 @@ class WaitingListBase(models.Model):
                 'state': 'pending',
                 'scheduled_time': fields.Datetime.now(),
             })
-            _logger.info('Queue added notification queued for %s', self.name)
-            # Try to send immediately
+            _logger.debug('Queue added notification queued for %s', self.name)
+            # Sent after commit by the notification cron (or right away when configured)
             try:
-                notification.action_send()
+                notification._dispatch()
             except Exception as e:
                 _logger.warning('Failed to send queue added notification immediately: %s', str(e))
         else:
@@ -939,10 +982,10 @@ class WaitingListBase(models.Model):
                 'state': 'pending',
                 'scheduled_time': fields.Datetime.now(),
             })
-            _logger.info('Cancellation notification queued for %s', self.name)
-            # Try to send immediately
+            _logger.debug('Cancellation notification queued for %s', self.name)
+            # Sent after commit by the notification cron (or right away when configured)
             try:
-                notification.action_send()
+                notification._dispatch()
             except Exception as e:
                 _logger.warning('Failed to send cancellation notification immediately: %s', str(e))
         else:
@@ -981,10 +1024,10 @@ class WaitingListBase(models.Model):
                 'state': 'pending',
                 'scheduled_time': fields.Datetime.now(),
             })
-            _logger.info('No-show notification queued for %s', self.name)
-            # Try to send immediately
+            _logger.debug('No-show notification queued for %s', self.name)
+            # Sent after commit by the notification cron (or right away when configured)
             try:
-                notification.action_send()
+                notification._dispatch()
             except Exception as e:
                 _logger.warning('Failed to send no-show notification immediately: %s', str(e))
         else:
@@ -1023,10 +1066,10 @@ class WaitingListBase(models.Model):
                 'state': 'pending',
                 'scheduled_time': fields.Datetime.now(),
             })
-            _logger.info('Ready notification queued for %s', self.name)
-            # Try to send immediately
+            _logger.debug('Ready notification queued for %s', self.name)
+            # Sent after commit by the notification cron (or right away when configured)
             try:
-                notification.action_send()
+                notification._dispatch()
             except Exception as e:
                 _logger.warning('Failed to send ready notification immediately: %s', str(e))
         else:
@@ -1048,7 +1091,7 @@ class WaitingListBase(models.Model):
         lang = self.customer_id.lang or self.env.user.lang or 'en_US'
         
         # Generate URL with token for direct access
-        base_url = self.env['ir.config_parameter'].sudo().get_param('web.base.url')
+        base_url = self.env['waiting.list.settings']._get_snapshot()['base_url']
         survey_url = f"{base_url}/survey/start/{self.survey_id.access_token}/{self.survey_token}" if self.survey_token else self.survey_url
         
         # Bilingual message (English + Arabic)
@@ -1304,6 +1347,7 @@ Please proceed to the host stand.
                     _logger.warning('Failed to queue no-show notification for %s: %s', record.name, str(e))
         return True
     
+    @instrumented
     def action_mark_ready(self):
         """Mark customer as ready and send notification"""
         for record in self:
@@ -1332,6 +1376,7 @@ Please proceed to the host stand.
         return True
     
     @api.model
+    @instrumented
     def get_dashboard_statistics(self):
         """Get dashboard statistics"""
         # Use create_date field to filter records created today
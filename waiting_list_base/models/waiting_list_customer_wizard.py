@@ -3,6 +3,9 @@
 from odoo import models, fields, api, _
 from odoo.exceptions import ValidationError
 
+# Maximum number of existing customers proposed for one mobile number
+EXISTING_CUSTOMERS_LIMIT = 5
+
 
 class WaitingListQuickCustomer(models.TransientModel):
     """Quick customer creation/selection for waiting list"""
@@ -22,7 +25,7 @@ class WaitingListQuickCustomer(models.TransientModel):
         'res.partner',
         string='Existing Customers',
         compute='_compute_existing_customers',
-        help='Customers found with the same mobile number'
+        help='Customers found with the same mobile number, most recent visitor first'
     )
     
     has_duplicates = fields.Boolean(
@@ -30,32 +33,47 @@ class WaitingListQuickCustomer(models.TransientModel):
         compute='_compute_existing_customers'
     )
     
+    best_match_id = fields.Many2one(
+        'res.partner',
+        string='Best Match',
+        compute='_compute_existing_customers',
+        help='Most recent visitor with this mobile number, the customer the waiting list form would pick'
+    )
+    
     selected_customer_id = fields.Many2one(
         'res.partner',
         string='Select Existing Customer',
+        compute='_compute_selected_customer_id',
+        store=True,
+        readonly=False,
         domain="[('id', 'in', existing_customers)]"
     )
     
     @api.depends('mobile')
     def _compute_existing_customers(self):
-        """Search for existing customers with the same mobile"""
+        """Search for existing customers with the same mobile
+        
+        Same lookup as the waiting list form: indexed normalized phone,
+        individuals only, most recent visitor first, capped.
+        """
+        phone_engine = self.env['waiting.list.phone']
         for record in self:
-            if record.mobile:
-                # Clean mobile number (remove spaces, dashes, etc.)
-                clean_mobile = record.mobile.replace(' ', '').replace('-', '').replace('(', '').replace(')', '')
-                
-                # Search for existing customers
-                existing = self.env['res.partner'].search([
-                    '|', 
-                    ('mobile', 'ilike', clean_mobile),
-                    ('phone', 'ilike', clean_mobile)
-                ])
-                
+            core_number = phone_engine.get_core_number(record.mobile) if record.mobile else None
+            if core_number:
+                existing = self.env['res.partner']._search_by_phone(core_number, limit=EXISTING_CUSTOMERS_LIMIT)
                 record.existing_customers = existing
-                record.has_duplicates = len(existing) > 0
+                record.has_duplicates = bool(existing)
+                record.best_match_id = existing[:1]
             else:
                 record.existing_customers = False
                 record.has_duplicates = False
+                record.best_match_id = False
+    
+    @api.depends('best_match_id')
+    def _compute_selected_customer_id(self):
+        """Preselect the strongest match"""
+        for record in self:
+            record.selected_customer_id = record.best_match_id
     
     @api.constrains('mobile')
     def _check_mobile(self):
@@ -0,0 +1,254 @@
+# -*- coding: utf-8 -*-
+
+from odoo import models, fields, api, Command, _
+from odoo.exceptions import UserError, ValidationError
+from odoo.tools import split_every
+import logging
+from .waiting_list_perf import instrumented
+
+_logger = logging.getLogger(__name__)
+
+# Duplicate groups detected (and committed, in the cron) per chunk
+DUPLICATE_CHUNK_SIZE = 500
+
+# The partner merge wizard merges at most 3 contacts at once
+MERGE_BATCH_SIZE = 3
+
+
+class WaitingListDuplicatePartner(models.Model):
+    """Customers sharing one normalized phone number
+
+    Report of the duplicate detection job: one row per normalized number held,
+    as mobile or as phone, by several active individual customers. The
+    customer with the most visits is kept; merging moves the visits
+    (waiting_list_ids) and every other reference of the duplicates onto it
+    and deletes them.
+    """
+
+    _name = 'waiting.list.duplicate.partner'
+    _description = 'Waiting List Duplicate Customers'
+    _order = 'state, partner_count desc, phone_normalized'
+    _rec_name = 'phone_normalized'
+
+    phone_normalized = fields.Char(
+        string='Normalized Phone',
+        required=True,
+        index=True,
+        readonly=True
+    )
+
+    partner_ids = fields.Many2many(
+        'res.partner',
+        'waiting_list_duplicate_partner_rel',
+        'duplicate_id',
+        'partner_id',
+        string='Customers',
+        readonly=True
+    )
+
+    partner_count = fields.Integer(
+        string='Duplicates',
+        readonly=True
+    )
+
+    master_partner_id = fields.Many2one(
+        'res.partner',
+        string='Kept Customer',
+        ondelete='set null',
+        help='Customer with the most visits; the other customers are merged into it'
+    )
+
+    visit_count = fields.Integer(
+        string='Visits',
+        readonly=True,
+        help='Total visits of the duplicated customers'
+    )
+
+    state = fields.Selection([
+        ('detected', 'Detected'),
+        ('merged', 'Merged'),
+    ], string='Status', default='detected', required=True, index=True, readonly=True)
+
+    detection_date = fields.Datetime(
+        string='Detected On',
+        readonly=True
+    )
+
+    merge_date = fields.Datetime(
+        string='Merged On',
+        readonly=True
+    )
+
+    _sql_constraints = [
+        ('phone_normalized_uniq', 'unique(phone_normalized)',
+         'Only one duplicate report per normalized phone is allowed.'),
+    ]
+
+    @api.model
+    def _detect_duplicates(self, merge=False, chunk_size=DUPLICATE_CHUNK_SIZE, auto_commit=False):
+        """Detect (and optionally merge) customers sharing a normalized phone
+
+        The numbers of the partners (phone_normalized and the secondary phone)
+        are streamed in order along their indexes, a chunk of duplicate groups
+        per GROUP BY query (keyset pagination), so the job scales to millions
+        of partners; with auto_commit every chunk is committed to keep locks
+        short. Reports of phones that are no longer duplicated are removed.
+        Returns the number of duplicate groups found.
+        """
+        detection_date = fields.Datetime.now()
+        self.env['res.partner'].flush_model([
+            'phone_normalized', 'phone_secondary_normalized', 'active', 'is_company', 'waiting_list_count',
+        ])
+        last_phone = ''
+        total = 0
+        while True:
+            # A partner's secondary phone always differs from its main number
+            self.env.cr.execute("""
+                SELECT phone_normalized,
+                       array_agg(id ORDER BY waiting_list_count DESC NULLS LAST, id) AS partner_ids,
+                       SUM(COALESCE(waiting_list_count, 0)) AS visit_count
+                  FROM (
+                        SELECT phone_normalized, id, waiting_list_count
+                          FROM res_partner
+                         WHERE phone_normalized > %(last_phone)s
+                           AND active
+                           AND NOT is_company
+                     UNION ALL
+                        SELECT phone_secondary_normalized, id, waiting_list_count
+                          FROM res_partner
+                         WHERE phone_secondary_normalized > %(last_phone)s
+                           AND active
+                           AND NOT is_company
+                       ) AS numbers
+              GROUP BY phone_normalized
+                HAVING COUNT(*) > 1
+              ORDER BY phone_normalized
+                 LIMIT %(limit)s
+            """, {'last_phone': last_phone, 'limit': chunk_size})
+            groups = self.env.cr.dictfetchall()
+            if not groups:
+                break
+            last_phone = groups[-1]['phone_normalized']
+            total += len(groups)
+
+            reports = self._update_reports(groups, detection_date)
+            if merge:
+                reports._merge_duplicates()
+            if auto_commit:
+                self.env.cr.commit()
+            _logger.info('Duplicate customers: %d phone numbers processed up to %s', total, last_phone)
+
+        # Phones no longer duplicated (merged elsewhere, phone changed, ...)
+        self.search([('state', '=', 'detected'), ('detection_date', '<', detection_date)]).unlink()
+        _logger.info('Duplicate customers: %d duplicated phone numbers found', total)
+        return total
+
+    def _update_reports(self, groups, detection_date):
+        """Create or refresh the reports of a chunk of duplicate groups"""
+        existing = {
+            report.phone_normalized: report
+            for report in self.search([('phone_normalized', 'in', [group['phone_normalized'] for group in groups])])
+        }
+        reports = self.browse()
+        vals_list = []
+        for group in groups:
+            vals = {
+                'partner_ids': [Command.set(group['partner_ids'])],
+                'partner_count': len(group['partner_ids']),
+                'master_partner_id': group['partner_ids'][0],
+                'visit_count': group['visit_count'],
+                'state': 'detected',
+                'detection_date': detection_date,
+                'merge_date': False,
+            }
+            report = existing.get(group['phone_normalized'])
+            if report:
+                report.write(vals)
+                reports |= report
+            else:
+                vals_list.append(dict(vals, phone_normalized=group['phone_normalized']))
+        return reports | self.create(vals_list)
+
+    def _merge_duplicates(self):
+        """Merge the duplicates of each report into its kept customer
+
+        Allergens are combined on the kept customer first; the merge itself is
+        done by the standard partner merge wizard, which re-points
+        waiting_list_ids and every other reference. The wizard skips its email
+        and journal item checks for the superuser (the cron), so they are done
+        here for every caller (see _check_merge). A group that fails a check is
+        logged and left detected.
+
+        Merging deletes the duplicates: the user needs the right to delete
+        customers (waiting list administrators), whatever the caller.
+        """
+        self.env['res.partner'].check_access('unlink')
+        MergeWizard = self.env['base.partner.merge.automatic.wizard']
+        merged = self.browse()
+        for report in self.filtered(lambda r: r.state == 'detected'):
+            master = report.master_partner_id
+            duplicates = (report.partner_ids - master).exists()
+            if not master or not duplicates:
+                continue
+            try:
+                self._check_merge(master, duplicates)
+                with self.env.cr.savepoint():
+                    missing_allergens = duplicates.allergen_ids - master.allergen_ids
+                    if missing_allergens:
+                        master.allergen_ids = [Command.link(allergen.id) for allergen in missing_allergens]
+                    for batch in split_every(MERGE_BATCH_SIZE - 1, duplicates.ids):
+                        MergeWizard._merge([master.id, *batch], master, extra_checks=True)
+            except (UserError, ValidationError) as e:
+                _logger.warning('Could not merge the customers of phone %s: %s', report.phone_normalized, e)
+                continue
+            # Visits were moved with SQL: recompute the visit statistics
+            master.modified(['waiting_list_ids'])
+            merged |= report
+
+        merged.write({
+            'state': 'merged',
+            'merge_date': fields.Datetime.now(),
+        })
+        return len(merged)
+
+    @api.model
+    def _check_merge(self, master, duplicates):
+        """Refuse merges the partner merge wizard refuses to regular users
+
+        Raises UserError when the customers have different emails or when a
+        duplicate has journal items.
+        """
+        if len({partner.email for partner in master | duplicates}) > 1:
+            raise UserError(_('The customers have different emails.'))
+        if 'account.move.line' in self.env and self.env['account.move.line'].sudo().search_count(
+            [('partner_id', 'in', duplicates.ids)], limit=1
+        ):
+            raise UserError(_('A duplicate customer has journal items.'))
+
+    def action_merge(self):
+        """Merge the selected duplicate groups"""
+        count = self._merge_duplicates()
+        return {
+            'type': 'ir.actions.client',
+            'tag': 'display_notification',
+            'params': {
+                'title': _('Duplicate Customers'),
+                'message': _('%s duplicate groups merged.') % count,
+                'type': 'success',
+                'sticky': False,
+                'next': {'type': 'ir.actions.client', 'tag': 'soft_reload'},
+            }
+        }
+
+    @api.model
+    def action_detect_duplicates(self):
+        """Run the duplicate detection now (without merging)"""
+        self._detect_duplicates()
+        return {'type': 'ir.actions.client', 'tag': 'soft_reload'}
+
+    @api.model
+    @instrumented
+    def _cron_detect_duplicate_partners(self):
+        """Nightly duplicate detection; merges too when enabled in the settings"""
+        merge = self.env['waiting.list.settings']._get_snapshot()['merge_duplicate_partners']
+        return self._detect_duplicates(merge=merge, auto_commit=True)
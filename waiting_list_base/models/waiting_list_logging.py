@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+"""Structured, level-gated logging of the waiting list hot paths
+
+An operation (sending a notification, a cron run, ...) logs one summarized
+line with its fields and duration instead of several INFO lines:
+
+    with log_operation(_logger, 'whatsapp.send', notification=notification.id) as op:
+        ...
+        op.set(template=template.id)
+
+    -> whatsapp.send notification=42 template=7 status=ok duration_ms=183.2
+
+Fields are only formatted when the line is emitted. Successful operations
+are sampled (one line every `sample_rate` operations, the others at DEBUG);
+slow and failed operations are always logged. Details that used to be INFO
+lines are DEBUG lines, enabled per addon with the waiting_list.debug_loggers
+system parameter (comma-separated addon names) without restarting.
+"""
+
+import itertools
+import logging
+import time
+
+# Default sampling and slow operation threshold, until the settings are read
+DEFAULT_LOG_SAMPLE_RATE = 1
+DEFAULT_LOG_SLOW_MS = 1000
+
+_config = {
+    'sample_rate': DEFAULT_LOG_SAMPLE_RATE,
+    'slow_ms': DEFAULT_LOG_SLOW_MS,
+}
+
+# Loggers switched to DEBUG by the settings (to reset them when removed)
+_debug_loggers = set()
+
+# Operations counter of the sampling (per worker)
+_operation_counter = itertools.count()
+
+
+def configure_logging(debug_addons=(), sample_rate=DEFAULT_LOG_SAMPLE_RATE, slow_ms=DEFAULT_LOG_SLOW_MS):
+    """Apply the logging settings in this worker
+
+    :param debug_addons: addons (or dotted modules below odoo.addons) logging at DEBUG
+    :param sample_rate: log one successful operation out of sample_rate at INFO
+    :param slow_ms: operations slower than this are always logged
+    """
+    _config['sample_rate'] = max(int(sample_rate or 1), 1)
+    _config['slow_ms'] = slow_ms
+
+    wanted = {f'odoo.addons.{name.strip()}' for name in debug_addons if name and name.strip()}
+    for name in _debug_loggers - wanted:
+        logging.getLogger(name).setLevel(logging.NOTSET)
+    for name in wanted:
+        logging.getLogger(name).setLevel(logging.DEBUG)
+    _debug_loggers.clear()
+    _debug_loggers.update(wanted)
+
+
+def mask_phone(phone):
+    """Phone number with its middle digits hidden, for log lines"""
+    if not phone or len(phone) < 7:
+        return phone
+    return f'{phone[:4]}***{phone[-3:]}'
+
+
+class _Fields:
+    """key=value rendering of the operation fields, built only when emitted"""
+
+    __slots__ = ('fields',)
+
+    def __init__(self, fields):
+        self.fields = fields
+
+    def __str__(self):
+        return ' '.join(f'{key}={value}' for key, value in self.fields.items())
+
+
+class OperationLog:
+    """Context manager logging one summarized line per operation"""
+
+    __slots__ = ('logger', 'operation', 'fields', 'start')
+
+    def __init__(self, logger, operation, fields):
+        self.logger = logger
+        self.operation = operation
+        self.fields = fields
+        self.start = None
+
+    def set(self, **fields):
+        """Add fields to the summary line"""
+        self.fields.update(fields)
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        duration_ms = (time.perf_counter() - self.start) * 1000
+        if exc_type is not None:
+            level = logging.WARNING
+            self.fields.setdefault('status', 'error')
+            self.fields['error'] = exc_type.__name__
+        elif self.fields.get('status') == 'error':
+            # Failure handled inside the block (op.set(status='error'))
+            level = logging.WARNING
+        elif _config['slow_ms'] and duration_ms >= _config['slow_ms']:
+            level = logging.INFO
+            self.fields.setdefault('status', 'slow')
+        elif next(_operation_counter) % _config['sample_rate'] == 0:
+            level = logging.INFO
+        else:
+            level = logging.DEBUG
+        if self.logger.isEnabledFor(level):
+            self.fields.setdefault('status', 'ok')
+            self.logger.log(level, '%s %s duration_ms=%.1f', self.operation, _Fields(self.fields), duration_ms)
+        return False
+
+
+def log_operation(logger, operation, **fields):
+    """Log one summarized line for the operation run in the `with` block"""
+    return OperationLog(logger, operation, fields)
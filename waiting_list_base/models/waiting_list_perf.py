@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+"""Per-action performance instrumentation
+
+    @api.model
+    @instrumented
+    def create(self, vals):
+
+records the wall time, SQL query count and SQL time of each call of the
+method as a waiting.list.perf.sample ring buffer row named
+"<model>.<method>" (when performance monitoring is enabled in the settings).
+Nested calls of the same action (overrides calling super()) are measured
+once, by the outermost call. Calls raising an exception are not recorded.
+"""
+
+import functools
+import threading
+import time
+
+_running = threading.local()
+
+
+def instrumented(method):
+    """Record the wall time and SQL cost of each call of the method"""
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        action = f'{self._name}.{method.__name__}'
+        running = getattr(_running, 'actions', None)
+        if running is None:
+            running = _running.actions = set()
+        if action in running or not self.env['waiting.list.settings']._get_snapshot()['perf_instrumentation']:
+            return method(self, *args, **kwargs)
+
+        # Query counters maintained by the Odoo cursors of this thread
+        thread = threading.current_thread()
+        if not hasattr(thread, 'query_count'):
+            thread.query_count = 0
+            thread.query_time = 0
+        query_count, query_time = thread.query_count, thread.query_time
+
+        running.add(action)
+        start = time.perf_counter()
+        try:
+            result = method(self, *args, **kwargs)
+        finally:
+            running.discard(action)
+        duration = time.perf_counter() - start
+
+        self.env['waiting.list.perf.sample']._record(
+            action,
+            duration * 1000,
+            thread.query_count - query_count,
+            (thread.query_time - query_time) * 1000,
+        )
+        return result
+
+    return wrapper
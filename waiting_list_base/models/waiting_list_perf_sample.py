@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+
+from odoo import models, fields, api, tools
+
+# Number of samples kept: the oldest slot is overwritten once the buffer is full
+PERF_RING_SIZE = 20000
+
+
+class WaitingListPerfSample(models.Model):
+    """Ring buffer of per-action performance samples
+
+    One row per instrumented call (see waiting_list_perf.instrumented). The
+    slot of a new sample comes from a cycling sequence, so the table never
+    holds more than PERF_RING_SIZE rows and recording is a single upsert.
+    """
+
+    _name = 'waiting.list.perf.sample'
+    _description = 'Waiting List Performance Sample'
+    _order = 'recorded_at desc'
+    _rec_name = 'action'
+    _log_access = False
+
+    slot = fields.Integer(string='Slot', required=True, readonly=True)
+
+    action = fields.Char(string='Action', required=True, readonly=True, index=True)
+
+    recorded_at = fields.Datetime(string='Recorded At', readonly=True)
+
+    duration_ms = fields.Float(string='Duration (ms)', readonly=True, aggregator='avg')
+
+    query_count = fields.Integer(string='SQL Queries', readonly=True, aggregator='avg')
+
+    query_ms = fields.Float(string='SQL Time (ms)', readonly=True, aggregator='avg')
+
+    _sql_constraints = [
+        ('slot_uniq', 'unique(slot)', 'Only one performance sample per ring buffer slot is allowed.'),
+    ]
+
+    def init(self):
+        """Create the cycling sequence of the ring buffer slots"""
+        self.env.cr.execute(f"""
+            CREATE SEQUENCE IF NOT EXISTS {self._table}_slot_seq
+                MINVALUE 0 MAXVALUE {PERF_RING_SIZE - 1} START 0 CYCLE
+        """)
+
+    @api.model
+    def _record(self, action, duration_ms, query_count, query_ms):
+        """Store one sample in the next slot (overwriting the oldest one)"""
+        self.env.cr.execute(f"""
+            INSERT INTO {self._table} (slot, action, recorded_at, duration_ms, query_count, query_ms)
+                 VALUES (nextval('{self._table}_slot_seq'), %s, NOW() AT TIME ZONE 'UTC', %s, %s, %s)
+            ON CONFLICT (slot) DO UPDATE
+                    SET action = EXCLUDED.action,
+                        recorded_at = EXCLUDED.recorded_at,
+                        duration_ms = EXCLUDED.duration_ms,
+                        query_count = EXCLUDED.query_count,
+                        query_ms = EXCLUDED.query_ms
+        """, (action, duration_ms, query_count, query_ms))
+
+
+class WaitingListPerfStats(models.Model):
+    """Latency percentiles of each instrumented action over the ring buffer"""
+
+    _name = 'waiting.list.perf.stats'
+    _description = 'Waiting List Performance Statistics'
+    _auto = False
+    _order = 'duration_p95 desc'
+    _rec_name = 'action'
+
+    action = fields.Char(string='Action', readonly=True)
+    call_count = fields.Integer(string='Calls', readonly=True)
+    duration_p50 = fields.Float(string='Duration p50 (ms)', readonly=True)
+    duration_p95 = fields.Float(string='Duration p95 (ms)', readonly=True)
+    duration_max = fields.Float(string='Duration max (ms)', readonly=True)
+    query_count_p50 = fields.Float(string='SQL Queries p50', readonly=True)
+    query_count_p95 = fields.Float(string='SQL Queries p95', readonly=True)
+    query_ms_p95 = fields.Float(string='SQL Time p95 (ms)', readonly=True)
+    first_recorded_at = fields.Datetime(string='Since', readonly=True)
+    last_recorded_at = fields.Datetime(string='Last Call', readonly=True)
+
+    def init(self):
+        tools.drop_view_if_exists(self.env.cr, self._table)
+        self.env.cr.execute(f"""
+            CREATE OR REPLACE VIEW {self._table} AS (
+                SELECT ROW_NUMBER() OVER (ORDER BY action) AS id,
+                       action,
+                       COUNT(*) AS call_count,
+                       percentile_cont(0.5) WITHIN GROUP (ORDER BY duration_ms) AS duration_p50,
+                       percentile_cont(0.95) WITHIN GROUP (ORDER BY duration_ms) AS duration_p95,
+                       MAX(duration_ms) AS duration_max,
+                       percentile_cont(0.5) WITHIN GROUP (ORDER BY query_count) AS query_count_p50,
+                       percentile_cont(0.95) WITHIN GROUP (ORDER BY query_count) AS query_count_p95,
+                       percentile_cont(0.95) WITHIN GROUP (ORDER BY query_ms) AS query_ms_p95,
+                       MIN(recorded_at) AS first_recorded_at,
+                       MAX(recorded_at) AS last_recorded_at
+                  FROM waiting_list_perf_sample
+              GROUP BY action
+            )
+        """)
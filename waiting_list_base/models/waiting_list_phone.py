@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+
+from odoo import models, api, tools
+from .phone_normalization import (
+    MIN_PHONE_DIGITS, build_country_code_trie, format_e164, parse_phone_number, phone_digits,
+)
+
+
+class WaitingListPhone(models.AbstractModel):
+    """Phone number normalization engine shared by the waiting list addons
+
+    The country calling code trie is built once per worker from
+    res.country.phone_code; the company country is the default country code
+    of numbers written without international prefix.
+    """
+
+    _name = 'waiting.list.phone'
+    _description = 'Waiting List Phone Normalization'
+
+    @api.model
+    @tools.ormcache()
+    def _get_country_code_trie(self):
+        """Prefix trie of every country calling code"""
+        self.env.cr.execute("SELECT DISTINCT phone_code FROM res_country WHERE phone_code > 0")
+        return build_country_code_trie(code for code, in self.env.cr.fetchall())
+
+    @api.model
+    @tools.ormcache('company_id')
+    def _get_default_country_code(self, company_id):
+        """Calling code of the company country, or None"""
+        phone_code = self.env['res.company'].sudo().browse(company_id).country_id.phone_code
+        return str(phone_code) if phone_code else None
+
+    @api.model
+    def parse(self, phone, default_country_code=None):
+        """Parse a phone number into a PhoneNumber(country_code, national_number), or None
+
+        :param default_country_code: calling code of numbers without international
+                                     prefix (defaults to the company country)
+        """
+        if default_country_code is None:
+            default_country_code = self._get_default_country_code(self.env.company.id)
+        return parse_phone_number(phone, self._get_country_code_trie(), default_country_code and str(default_country_code))
+
+    @api.model
+    def to_e164(self, phone, default_country_code=None):
+        """Canonical E.164 form of a phone number ('+971501234567'), or False"""
+        number = self.parse(phone, default_country_code)
+        return format_e164(number) if number else False
+
+    @api.model
+    def get_core_number(self, phone):
+        """National number used as customer lookup key, or None if too short"""
+        if len(phone_digits(phone)) < MIN_PHONE_DIGITS:
+            return None
+        number = self.parse(phone)
+        return number.national_number if number else None
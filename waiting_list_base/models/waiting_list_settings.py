@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+
+from odoo import models, api, tools
+from types import MappingProxyType
+import logging
+from .waiting_list_logging import DEFAULT_LOG_SAMPLE_RATE, DEFAULT_LOG_SLOW_MS, configure_logging
+
+_logger = logging.getLogger(__name__)
+
+
+def _convert_param(value, value_type, default):
+    """Convert a raw system parameter string to its setting type"""
+    if value in (None, False, ''):
+        return default
+    if value_type is bool:
+        return value in ('True', 'true', '1')
+    try:
+        return value_type(value)
+    except (TypeError, ValueError):
+        _logger.warning('Invalid value %r for a waiting list setting, using default %r', value, default)
+        return default
+
+
+class WaitingListSettings(models.AbstractModel):
+    """Typed, cached snapshot of the waiting list configuration parameters
+
+    Hot paths read settings from _get_snapshot() instead of calling
+    ir.config_parameter.get_param() every time. The snapshot is built once per
+    worker and dropped whenever a system parameter changes (ir.config_parameter
+    writes clear the registry cache, which saving the settings does). Addons
+    add their own parameters by extending _get_settings_spec().
+    Building the snapshot also applies the logging settings in the worker.
+    """
+
+    _name = 'waiting.list.settings'
+    _description = 'Waiting List Settings Snapshot'
+
+    @api.model
+    def _get_settings_spec(self):
+        """Settings of the snapshot: {key: (system parameter, type, default)}"""
+        return {
+            'base_url': ('web.base.url', str, ''),
+            'default_survey_id': ('waiting_list.default_survey_id', int, False),
+            'fuzzy_customer_search': ('waiting_list.fuzzy_customer_search', bool, False),
+            'merge_duplicate_partners': ('waiting_list.merge_duplicate_partners', bool, False),
+            'debug_loggers': ('waiting_list.debug_loggers', str, ''),
+            'log_sample_rate': ('waiting_list.log_sample_rate', int, DEFAULT_LOG_SAMPLE_RATE),
+            'log_slow_ms': ('waiting_list.log_slow_ms', int, DEFAULT_LOG_SLOW_MS),
+            'perf_instrumentation': ('waiting_list.perf_instrumentation', bool, False),
+        }
+
+    @api.model
+    @tools.ormcache()
+    def _get_snapshot(self):
+        """Read-only mapping of every waiting list setting, converted to its type"""
+        ICP = self.env['ir.config_parameter'].sudo()
+        snapshot = MappingProxyType({
+            key: _convert_param(ICP.get_param(param), value_type, default)
+            for key, (param, value_type, default) in self._get_settings_spec().items()
+        })
+        configure_logging(
+            debug_addons=snapshot['debug_loggers'].split(','),
+            sample_rate=snapshot['log_sample_rate'],
+            slow_ms=snapshot['log_slow_ms'],
+        )
+        return snapshot
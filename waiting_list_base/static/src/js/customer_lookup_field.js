@@ -0,0 +1,107 @@
+/** @odoo-module **/
+
+import { useRef, useState } from "@odoo/owl";
+import { registry } from "@web/core/registry";
+import { useService } from "@web/core/utils/hooks";
+import { useDebounced } from "@web/core/utils/timing";
+import { deserializeDateTime, formatDate } from "@web/core/l10n/dates";
+import { PhoneField, phoneField } from "@web/views/fields/phone/phone_field";
+
+// Delay between the last keystroke and the customer lookup
+const LOOKUP_DEBOUNCE_MS = 300;
+
+// Shortest number of digits looked up (shortest trigram)
+const LOOKUP_MIN_DIGITS = 3;
+
+/**
+ * Customer Lookup Field
+ * Mobile field with a debounced customer typeahead: candidates come from
+ * waiting.list.search_customer_candidates while the hostess types, so the
+ * form onchange only runs once a customer is picked
+ */
+export class CustomerLookupField extends PhoneField {
+    static template = "waiting_list_base.CustomerLookupField";
+    static props = {
+        ...PhoneField.props,
+        limit: { type: Number, optional: true },
+    };
+
+    setup() {
+        super.setup();
+        this.orm = useService("orm");
+        this.inputRef = useRef("input");
+        this.lookup = useState({ candidates: [], open: false });
+        this.debouncedSearch = useDebounced(this.searchCandidates.bind(this), LOOKUP_DEBOUNCE_MS);
+    }
+
+    /**
+     * Look customers up after the hostess stops typing
+     */
+    onLookupInput(ev) {
+        const digits = ev.target.value.replace(/\D/g, "");
+        if (digits.length < LOOKUP_MIN_DIGITS) {
+            this.closeLookup();
+            return;
+        }
+        this.debouncedSearch(ev.target.value);
+    }
+
+    onLookupBlur() {
+        this.closeLookup();
+    }
+
+    closeLookup() {
+        this.lookup.open = false;
+        this.lookup.candidates = [];
+    }
+
+    /**
+     * Fetch the candidates; an exact match on the whole number is linked directly
+     */
+    async searchCandidates(term) {
+        const kwargs = this.props.limit ? { limit: this.props.limit } : {};
+        const candidates = await this.orm.call("waiting.list", "search_customer_candidates", [term], kwargs);
+        // Ignore answers to outdated terms
+        if (!this.inputRef.el || this.inputRef.el.value !== term) {
+            return;
+        }
+        if (candidates.length === 1 && candidates[0].exact_match) {
+            await this.selectCandidate(candidates[0]);
+            return;
+        }
+        this.lookup.candidates = candidates;
+        this.lookup.open = candidates.length > 0;
+    }
+
+    /**
+     * Link the picked customer (one onchange round-trip)
+     */
+    async selectCandidate(candidate) {
+        this.closeLookup();
+        const mobile = candidate.mobile || candidate.phone || "";
+        // The input is committed on blur: keep it in sync with the customer
+        if (this.inputRef.el) {
+            this.inputRef.el.value = mobile;
+        }
+        await this.props.record.update({
+            customer_id: { id: candidate.id, display_name: candidate.name },
+            [this.props.name]: mobile,
+        });
+    }
+
+    formatLastVisit(candidate) {
+        return formatDate(deserializeDateTime(candidate.last_visit_date));
+    }
+}
+
+export const customerLookupField = {
+    ...phoneField,
+    component: CustomerLookupField,
+    displayName: "Customer Lookup",
+    extractProps: (fieldInfo, dynamicInfo) => ({
+        ...phoneField.extractProps?.(fieldInfo, dynamicInfo),
+        limit: fieldInfo.options.limit,
+    }),
+};
+
+registry.category("fields").add("waiting_list_customer_lookup", customerLookupField);
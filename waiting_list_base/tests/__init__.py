@@ -1 +1,5 @@
-# Test module for waiting list base
\ No newline at end of file
+# Test module for waiting list base
+
+from . import test_customer_phone
+from . import test_duplicate_partner
+from . import test_phone_normalization
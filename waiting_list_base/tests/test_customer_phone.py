@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+
+from odoo.tests.common import TransactionCase
+
+
+class TestCustomerPhone(TransactionCase):
+
+    def setUp(self):
+        super(TestCustomerPhone, self).setUp()
+        self.WaitingList = self.env['waiting.list']
+        self.Partner = self.env['res.partner']
+        self.customer = self.Partner.create({
+            'name': 'Phone Customer',
+            'mobile': '0501234567',
+        })
+
+    def test_create_links_existing_customer(self):
+        """Test creating an entry links the customer with the same mobile instead of creating one"""
+        partner_count = self.Partner.search_count([])
+        entry = self.WaitingList.create({
+            'customer_name': 'Phone Customer',
+            'customer_mobile': '050 123 4567',
+            'party_size': 2,
+        })
+        self.assertEqual(entry.customer_id, self.customer)
+        self.assertEqual(self.Partner.search_count([]), partner_count)
+
+    def test_create_links_customer_by_phone(self):
+        """Test a customer is also found by their phone when they have a mobile"""
+        self.customer.phone = '0721234567'
+        entry = self.WaitingList.create({
+            'customer_name': 'Phone Customer',
+            'customer_mobile': '072 123 4567',
+            'party_size': 2,
+        })
+        self.assertEqual(entry.customer_id, self.customer)
+
+    def test_create_new_customer(self):
+        """Test creating an entry with an unknown mobile creates its customer"""
+        entry = self.WaitingList.create({
+            'customer_name': 'New Customer',
+            'customer_mobile': '0549876543',
+            'party_size': 2,
+        })
+        self.assertNotEqual(entry.customer_id, self.customer)
+        self.assertEqual(entry.customer_id.name, 'New Customer')
+        self.assertTrue(entry.customer_id.is_waiting_list_customer)
+
+    def test_mobile_saved_on_customer_without_phone(self):
+        """Test the mobile typed for a customer with no phone on file is saved on that customer"""
+        customer = self.Partner.create({'name': 'No Phone Customer'})
+        partner_count = self.Partner.search_count([])
+        entry = self.WaitingList.create({
+            'customer_id': customer.id,
+            'customer_mobile': '0531112222',
+            'party_size': 2,
+        })
+        self.assertEqual(entry.customer_id, customer)
+        self.assertEqual(customer.mobile, '0531112222')
+        self.assertEqual(self.Partner.search_count([]), partner_count)
+
+    def test_mobile_change_keeps_customer(self):
+        """Test changing the mobile of an entry keeps its customer and their number"""
+        entry = self.WaitingList.create({
+            'customer_id': self.customer.id,
+            'party_size': 2,
+        })
+        entry.customer_mobile = '0531112222'
+        self.assertEqual(entry.customer_id, self.customer)
+        self.assertEqual(self.customer.mobile, '0501234567')
@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+
+from odoo.tests.common import TransactionCase
+
+
+class TestDuplicatePartner(TransactionCase):
+
+    def setUp(self):
+        super(TestDuplicatePartner, self).setUp()
+        self.Partner = self.env['res.partner']
+        self.Duplicate = self.env['waiting.list.duplicate.partner']
+        self.first = self.Partner.create({'name': 'Duplicate One', 'mobile': '0551230001'})
+        self.second = self.Partner.create({'name': 'Duplicate Two', 'mobile': '055 123 0001'})
+        self.core_number = self.first.phone_normalized
+        # Never reported: a company and an archived customer with the same number
+        self.Partner.create({'name': 'Duplicate Company', 'mobile': '0551230001', 'is_company': True})
+        self.Partner.create({'name': 'Duplicate Archived', 'mobile': '0551230001', 'active': False})
+        # A seated visit makes the second customer the one to keep
+        self.entry = self.env['waiting.list'].create({
+            'customer_id': self.second.id,
+            'party_size': 2,
+        })
+        self.entry.status = 'seated'
+
+    def _report(self):
+        return self.Duplicate.search([('phone_normalized', '=', self.core_number)])
+
+    def test_detect_duplicates(self):
+        """Test the GROUP BY detection reports the active individuals sharing a number"""
+        self.assertEqual(self.second.phone_normalized, self.core_number)
+        total = self.Duplicate._detect_duplicates(chunk_size=1)
+        self.assertGreaterEqual(total, 1)
+        report = self._report()
+        self.assertEqual(len(report), 1)
+        self.assertEqual(report.partner_ids, self.first | self.second)
+        self.assertEqual(report.partner_count, 2)
+        self.assertEqual(report.master_partner_id, self.second)
+        self.assertEqual(report.visit_count, 1)
+        self.assertEqual(report.state, 'detected')
+
+    def test_detect_duplicates_secondary_phone(self):
+        """Test customers sharing a number that is the phone of one of them are reported"""
+        mobile_customer = self.Partner.create({'name': 'Secondary One', 'mobile': '0557770001'})
+        phone_customer = self.Partner.create({
+            'name': 'Secondary Two',
+            'mobile': '0558880002',
+            'phone': '055 777 0001',
+        })
+        self.Duplicate._detect_duplicates()
+        report = self.Duplicate.search([('phone_normalized', '=', mobile_customer.phone_normalized)])
+        self.assertEqual(report.partner_ids, mobile_customer | phone_customer)
+
+    def test_detect_duplicates_again(self):
+        """Test running the detection again refreshes the report instead of adding one"""
+        self.Duplicate._detect_duplicates()
+        self.Duplicate._detect_duplicates()
+        self.assertEqual(len(self._report()), 1)
+
+    def test_merge_duplicates(self):
+        """Test merging moves the visits onto the kept customer and deletes the duplicate"""
+        self.env['waiting.list'].create({
+            'customer_id': self.first.id,
+            'party_size': 4,
+        })
+        self.Duplicate._detect_duplicates(merge=True)
+        report = self._report()
+        self.assertEqual(report.state, 'merged')
+        self.assertFalse(self.first.exists())
+        self.assertEqual(len(self.second.waiting_list_ids), 2)
+
+    def test_merge_duplicates_different_emails(self):
+        """Test customers with different emails are not merged, even by the superuser"""
+        self.first.email = 'one@example.com'
+        self.second.email = 'two@example.com'
+        self.Duplicate._detect_duplicates(merge=True)
+        self.assertEqual(self._report().state, 'detected')
+        self.assertTrue(self.first.exists())
@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+
+from odoo.tests.common import TransactionCase
+
+from odoo.addons.waiting_list_base.models.phone_normalization import (
+    PhoneNumber, build_country_code_trie, format_e164, match_country_code, parse_phone_number, phone_digits,
+)
+
+
+class TestPhoneNormalization(TransactionCase):
+
+    def setUp(self):
+        super(TestPhoneNormalization, self).setUp()
+        self.trie = build_country_code_trie([1, 7, 44, 971, 1242])
+
+    def test_phone_digits(self):
+        """Test only the digits of a phone number are kept"""
+        self.assertEqual(phone_digits('+971 (50) 123-4567'), '971501234567')
+        self.assertEqual(phone_digits(False), '')
+
+    def test_match_country_code(self):
+        """Test the longest country code prefixing the digits is matched"""
+        self.assertEqual(match_country_code(self.trie, '971501234567'), '971')
+        self.assertEqual(match_country_code(self.trie, '12425551234'), '1242')
+        self.assertEqual(match_country_code(self.trie, '12125551234'), '1')
+        self.assertEqual(match_country_code(self.trie, '447911123456'), '44')
+        self.assertIsNone(match_country_code(self.trie, '999123456'))
+        self.assertIsNone(match_country_code(self.trie, ''))
+
+    def test_parse_international(self):
+        """Test numbers with "+" or "00" prefix take the country code of the trie"""
+        expected = PhoneNumber('971', '501234567')
+        self.assertEqual(parse_phone_number('+971 50 123 4567', self.trie), expected)
+        self.assertEqual(parse_phone_number('00971501234567', self.trie), expected)
+        self.assertEqual(parse_phone_number('+1 242 555 1234', self.trie), PhoneNumber('1242', '5551234'))
+        self.assertIsNone(parse_phone_number('+999 123 4567', self.trie))
+
+    def test_parse_national(self):
+        """Test numbers without international prefix take the default country code"""
+        expected = PhoneNumber('971', '501234567')
+        self.assertEqual(parse_phone_number('050 123 4567', self.trie, '971'), expected)
+        self.assertEqual(parse_phone_number('971501234567', self.trie, '971'), expected)
+        self.assertEqual(parse_phone_number('501234567', self.trie, '971'), expected)
+        self.assertEqual(parse_phone_number('447911123456', self.trie, '971'), PhoneNumber('44', '7911123456'))
+
+    def test_parse_invalid(self):
+        """Test empty numbers and too short national numbers are not parsed"""
+        self.assertIsNone(parse_phone_number('', self.trie))
+        self.assertIsNone(parse_phone_number(False, self.trie))
+        self.assertIsNone(parse_phone_number('+971 012', self.trie))
+
+    def test_format_e164(self):
+        """Test the E.164 form of a parsed number"""
+        self.assertEqual(format_e164(PhoneNumber('971', '501234567')), '+971501234567')
+        number = parse_phone_number('050 123 4567', self.trie, '971')
+        self.assertEqual(format_e164(number), '+971501234567')
@@ -1,6 +1,6 @@
 {
     'name': 'Waiting List Enterprise',
-    'version': '18.0.1.21.0',
+    'version': '18.0.1.31.0',
     'summary': 'Advanced waiting list features for Enterprise/Odoo.sh',
     'description': """
 Restaurant Waiting List System - Enterprise Extensions
@@ -41,6 +41,7 @@ Configure WhatsApp Business Account in Settings > Technical > WhatsApp.
         # Views
         'views/waiting_list_views.xml',
         'views/waiting_list_notification_views.xml',
+        'views/waiting_list_estimator_accuracy_views.xml',
         'views/restaurant_views.xml',
         'views/res_config_settings_views.xml',
         'views/menu_actions.xml',
@@ -1,7 +1,15 @@
 # -*- coding: utf-8 -*-
 
+from datetime import timedelta
+
+from odoo import fields
+
+
 def post_init_hook(env):
-    """Create cron jobs after module installation"""
+    """Create cron jobs and backfill wait time statistics after module installation"""
+    
+    # Build wait time statistics buckets from existing waiting list history
+    env['waiting.list.wait.stats']._rebuild_from_history()
     
     # Check if cron jobs already exist
     cron_process = env.ref('waiting_list_enterprise.ir_cron_process_pending_notifications', raise_if_not_found=False)
@@ -39,3 +47,42 @@ def post_init_hook(env):
             'active': True,
             'priority': 10,
         })
+    
+    create_estimation_crons(env)
+
+
+# Wait time estimation jobs on waiting.list: (name, code, interval number, interval type, priority, nightly)
+ESTIMATION_CRONS = [
+    ('Waiting List: Train Wait Time Model', 'model._cron_train_wait_model()', 1, 'days', 20, True),
+    ('Waiting List: Compute Shadow Estimates', 'model._cron_compute_shadow_estimates()', 5, 'minutes', 20, False),
+    ('Waiting List: Roll Up Estimator Accuracy', 'model._cron_rollup_estimator_accuracy()', 1, 'days', 20, True),
+    ('Waiting List: Prune Queue Generations', 'model._cron_prune_queue_generations()', 1, 'days', 30, True),
+]
+
+
+def create_estimation_crons(env):
+    """Create the wait time estimation cron jobs that don't exist yet"""
+    model_waiting_list = env['ir.model'].search([('model', '=', 'waiting.list')], limit=1)
+    existing_codes = set(env['ir.cron'].with_context(active_test=False).search([
+        ('code', 'in', [code for _name, code, *_rest in ESTIMATION_CRONS]),
+    ]).mapped('code'))
+    
+    for name, code, interval_number, interval_type, priority, nightly in ESTIMATION_CRONS:
+        if code in existing_codes:
+            continue
+        values = {
+            'name': name,
+            'model_id': model_waiting_list.id,
+            'state': 'code',
+            'code': code,
+            'interval_number': interval_number,
+            'interval_type': interval_type,
+            'active': True,
+            'priority': priority,
+        }
+        if nightly:
+            # Run off-peak, at 03:00 UTC
+            values['nextcall'] = fields.Datetime.to_string(
+                fields.Datetime.now().replace(hour=3, minute=0, second=0) + timedelta(days=1)
+            )
+        env['ir.cron'].create(values)
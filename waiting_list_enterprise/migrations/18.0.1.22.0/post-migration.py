@@ -0,0 +1,13 @@
+# -*- coding: utf-8 -*-
+import logging
+
+from odoo import api, SUPERUSER_ID
+
+_logger = logging.getLogger(__name__)
+
+
+def migrate(cr, version):
+    """Backfill wait time statistics buckets from existing waiting list history"""
+    env = api.Environment(cr, SUPERUSER_ID, {})
+    bucket_count = env['waiting.list.wait.stats']._rebuild_from_history()
+    _logger.info('Backfilled %d wait time statistics buckets', bucket_count)
@@ -0,0 +1,13 @@
+# -*- coding: utf-8 -*-
+import logging
+
+from odoo import api, SUPERUSER_ID
+
+_logger = logging.getLogger(__name__)
+
+
+def migrate(cr, version):
+    """Rebuild wait time statistics buckets so they carry wait time histograms"""
+    env = api.Environment(cr, SUPERUSER_ID, {})
+    bucket_count = env['waiting.list.wait.stats']._rebuild_from_history()
+    _logger.info('Rebuilt %d wait time statistics buckets with histograms', bucket_count)
@@ -0,0 +1,17 @@
+# -*- coding: utf-8 -*-
+import logging
+
+_logger = logging.getLogger(__name__)
+
+
+def migrate(cr, version):
+    """Approximate the completion time of past visits so turn times can be learned right away"""
+    cr.execute("""
+        UPDATE waiting_list
+           SET done_time = write_date
+         WHERE status = 'done'
+           AND done_time IS NULL
+           AND seated_time IS NOT NULL
+           AND write_date > seated_time
+    """)
+    _logger.info('Backfilled completion time of %d waiting list entries', cr.rowcount)
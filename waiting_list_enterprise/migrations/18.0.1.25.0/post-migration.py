@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+import logging
+
+from odoo import api, SUPERUSER_ID
+from odoo.addons.waiting_list_enterprise.hooks import create_estimation_crons
+from odoo.addons.waiting_list_enterprise.models.wait_time_regression import WAIT_MODEL_TRAINING_DAYS
+
+_logger = logging.getLogger(__name__)
+
+
+def migrate(cr, version):
+    """Backfill the regression model features of recent visits and create the training cron"""
+    # Approximate the floor state at arrival from the status timestamps
+    cr.execute("""
+        UPDATE waiting_list wl
+           SET queue_length_at_arrival = (
+                   SELECT COUNT(*)
+                     FROM waiting_list other
+                    WHERE other.company_id = wl.company_id
+                      AND other.floor_id IS NOT DISTINCT FROM wl.floor_id
+                      AND other.create_date < wl.create_date
+                      AND COALESCE(other.seated_time, other.cancelled_time, other.write_date) > wl.create_date
+               ),
+               occupied_tables_at_arrival = (
+                   SELECT COUNT(*)
+                     FROM waiting_list other
+                    WHERE other.company_id = wl.company_id
+                      AND other.floor_id IS NOT DISTINCT FROM wl.floor_id
+                      AND other.seated_time <= wl.create_date
+                      AND COALESCE(other.done_time, other.write_date) > wl.create_date
+               )
+         WHERE wl.create_date >= (NOW() AT TIME ZONE 'UTC') - make_interval(days => %s)
+    """, (WAIT_MODEL_TRAINING_DAYS,))
+    _logger.info('Backfilled arrival snapshot of %d waiting list entries', cr.rowcount)
+    
+    env = api.Environment(cr, SUPERUSER_ID, {})
+    create_estimation_crons(env)
@@ -0,0 +1,18 @@
+# -*- coding: utf-8 -*-
+import logging
+
+_logger = logging.getLogger(__name__)
+
+
+def migrate(cr, version):
+    """Create and fill the next attempt time of notifications in SQL (no ORM recompute)"""
+    cr.execute("""
+        ALTER TABLE waiting_list_notification
+        ADD COLUMN IF NOT EXISTS next_attempt_at TIMESTAMP
+    """)
+    cr.execute("""
+        UPDATE waiting_list_notification
+           SET next_attempt_at = COALESCE(scheduled_time, create_date)
+         WHERE next_attempt_at IS NULL
+    """)
+    _logger.info('Backfilled next attempt time of %d notifications', cr.rowcount)
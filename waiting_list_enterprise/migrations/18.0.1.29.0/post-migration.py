@@ -0,0 +1,13 @@
+# -*- coding: utf-8 -*-
+import logging
+
+from odoo import api, SUPERUSER_ID
+
+_logger = logging.getLogger(__name__)
+
+
+def migrate(cr, version):
+    """Rebuild wait time statistics buckets and record the wait counted per entry"""
+    env = api.Environment(cr, SUPERUSER_ID, {})
+    bucket_count = env['waiting.list.wait.stats']._rebuild_from_history()
+    _logger.info('Rebuilt %d wait time statistics buckets with counted waits', bucket_count)
@@ -0,0 +1,9 @@
+# -*- coding: utf-8 -*-
+from odoo import api, SUPERUSER_ID
+from odoo.addons.waiting_list_enterprise.hooks import create_estimation_crons
+
+
+def migrate(cr, version):
+    """Create the queue generation pruning cron job"""
+    env = api.Environment(cr, SUPERUSER_ID, {})
+    create_estimation_crons(env)
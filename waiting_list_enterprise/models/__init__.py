@@ -2,6 +2,9 @@
 
 from . import waiting_list
 from . import waiting_list_notification
+from . import waiting_list_wait_stats
+from . import waiting_list_estimator_accuracy
+from . import waiting_list_settings
 from . import restaurant_table
 from . import res_config_settings
 from . import res_users
@@ -1,6 +1,6 @@
 # -*- coding: utf-8 -*-
 
-from odoo import models, fields, api
+from odoo import models, fields, api, _
 
 
 class ResConfigSettings(models.TransientModel):
@@ -76,3 +76,56 @@ class ResConfigSettings(models.TransientModel):
         config_parameter='waiting_list_enterprise.hour_tolerance',
         help='Hour tolerance for matching historical data (±hours, default: 1)'
     )
+    
+    waiting_list_use_table_turnover = fields.Boolean(
+        string='Table Turnover Forecast',
+        config_parameter='waiting_list_enterprise.use_table_turnover',
+        help='Estimate wait times by simulating when the seated tables of the floor free up, '
+             'based on learned turn times per table size. Falls back to historical data when '
+             'no turn time history is available.'
+    )
+    
+    waiting_list_send_notifications_inline = fields.Boolean(
+        string='Send Notifications Immediately',
+        config_parameter='waiting_list_enterprise.send_notifications_inline',
+        help='Call the SMS/WhatsApp provider inside the host action. By default notifications '
+             'are sent by the notification cron right after the action is saved, so a slow '
+             'provider never slows the host stand down.'
+    )
+    
+    def action_rebuild_wait_stats(self):
+        """Rebuild wait time statistics from the waiting list history"""
+        self.ensure_one()
+        bucket_count = self.env['waiting.list.wait.stats'].sudo()._rebuild_from_history()
+        return {
+            'type': 'ir.actions.client',
+            'tag': 'display_notification',
+            'params': {
+                'title': _('Wait Time Statistics Rebuilt'),
+                'message': _('%d statistics buckets rebuilt from historical data.') % bucket_count,
+                'type': 'success',
+                'sticky': False,
+            }
+        }
+    
+    def action_train_wait_model(self):
+        """Train the regression wait time model now instead of waiting for the nightly job"""
+        self.ensure_one()
+        trained = self.env['waiting.list'].sudo()._cron_train_wait_model()
+        samples = trained.get(self.env.company.id)
+        if samples:
+            message = _('Wait time model trained on %d completed visits.') % samples
+            notification_type = 'success'
+        else:
+            message = _('Not enough completed visits (or NumPy missing) to train the wait time model.')
+            notification_type = 'warning'
+        return {
+            'type': 'ir.actions.client',
+            'tag': 'display_notification',
+            'params': {
+                'title': _('Wait Time Model'),
+                'message': message,
+                'type': notification_type,
+                'sticky': False,
+            }
+        }
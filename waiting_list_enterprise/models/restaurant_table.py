@@ -137,6 +137,29 @@ class RestaurantTable(models.Model):
             else:
                 table.foodics_status_text = 'Not Synced'
     
+    def _get_waiting_list_company(self):
+        """Company of the table, from the point of sale of its floor"""
+        self.ensure_one()
+        return self.floor_id.pos_config_ids[:1].company_id or self.env.company
+    
+    def _get_waiting_list_queues(self):
+        """(company, floor) queues served by the tables"""
+        return {
+            (company.id, table.floor_id.id)
+            for table in self if table.floor_id
+            for company in (table.floor_id.pos_config_ids.company_id or self.env.company)
+        }
+    
+    def write(self, vals):
+        """Override write to drop the cached turnover forecasts when the floor layout changes"""
+        layout_changed = {'seats', 'floor_id', 'active'}.intersection(vals)
+        queues = self._get_waiting_list_queues() if layout_changed else set()
+        result = super(RestaurantTable, self).write(vals)
+        if layout_changed:
+            queues |= self._get_waiting_list_queues()
+            self.env['waiting.list']._invalidate_queue_index(queues)
+        return result
+    
     def action_view_waiting_list(self):
         """View waiting list entries for this table"""
         self.ensure_one()
@@ -161,13 +184,12 @@ class RestaurantTable(models.Model):
         if self.is_occupied:
             raise UserError(_('This table is currently occupied.'))
         
-        # Find next waiting customer that fits this table
-        next_customer = self.env['waiting.list'].search([
-            ('status', 'in', ['waiting', 'ready']),
-            ('floor_id', '=', self.floor_id.id),
-            ('party_size', '<=', self.seats),
-            ('table_id', '=', False),
-        ], order='priority desc, create_date asc', limit=1)
+        # Find next waiting customer that fits this table (from the cached queue index)
+        next_customer = self.env['waiting.list'].browse(
+            self.env['waiting.list']._get_next_eligible_party(
+                self._get_waiting_list_company().id, self.floor_id.id, self.seats
+            )
+        ).exists()
         
         if not next_customer:
             raise UserError(_('No suitable waiting customers found for this table.'))
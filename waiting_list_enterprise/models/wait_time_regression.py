@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+"""Small linear wait time model: feature encoding, ridge fit and prediction
+
+Fitting needs NumPy and only runs in the nightly training job. Prediction is a
+plain dot product, so estimating a wait never needs NumPy.
+"""
+
+import logging
+import math
+
+_logger = logging.getLogger(__name__)
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+    _logger.info('NumPy is not available, the wait time regression model cannot be trained')
+
+# Name of each coefficient, in feature vector order
+WAIT_MODEL_FEATURES = (
+    'intercept',
+    'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday',
+    'hour_sin', 'hour_cos',
+    'party_size',
+    'queue_length',
+    'occupied_tables',
+    'priority',
+)
+
+# Ridge penalty (not applied to the intercept)
+WAIT_MODEL_RIDGE = 1.0
+
+# Minimum completed visits needed to train a model
+WAIT_MODEL_MIN_SAMPLES = 50
+
+# Days of completed visits used for training
+WAIT_MODEL_TRAINING_DAYS = 90
+
+
+def wait_model_features(arrival, party_size, queue_length, occupied_tables, priority):
+    """Feature vector of one party (arrival is a naive UTC datetime)"""
+    weekday = arrival.weekday()
+    hour_angle = 2 * math.pi * (arrival.hour + arrival.minute / 60.0) / 24
+    return [
+        1.0,
+        *(1.0 if weekday == day else 0.0 for day in range(1, 7)),
+        math.sin(hour_angle),
+        math.cos(hour_angle),
+        float(party_size or 0),
+        float(queue_length or 0),
+        float(occupied_tables or 0),
+        float(int(priority or 0)),
+    ]
+
+
+def fit_wait_model(features, waits):
+    """Ridge least-squares fit; returns the coefficients and mean absolute error"""
+    X = np.asarray(features, dtype=float)
+    y = np.asarray(waits, dtype=float)
+    penalty = WAIT_MODEL_RIDGE * np.eye(X.shape[1])
+    penalty[0, 0] = 0.0
+    coefficients = np.linalg.solve(X.T @ X + penalty, X.T @ y)
+    mean_absolute_error = float(np.mean(np.abs(X @ coefficients - y)))
+    return [float(c) for c in coefficients], mean_absolute_error
+
+
+def predict_wait(coefficients, features):
+    """Predicted wait (minutes, never negative)"""
+    return max(sum(c * f for c, f in zip(coefficients, features)), 0.0)
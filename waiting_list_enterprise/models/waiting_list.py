@@ -1,12 +1,47 @@
 # -*- coding: utf-8 -*-
 
-from odoo import models, fields, api, _
+from odoo import models, fields, api, tools, _
 from odoo.exceptions import ValidationError, UserError
+from odoo.tools import sql
+from .waiting_list_wait_stats import wait_histogram_quantile
+from .wait_time_regression import (
+    WAIT_MODEL_FEATURES, WAIT_MODEL_MIN_SAMPLES, WAIT_MODEL_TRAINING_DAYS,
+    fit_wait_model, np, predict_wait, wait_model_features,
+)
+from bisect import bisect_left
+from collections import namedtuple
 from datetime import timedelta
+from itertools import groupby
+from types import MappingProxyType
+import json
 import logging
+from odoo.addons.waiting_list_base.models.waiting_list_perf import instrumented
 
 _logger = logging.getLogger(__name__)
 
+# Statuses of parties still waiting in the queue
+QUEUE_STATES = ['waiting', 'ready', 'called']
+
+# Fields whose changes add, move or remove the wait time of a seated party in
+# the wait time statistics
+WAIT_STATS_FIELDS = {'status', 'seated_time', 'cancelled_time', 'party_size', 'company_id'}
+
+# Fields whose changes make the estimates of the rest of the queue stale
+QUEUE_ESTIMATE_FIELDS = {'status', 'priority', 'floor_id', 'company_id'}
+
+# Fields whose changes reorder or resize the in-memory queue index
+QUEUE_INDEX_FIELDS = {'status', 'priority', 'floor_id', 'company_id', 'table_id', 'party_size'}
+
+# Immutable per-worker snapshot of one (company, floor) queue:
+# - keys: sort keys (-priority, create_date, id) in queue order
+# - entries: (id, party_size, status, has_table) in queue order
+# - arrivals: sorted arrival times of the queue, one tuple per priority level 0-5
+QueueIndex = namedtuple('QueueIndex', ['keys', 'entries', 'arrivals'])
+
+# Minutes a table is still expected to stay occupied once it has been seated
+# longer than any learned turn time of its size
+TURN_TIME_OVERDUE_GRACE = 5
+
 
 class WaitingListEnterprise(models.Model):
     """Enterprise extensions for waiting list with POS Restaurant integration"""
@@ -81,12 +116,61 @@ class WaitingListEnterprise(models.Model):
         help='When the table was assigned to this customer'
     )
     
+    done_time = fields.Datetime(
+        string='Completed Time',
+        readonly=True,
+        help='When the visit was completed and the table released (used to learn table turn times)'
+    )
+    
+    # Wait time counted in the wait time statistics, so that their incremental
+    # updates can replace it instead of adding it again
+    wait_stats_wait = fields.Float(
+        string='Counted Wait (minutes)',
+        readonly=True,
+        copy=False,
+        help='Actual wait time counted in the wait time statistics (0 when not counted)'
+    )
+    
+    wait_stats_company_id = fields.Many2one(
+        'res.company',
+        string='Counted Company',
+        readonly=True,
+        copy=False
+    )
+    
+    wait_stats_party_size = fields.Integer(
+        string='Counted Party Size',
+        readonly=True,
+        copy=False
+    )
+    
     # Estimated Wait Time (Enterprise Feature)
     calculation_type = fields.Selection([
         ('auto', 'Auto Calculation'),
+        ('model', 'Regression Model'),
         ('manual', 'Manual Entry'),
     ], string='Calculation Type', default='auto', required=True,
-       help='Choose how wait time is determined: Auto uses intelligent calculation, Manual allows custom entry')
+       help='Choose how wait time is determined: Auto uses intelligent calculation, Regression Model uses the '
+            'nightly trained model (Auto when no model is trained yet), Manual allows custom entry')
+    
+    queue_length_at_arrival = fields.Integer(
+        string='Queue Length at Arrival',
+        readonly=True,
+        help='Parties already waiting on the floor when this party arrived (regression model feature)'
+    )
+    
+    occupied_tables_at_arrival = fields.Integer(
+        string='Occupied Tables at Arrival',
+        readonly=True,
+        help='Seated parties on the floor when this party arrived (regression model feature)'
+    )
+    
+    shadow_estimates = fields.Json(
+        string='Shadow Estimates',
+        readonly=True,
+        help='Wait time (minutes) predicted by each registered estimator shortly after arrival. '
+             'Never shown to guests, only used to compare estimator accuracy.'
+    )
     
     estimated_wait_time = fields.Float(
         string='Estimated Wait (minutes)',
@@ -106,6 +190,26 @@ class WaitingListEnterprise(models.Model):
         help='Data source used for wait time estimate (historical data vs simple queue calculation)'
     )
     
+    estimated_wait_p50 = fields.Float(
+        string='Estimated Wait P50 (minutes)',
+        store=True,
+        help='Median wait predicted from the historical wait time distribution, including the queue adjustment. '
+             '0 when the estimate is not based on historical data.'
+    )
+    
+    estimated_wait_p90 = fields.Float(
+        string='Estimated Wait P90 (minutes)',
+        store=True,
+        help='Wait that 90% of similar parties did not exceed, including the queue adjustment. '
+             '0 when the estimate is not based on historical data.'
+    )
+    
+    queue_position = fields.Integer(
+        string='Queue Position',
+        compute='_compute_queue_position',
+        help='Current position in the floor queue (priority first, then arrival time)'
+    )
+    
     wait_time_variance = fields.Float(
         string='Wait Time Variance (minutes)',
         compute='_compute_wait_time_variance',
@@ -301,6 +405,18 @@ class WaitingListEnterprise(models.Model):
             record.notification_sent_count = len(notifications.filtered(lambda n: n.state == 'sent'))
             record.notification_failed_count = len(notifications.filtered(lambda n: n.state == 'failed'))
     
+    def _compute_queue_position(self):
+        """Compute queue position from the cached queue index"""
+        generations = self._get_queue_generations(
+            (record.company_id.id or self.env.company.id, record.floor_id.id)
+            for record in self if record.status in QUEUE_STATES
+        )
+        for record in self:
+            if record.status in QUEUE_STATES:
+                record.queue_position = self._get_queue_position(record, generations)
+            else:
+                record.queue_position = 0
+    
     @api.depends('actual_wait_time', 'estimated_wait_time')
     def _compute_wait_time_variance(self):
         """Compute wait time variance and accuracy"""
@@ -330,29 +446,79 @@ class WaitingListEnterprise(models.Model):
         """
         self.ensure_one()
         
+        values = self._prepare_wait_time_estimate()
+        return (values['estimated_wait_time'], values['wait_time_source'])
+    
+    def _prepare_wait_time_estimate(self):
+        """
+        Compute the wait time estimate of this entry.
+        Returns dict with estimated_wait_time, wait_time_source,
+        estimated_wait_p50 and estimated_wait_p90 (quantiles are 0 when the
+        estimate does not come from historical data).
+        """
+        self.ensure_one()
+        
+        values = {
+            'estimated_wait_time': 0,
+            'wait_time_source': '',
+            'estimated_wait_p50': 0,
+            'estimated_wait_p90': 0,
+        }
         if self.status not in ['waiting', 'ready']:
-            return (0, '')
+            return values
+        
+        if self.calculation_type == 'model' and self.create_date:
+            model = self._get_wait_model(self.company_id.id or self.env.company.id)
+            if model:
+                values.update({
+                    'estimated_wait_time': self._predict_model_wait_time(
+                        model, self.create_date, self.party_size, self.queue_length_at_arrival,
+                        self.occupied_tables_at_arrival, self.priority),
+                    'wait_time_source': self._get_model_source(model),
+                })
+                return values
+        
+        params = self._get_estimation_params()
+        if params['use_table_turnover'] and self._origin.id and self.create_date:
+            # Forecast from the tables currently seated on the floor
+            forecast = self._get_turnover_forecast(
+                self.company_id.id or self.env.company.id,
+                self.floor_id.id or False,
+            )
+            seat_time = forecast.get(self._origin.id)
+            if seat_time:
+                values.update({
+                    'estimated_wait_time': self._get_turnover_wait_time(self.create_date, seat_time),
+                    'wait_time_source': self._get_turnover_source(),
+                })
+                return values
         
         # Try intelligent prediction based on historical data
-        historical_estimate = self._get_historical_wait_time(self)
-        
-        if historical_estimate > 0:
+        historical = self._get_historical_estimate(
+            self.company_id.id or self.env.company.id,
+            self.party_size,
+            self.create_date,
+            params,
+        ) if self.create_date else None
+        
+        if historical and historical['average'] > 0:
             # Use historical data + current queue adjustment
             queue_adjustment = self._get_queue_adjustment(self)
-            estimated_time = historical_estimate + queue_adjustment
-            
-            # Set source indicator
-            if self.create_date:
-                day_name = ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun'][self.create_date.weekday()]
-                hour = self.create_date.hour
-                source = f'Based on {day_name} {hour}:00 historical data'
-            else:
-                source = 'Based on historical data'
+            values.update({
+                'estimated_wait_time': historical['average'] + queue_adjustment,
+                'wait_time_source': self._get_historical_source(self.create_date),
+                'estimated_wait_p50': historical['p50'] + queue_adjustment,
+                'estimated_wait_p90': historical['p90'] + queue_adjustment,
+            })
         else:
             # Fallback to simple queue-based estimate
             estimated_time, source = self._get_simple_estimate(self)
+            values.update({
+                'estimated_wait_time': estimated_time,
+                'wait_time_source': source,
+            })
         
-        return (estimated_time, source)
+        return values
     
     @api.onchange('pos_config_id', 'floor_id', 'table_id', 'calculation_type', 'manual_wait_time')
     def _onchange_calculate_wait_time(self):
@@ -362,134 +528,642 @@ class WaitingListEnterprise(models.Model):
                 # Use manual wait time
                 self.estimated_wait_time = self.manual_wait_time
                 self.wait_time_source = 'Manually entered by host'
+                self.estimated_wait_p50 = 0
+                self.estimated_wait_p90 = 0
             else:
                 # Auto calculation
-                estimated_time, source = self._calculate_estimated_wait_time()
-                self.estimated_wait_time = estimated_time
-                self.wait_time_source = source
+                self.update(self._prepare_wait_time_estimate())
     
     def _get_historical_wait_time(self, record):
         """
         Analyze historical wait times for similar conditions.
         
+        Reads the pre-aggregated waiting.list.wait.stats buckets of the lookback
+        window, grouped by party size match, day of week match and hour match.
+        The fallback order is then applied on those few buckets:
+        
+        1. Same party size if any history exists for it, otherwise all sizes
+        2. Same day of week and hour (± tolerance)
+        3. Same hour (± tolerance) on any day
+        4. Same day of week at any hour
+        
         Returns average wait time in minutes, or 0 if insufficient data.
         """
         if not record.create_date:
             return 0
         
-        # Get configuration parameters
-        historical_days = int(self.env['ir.config_parameter'].sudo().get_param(
-            'waiting_list_enterprise.historical_days', 7))
-        hour_tolerance = int(self.env['ir.config_parameter'].sudo().get_param(
-            'waiting_list_enterprise.hour_tolerance', 1))
-        
-        # Get current time context
-        entry_time = record.create_date
-        day_of_week = entry_time.weekday()  # 0=Monday, 6=Sunday
-        hour_of_day = entry_time.hour
-        party_size = record.party_size
-        
-        # Look back N days for similar entries
-        lookback_days = entry_time - timedelta(days=historical_days)
-        
-        # Find completed entries (seated or done) with similar characteristics
-        domain = [
-            ('status', 'in', ['seated', 'done']),
-            ('create_date', '>=', lookback_days),
-            ('create_date', '<', entry_time),
-            ('actual_wait_time', '>', 0),  # Only entries with valid wait times
-            ('party_size', '=', party_size),  # Same party size
-        ]
-        
-        # Search for similar entries
-        similar_entries = self.env['waiting.list'].search(domain)
-        
-        if not similar_entries:
-            # Try broader search without party size match
-            domain = [
-                ('status', 'in', ['seated', 'done']),
-                ('create_date', '>=', lookback_days),
-                ('create_date', '<', entry_time),
-                ('actual_wait_time', '>', 0),
-            ]
-            similar_entries = self.env['waiting.list'].search(domain)
+        return self._get_historical_average(
+            record.company_id.id or self.env.company.id,
+            record.party_size,
+            record.create_date,
+        )
+    
+    def _get_historical_average(self, company_id, party_size, entry_time, params=None):
+        """Average historical wait (minutes) for a company, party size and arrival time, or 0"""
+        return self._get_historical_estimate(company_id, party_size, entry_time, params)['average']
+    
+    def _get_historical_estimate(self, company_id, party_size, entry_time, params=None):
+        """
+        Historical wait distribution for a company, party size and arrival time.
+        
+        Uses the same fallback order as _get_historical_wait_time. The quantiles
+        come from the merged wait histograms of the selected buckets.
+        When no history exists for the party size, the estimate of all sizes
+        is scaled by the party size multiplier.
+        Returns dict with average, p50 and p90 (minutes), all 0 if no data.
+        """
+        params = params or self._get_estimation_params()
+        buckets = self.env['waiting.list.wait.stats'].sudo()._get_wait_buckets(
+            company_id,
+            party_size,
+            entry_time,
+            params['historical_days'],
+            params['hour_tolerance'],
+        )
+        
+        # Prefer the same party size; broaden to all sizes if it has no history
+        same_party_buckets = [b for b in buckets if b['same_party']]
+        multiplier = 1.0
+        if same_party_buckets:
+            buckets = same_party_buckets
+        else:
+            multiplier = self._get_party_size_multiplier(party_size, params)
+        
+        empty = {'average': 0, 'p50': 0, 'p90': 0}
+        if not buckets:
+            return empty  # No historical data available
+        
+        for matches in (
+            lambda b: b['same_day'] and b['same_hour'],
+            lambda b: b['same_hour'],  # Fallback: same hour of day on any day of week
+            lambda b: b['same_day'],   # Fallback: any time, same day of week
+        ):
+            matching = [b for b in buckets if matches(b)]
+            entry_count = sum(b['entry_count'] for b in matching)
+            if entry_count:
+                average_wait = sum(b['total_wait'] for b in matching) / entry_count
+                # Histograms are mergeable: the window distribution is their bin-wise sum
+                histogram = [sum(bins) for bins in zip(*(b['histogram'] for b in matching))]
+                return {
+                    'average': round(average_wait * multiplier, 1),
+                    'p50': round(wait_histogram_quantile(histogram, 0.5) * multiplier, 1),
+                    'p90': round(wait_histogram_quantile(histogram, 0.9) * multiplier, 1),
+                }
         
-        if not similar_entries:
-            return 0  # No historical data available
+        return empty  # Still no matches
+    
+    def _get_historical_source(self, entry_time):
+        """Source text for estimates based on historical data"""
+        if entry_time:
+            day_name = ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun'][entry_time.weekday()]
+            return f'Based on {day_name} {entry_time.hour}:00 historical data'
+        return 'Based on historical data'
+    
+    @api.model
+    def _get_estimation_params(self):
+        """Wait time estimation settings, from the cached waiting list settings snapshot"""
+        return self.env['waiting.list.settings']._get_snapshot()
+    
+    def _get_party_size_multiplier(self, party_size, params):
+        """Wait time multiplier of a party size (large/medium party settings, 1.0 otherwise)"""
+        if party_size > params['large_party_threshold']:
+            return params['large_party_multiplier']
+        if party_size > params['medium_party_threshold']:
+            return params['medium_party_multiplier']
+        return 1.0
+    
+    @api.model
+    def _get_turn_time_samples(self, company_id, historical_days):
+        """Learned table turn times, from the cache of the current hour"""
+        hour = fields.Datetime.now().replace(minute=0, second=0, microsecond=0)
+        return self._build_turn_time_samples(company_id, historical_days, hour)
+    
+    @api.model
+    @tools.ormcache('company_id', 'historical_days', 'hour')
+    def _build_turn_time_samples(self, company_id, historical_days, hour):
+        """
+        Learned table turn times (minutes from seating to completion).
         
-        # Filter by same day of week and similar hour
-        matching_entries = similar_entries.filtered(
-            lambda e: e.create_date.weekday() == day_of_week and 
-                     abs(e.create_date.hour - hour_of_day) <= hour_tolerance
+        Returns dict {table seats: sorted tuple of turn times} over the lookback
+        window ending at `hour`; key 0 holds the turn times of all table sizes
+        together. Cached per hour: visits completed meanwhile are learned at
+        the next hour.
+        """
+        self.flush_model(['status', 'company_id', 'table_id', 'seated_time', 'done_time'])
+        self.env.cr.execute("""
+            SELECT rt.seats,
+                   EXTRACT(EPOCH FROM wl.done_time - wl.seated_time)::float8 / 60.0 AS turn_time
+              FROM waiting_list wl
+              JOIN restaurant_table rt ON rt.id = wl.table_id
+             WHERE wl.company_id = %s
+               AND wl.status = 'done'
+               AND wl.done_time > wl.seated_time
+               AND wl.done_time >= %s - make_interval(days => %s)
+        """, (company_id, hour, historical_days))
+        samples = {0: []}
+        for seats, turn_time in self.env.cr.fetchall():
+            samples.setdefault(seats, []).append(turn_time)
+            samples[0].append(turn_time)
+        return {seats: tuple(sorted(times)) for seats, times in samples.items()}
+    
+    def _get_turn_time_distribution(self, samples, seats):
+        """Turn time samples of a table size, falling back to all sizes"""
+        return samples.get(seats) or samples[0]
+    
+    def _get_remaining_turn_time(self, distribution, elapsed):
+        """
+        Expected remaining minutes of a table seated for `elapsed` minutes:
+        median of the turn times longer than elapsed, minus elapsed.
+        """
+        longer = distribution[bisect_left(distribution, elapsed):]
+        if not longer:
+            return TURN_TIME_OVERDUE_GRACE
+        return max(longer[len(longer) // 2] - elapsed, 0)
+    
+    @api.model
+    def _get_turnover_forecast(self, company_id, floor_id):
+        """Turnover forecast of a floor, from the cache of its current queue generation"""
+        if not floor_id:
+            return {}
+        minute = fields.Datetime.now().replace(second=0, microsecond=0)
+        return self._build_turnover_forecast(
+            company_id, floor_id, self._get_queue_generation(company_id, floor_id), minute)
+    
+    @api.model
+    @tools.ormcache('company_id', 'floor_id', 'generation', 'minute')
+    def _build_turnover_forecast(self, company_id, floor_id, generation, minute):
+        """
+        Forecast when each queued party of a floor gets a table.
+        
+        Lightweight discrete-event simulation: every table of the floor gets
+        the time it frees up (now, or seating time plus the learned remaining
+        turn time of its size). Parties that already have a table take it when
+        it frees; the others are walked in queue order (priority desc, arrival
+        asc) and take the earliest freeing table with enough seats, which is
+        then busy for a full median turn time.
+        
+        Cached per worker and per (company, floor, generation, minute): a new
+        queue generation (see _invalidate_queue_index) makes it rebuilt, and
+        so does the next minute, so that tables past their forecast keep
+        freeing from the current time and waits keep growing. Returns
+        dict {entry id: forecast seating datetime}, empty when no turn time
+        history is available.
+        """
+        params = self._get_estimation_params()
+        samples = self._get_turn_time_samples(company_id, params['historical_days'])
+        if not samples[0]:
+            return {}
+        
+        tables = self.env['restaurant.table'].sudo().search_read(
+            [('floor_id', '=', floor_id)], ['seats'])
+        if not tables:
+            return {}
+        now = minute
+        table_seats = {table['id']: table['seats'] for table in tables}
+        free_at = dict.fromkeys(table_seats, now)
+        
+        self.flush_model([
+            'status', 'company_id', 'floor_id', 'priority', 'create_date',
+            'party_size', 'table_id', 'seated_time',
+        ])
+        self.env.cr.execute("""
+            SELECT id, status, priority, create_date, party_size, table_id, seated_time
+              FROM waiting_list
+             WHERE company_id = %s
+               AND (status = 'seated' AND table_id IN %s
+                    OR floor_id = %s AND status IN %s)
+        """, (company_id, tuple(table_seats), floor_id, tuple(QUEUE_STATES)))
+        rows = self.env.cr.dictfetchall()
+        
+        def full_turn(seats):
+            distribution = self._get_turn_time_distribution(samples, seats)
+            return timedelta(minutes=distribution[len(distribution) // 2])
+        
+        # Occupied tables free up after their expected remaining turn time
+        for row in rows:
+            if row['status'] == 'seated' and row['seated_time']:
+                seats = table_seats[row['table_id']]
+                elapsed = (now - row['seated_time']).total_seconds() / 60.0
+                remaining = self._get_remaining_turn_time(
+                    self._get_turn_time_distribution(samples, seats), elapsed)
+                free_at[row['table_id']] = max(free_at[row['table_id']], now + timedelta(minutes=remaining))
+        
+        queue = sorted(
+            (row for row in rows if row['status'] in QUEUE_STATES),
+            key=lambda row: (-int(row['priority'] or 0), row['create_date'], row['id']),
         )
+        forecast = {}
+        # Parties holding a table are seated first, at their own table
+        for row in queue:
+            table_id = row['table_id']
+            if table_id in free_at:
+                forecast[row['id']] = free_at[table_id]
+                free_at[table_id] += full_turn(table_seats[table_id])
+        # Then the queue takes the earliest freeing table that fits
+        for row in queue:
+            if row['table_id']:
+                continue
+            fitting = [
+                (free_at[table_id], seats, table_id)
+                for table_id, seats in table_seats.items()
+                if seats >= row['party_size']
+            ]
+            if not fitting:
+                continue
+            seat_time, seats, table_id = min(fitting)
+            forecast[row['id']] = seat_time
+            free_at[table_id] = seat_time + full_turn(seats)
+        return forecast
+    
+    def _get_turnover_wait_time(self, entry_time, seat_time):
+        """Total wait (minutes since arrival) of a party forecast to be seated at seat_time"""
+        return round(max((seat_time - entry_time).total_seconds() / 60.0, 0), 1)
+    
+    def _get_turnover_source(self):
+        """Source text for estimates based on the table turnover forecast"""
+        return 'Based on table turnover forecast'
+    
+    @api.model
+    @tools.ormcache('company_id')
+    def _get_wait_model(self, company_id):
+        """
+        Trained regression model of a company, or None.
         
-        if not matching_entries:
-            # Fallback: same hour of day on any day of week
-            matching_entries = similar_entries.filtered(
-                lambda e: abs(e.create_date.hour - hour_of_day) <= hour_tolerance
-            )
+        Coefficients are persisted in a system parameter by the nightly
+        training job and parsed once per worker; writing the parameter clears
+        the registry cache, so every worker picks up a retrained model.
+        """
+        models_data = json.loads(
+            self.env['ir.config_parameter'].sudo().get_param('waiting_list_enterprise.wait_model') or '{}'
+        )
+        model = models_data.get(str(company_id))
+        if not model or len(model['coefficients']) != len(WAIT_MODEL_FEATURES):
+            return None
+        model['coefficients'] = tuple(model['coefficients'])
+        return MappingProxyType(model)
+    
+    def _predict_model_wait_time(self, model, arrival, party_size, queue_length, occupied_tables, priority):
+        """Wait time (minutes) predicted by a regression model, a single dot product"""
+        features = wait_model_features(arrival, party_size, queue_length, occupied_tables, priority)
+        return round(predict_wait(model['coefficients'], features), 1)
+    
+    def _get_model_source(self, model):
+        """Source text for estimates based on the regression model"""
+        return f"Regression model ({model['samples']} visits, trained {model['trained_at']})"
+    
+    def _get_shadow_estimators(self):
+        """
+        Registered estimators compared in shadow mode: {key: label}.
+        Each key needs a _shadow_estimate_<key>(params) method returning the
+        estimate in minutes, or None when the estimator has no answer.
+        """
+        return {
+            'historical': 'Historical Average',
+            'simple': 'Simple Queue',
+            'turnover': 'Table Turnover',
+            'model': 'Regression Model',
+        }
+    
+    def _shadow_estimate_historical(self, params):
+        """Historical average plus queue adjustment"""
+        historical = self._get_historical_estimate(
+            self.company_id.id, self.party_size, self.create_date, params)
+        if historical['average'] > 0:
+            return historical['average'] + self._get_queue_adjustment(self)
+        return None
+    
+    def _shadow_estimate_simple(self, params):
+        """Queue position estimate"""
+        higher_priority_count = self._count_earlier_arrivals(self, int(self.priority or 0) + 1)
+        return self._compose_simple_estimate(higher_priority_count, params, self.party_size)[0]
+    
+    def _shadow_estimate_turnover(self, params):
+        """Table turnover forecast, whether or not it is enabled"""
+        seat_time = self._get_turnover_forecast(self.company_id.id, self.floor_id.id or False).get(self.id)
+        return self._get_turnover_wait_time(self.create_date, seat_time) if seat_time else None
+    
+    def _shadow_estimate_model(self, params):
+        """Regression model prediction, whether or not the entry uses it"""
+        model = self._get_wait_model(self.company_id.id)
+        if not model:
+            return None
+        return self._predict_model_wait_time(
+            model, self.create_date, self.party_size, self.queue_length_at_arrival,
+            self.occupied_tables_at_arrival, self.priority)
+    
+    @api.model
+    @instrumented
+    def _cron_compute_shadow_estimates(self, limit=500):
+        """
+        Compute the shadow estimates of newly queued entries (cron).
+        
+        Runs in the background so the create path only pays for the estimate
+        shown to the guest. All estimates are written with one UPDATE.
+        Returns the number of entries processed.
+        """
+        entries = self.search([
+            ('status', 'in', ['waiting', 'ready']),
+            ('shadow_estimates', '=', False),
+        ], order='create_date', limit=limit)
+        if not entries:
+            return 0
+        
+        params = self._get_estimation_params()
+        estimators = list(self._get_shadow_estimators())
+        ids, estimates = [], []
+        for entry in entries:
+            shadow = {}
+            for estimator in estimators:
+                estimate = getattr(entry, f'_shadow_estimate_{estimator}')(params)
+                if estimate is not None:
+                    shadow[estimator] = round(estimate, 1)
+            ids.append(entry.id)
+            estimates.append(json.dumps(shadow))
+        
+        self.env.cr.execute("""
+            UPDATE waiting_list AS wl
+               SET shadow_estimates = v.shadow_estimates
+              FROM unnest(%s::int[], %s::jsonb[]) AS v(id, shadow_estimates)
+             WHERE wl.id = v.id
+        """, (ids, estimates))
+        self.invalidate_model(['shadow_estimates'])
+        return len(ids)
+    
+    @api.model
+    @instrumented
+    def _cron_rollup_estimator_accuracy(self):
+        """Refresh the daily estimator accuracy rollups of yesterday and today (cron)"""
+        return self.env['waiting.list.estimator.accuracy'].sudo()._rollup_recent()
+    
+    def _prepare_arrival_snapshot(self):
+        """Floor state when the party arrives, kept as regression model features"""
+        self.ensure_one()
+        return {
+            'queue_length_at_arrival': self._count_earlier_arrivals(self, 0),
+            'occupied_tables_at_arrival': self.search_count([
+                ('company_id', '=', self.company_id.id),
+                ('floor_id', '=', self.floor_id.id),
+                ('status', '=', 'seated'),
+            ]),
+        }
+    
+    @api.model
+    @instrumented
+    def _cron_train_wait_model(self):
+        """
+        Fit the regression wait time model of every company (nightly cron).
+        
+        Ridge least squares on the completed visits of the training window,
+        using weekday, hour, party size, queue length and occupied tables at
+        arrival, and priority. Companies with too little history keep no model.
+        Returns dict {company_id: number of training samples} of trained models.
+        """
+        if np is None:
+            _logger.warning('Wait time regression model not trained: NumPy is not installed')
+            return {}
+        
+        self.flush_model([
+            'status', 'company_id', 'create_date', 'actual_wait_time', 'party_size',
+            'queue_length_at_arrival', 'occupied_tables_at_arrival', 'priority',
+        ])
+        self.env.cr.execute("""
+            SELECT company_id, create_date, party_size, queue_length_at_arrival,
+                   occupied_tables_at_arrival, priority, actual_wait_time
+              FROM waiting_list
+             WHERE status IN ('seated', 'done')
+               AND actual_wait_time > 0
+               AND create_date >= (NOW() AT TIME ZONE 'UTC') - make_interval(days => %s)
+          ORDER BY company_id
+        """, (WAIT_MODEL_TRAINING_DAYS,))
+        
+        models_data = {}
+        trained_at = fields.Date.to_string(fields.Date.context_today(self))
+        for company_id, rows in groupby(self.env.cr.fetchall(), key=lambda row: row[0]):
+            rows = list(rows)
+            if len(rows) < WAIT_MODEL_MIN_SAMPLES:
+                continue
+            features = [wait_model_features(*row[1:6]) for row in rows]
+            coefficients, mean_absolute_error = fit_wait_model(features, [row[6] for row in rows])
+            models_data[str(company_id)] = {
+                'coefficients': coefficients,
+                'samples': len(rows),
+                'mean_absolute_error': round(mean_absolute_error, 2),
+                'trained_at': trained_at,
+            }
+            _logger.info('Trained wait time model for company %s on %d visits (MAE %.1f min)',
+                         company_id, len(rows), mean_absolute_error)
         
-        if not matching_entries:
-            # Fallback: any time, same day of week
-            matching_entries = similar_entries.filtered(
-                lambda e: e.create_date.weekday() == day_of_week
+        self.env['ir.config_parameter'].sudo().set_param(
+            'waiting_list_enterprise.wait_model', json.dumps(models_data))
+        return {int(company_id): model['samples'] for company_id, model in models_data.items()}
+    
+    def init(self):
+        """Queue generations: append-only log of (company, floor) queue changes,
+        and the index of the arrivals of one company in a time range"""
+        super().init()
+        cr = self.env.cr
+        sql.create_index(cr, 'waiting_list_company_create_date_idx', self._table, ['company_id', 'create_date'])
+        cr.execute("""
+            CREATE TABLE IF NOT EXISTS waiting_list_queue_generation (
+                company_id INTEGER NOT NULL,
+                floor_id INTEGER NOT NULL,
+                generation BIGINT NOT NULL
             )
+        """)
+        cr.execute("CREATE SEQUENCE IF NOT EXISTS waiting_list_queue_generation_seq")
+        sql.create_index(
+            cr, 'waiting_list_queue_generation_queue_idx', 'waiting_list_queue_generation',
+            ['company_id', 'floor_id', 'generation'],
+        )
+    
+    @api.model
+    def _get_queue_generations(self, queues):
+        """Current generation of (company, floor) queues
+        
+        Returns dict {(company_id, floor_id or False): (latest generation,
+        number of generations)}, in one query along the generation index. The
+        count makes a change visible even when a transaction holding an older
+        generation number commits after a newer one.
+        """
+        queues = {(company_id, floor_id or False) for company_id, floor_id in queues}
+        if not queues:
+            return {}
+        company_ids, floor_ids = zip(*((company_id, floor_id or 0) for company_id, floor_id in queues))
+        self.env.cr.execute("""
+            SELECT queue.company_id, queue.floor_id, COALESCE(MAX(log.generation), 0), COUNT(log.generation)
+              FROM unnest(%s::int[], %s::int[]) AS queue(company_id, floor_id)
+         LEFT JOIN waiting_list_queue_generation AS log
+                ON log.company_id = queue.company_id
+               AND log.floor_id = queue.floor_id
+          GROUP BY queue.company_id, queue.floor_id
+        """, (list(company_ids), list(floor_ids)))
+        return {
+            (company_id, floor_id or False): (generation, count)
+            for company_id, floor_id, generation, count in self.env.cr.fetchall()
+        }
+    
+    @api.model
+    def _get_queue_generation(self, company_id, floor_id):
+        """Current generation of one (company, floor) queue"""
+        return self._get_queue_generations([(company_id, floor_id)])[(company_id, floor_id or False)]
+    
+    @api.model
+    def _get_queue_index(self, company_id, floor_id, generations=None):
+        """Ordered in-memory index of one active queue, from the cache of its current generation"""
+        floor_id = floor_id or False
+        if generations is None or (company_id, floor_id) not in generations:
+            generation = self._get_queue_generation(company_id, floor_id)
+        else:
+            generation = generations[(company_id, floor_id)]
+        return self._build_queue_index(company_id, floor_id, generation)
+    
+    @api.model
+    @tools.ormcache('company_id', 'floor_id', 'generation')
+    def _build_queue_index(self, company_id, floor_id, generation):
+        """
+        Build the ordered in-memory index of one active queue.
         
-        if not matching_entries:
-            return 0  # Still no matches
+        The index is cached per worker and per (company, floor, generation)
+        in the registry cache; _invalidate_queue_index() starts a new
+        generation of the queue whenever an entry joins, leaves or moves in
+        it, so every worker rebuilds only that queue's index.
+        """
+        self.flush_model(['status', 'company_id', 'floor_id', 'priority', 'create_date', 'party_size', 'table_id'])
+        self.env.cr.execute("""
+            SELECT id, priority, create_date, party_size, status, table_id
+              FROM waiting_list
+             WHERE company_id = %s
+               AND floor_id IS NOT DISTINCT FROM %s
+               AND status IN %s
+        """, (company_id, floor_id or None, tuple(QUEUE_STATES)))
+        rows = sorted(
+            self.env.cr.fetchall(),
+            key=lambda row: (-int(row[1] or 0), row[2], row[0]),
+        )
         
-        # Calculate average wait time from matching entries
-        total_wait = sum(matching_entries.mapped('actual_wait_time'))
-        average_wait = total_wait / len(matching_entries)
+        arrivals = [[] for _level in range(6)]
+        for row in rows:
+            arrivals[int(row[1] or 0)].append(row[2])
         
-        return round(average_wait, 1)
+        return QueueIndex(
+            keys=tuple((-int(row[1] or 0), row[2], row[0]) for row in rows),
+            entries=tuple((row[0], row[3], row[4], bool(row[5])) for row in rows),
+            arrivals=tuple(tuple(sorted(level)) for level in arrivals),
+        )
+    
+    def _invalidate_queue_index(self, queues=None):
+        """Start a new generation of the queues of the records (or of the given queues)
+        
+        The cached queue indexes and turnover forecasts are keyed on the
+        generation of their (company, floor) queue: the other queues and
+        every other registry cache stay valid. Generations are appended from
+        a sequence, so concurrent transactions never conflict and a rolled
+        back generation is never reused.
+        """
+        if queues is None:
+            queues = {(record.company_id.id, record.floor_id.id) for record in self}
+        queues = {(company_id, floor_id or 0) for company_id, floor_id in queues if company_id}
+        if not queues:
+            return
+        company_ids, floor_ids = zip(*queues)
+        self.env.cr.execute("""
+            INSERT INTO waiting_list_queue_generation (company_id, floor_id, generation)
+                 SELECT company_id, floor_id, nextval('waiting_list_queue_generation_seq')
+                   FROM unnest(%s::int[], %s::int[]) AS queue(company_id, floor_id)
+        """, (list(company_ids), list(floor_ids)))
+    
+    @api.model
+    def _prune_queue_generations(self):
+        """Delete the superseded queue generations (only the latest one per queue is read)
+        
+        Every pruned queue gets a new generation: the row count is part of the
+        key, and going back to a count seen before could serve an index cached
+        before a generation committed out of order.
+        """
+        self.env.cr.execute("""
+            WITH pruned AS (
+                DELETE FROM waiting_list_queue_generation AS log
+                 USING (SELECT company_id, floor_id, MAX(generation) AS generation
+                          FROM waiting_list_queue_generation
+                      GROUP BY company_id, floor_id
+                        HAVING COUNT(*) > 1) AS latest
+                 WHERE log.company_id = latest.company_id
+                   AND log.floor_id = latest.floor_id
+                   AND log.generation < latest.generation
+             RETURNING log.company_id, log.floor_id
+            )
+            INSERT INTO waiting_list_queue_generation (company_id, floor_id, generation)
+                 SELECT company_id, floor_id, nextval('waiting_list_queue_generation_seq')
+                   FROM (SELECT DISTINCT company_id, floor_id FROM pruned) AS queue
+        """)
+        _logger.info('Pruned the superseded generations of %d queues', self.env.cr.rowcount)
+    
+    @api.model
+    @instrumented
+    def _cron_prune_queue_generations(self):
+        """Delete the superseded queue generations (nightly cron)"""
+        self._prune_queue_generations()
+        return True
+    
+    def _get_record_queue_index(self, record, generations=None):
+        """Queue index of the queue a record waits in"""
+        return self._get_queue_index(
+            record.company_id.id or self.env.company.id,
+            record.floor_id.id or False,
+            generations,
+        )
+    
+    def _count_earlier_arrivals(self, record, min_priority):
+        """Count parties of the record's queue that arrived before it with priority >= min_priority"""
+        index = self._get_record_queue_index(record)
+        arrival = record.create_date or fields.Datetime.now()
+        return sum(bisect_left(level, arrival) for level in index.arrivals[min_priority:])
+    
+    def _get_queue_position(self, record, generations=None):
+        """1-based position of a record in its queue (priority desc, arrival asc)"""
+        index = self._get_record_queue_index(record, generations)
+        key = (-int(record.priority or 0), record.create_date or fields.Datetime.now(), record._origin.id or 0)
+        return bisect_left(index.keys, key) + 1
+    
+    @api.model
+    def _get_next_eligible_party(self, company_id, floor_id, seats):
+        """Id of the first unassigned waiting/ready party fitting in `seats`, or False"""
+        index = self._get_queue_index(company_id, floor_id or False)
+        for entry_id, party_size, status, has_table in index.entries:
+            if status in ['waiting', 'ready'] and party_size <= seats and not has_table:
+                return entry_id
+        return False
     
     def _get_queue_adjustment(self, record):
         """Calculate adjustment based on current queue position."""
-        # Get configuration parameter
-        queue_time_per_person = int(self.env['ir.config_parameter'].sudo().get_param(
-            'waiting_list_enterprise.queue_time_per_person', 1))
-        
-        # Count customers ahead in queue with equal or higher priority
-        ahead_count = self.search_count([
-            ('status', 'in', ['waiting', 'ready', 'called']),
-            ('create_date', '<', record.create_date),
-            ('id', '!=', record.id),
-            '|',
-            ('priority', '>', record.priority),
-            '&',
-            ('priority', '=', record.priority),
-            ('create_date', '<', record.create_date)
-        ])
+        params = self._get_estimation_params()
+        
+        # Count customers ahead in queue (earlier arrival) with equal or higher priority
+        ahead_count = self._count_earlier_arrivals(record, int(record.priority or 0))
         
         # Each person ahead adds configured minutes
-        return ahead_count * queue_time_per_person
+        return ahead_count * params['queue_time_per_person']
     
     def _get_simple_estimate(self, record):
         """
         Simple fallback estimate when historical data is unavailable.
-        Based on queue position only (party size not considered).
+        Based on queue position, scaled by the party size multiplier.
         Result is clamped between configured minimum and maximum values.
         Returns tuple: (estimated_time, source_text)
         """
-        # Get configuration parameters
-        simple_time_per_person = int(self.env['ir.config_parameter'].sudo().get_param(
-            'waiting_list_enterprise.simple_time_per_person', 1))
-        minimum_wait_time = int(self.env['ir.config_parameter'].sudo().get_param(
-            'waiting_list_enterprise.minimum_wait_time', 10))
-        maximum_wait_time = int(self.env['ir.config_parameter'].sudo().get_param(
-            'waiting_list_enterprise.maximum_wait_time', 60))
-        
         # Get current waiting customers with higher priority
-        higher_priority_count = self.search_count([
-            ('status', 'in', ['waiting', 'ready', 'called']),
-            ('priority', '>', record.priority),
-            ('create_date', '<', record.create_date),
-            ('id', '!=', record.id)
-        ])
+        higher_priority_count = self._count_earlier_arrivals(record, int(record.priority or 0) + 1)
         
-        # Base estimate: configured minutes per party ahead in queue
-        base_estimate = higher_priority_count * simple_time_per_person
+        return self._compose_simple_estimate(higher_priority_count, self._get_estimation_params(), record.party_size)
+    
+    def _compose_simple_estimate(self, higher_priority_count, params, party_size=0):
+        """Clamp the queue-position estimate and build its source text"""
+        minimum_wait_time = params['minimum_wait_time']
+        maximum_wait_time = params['maximum_wait_time']
+        
+        # Base estimate: configured minutes per party ahead in queue, scaled for larger parties
+        multiplier = self._get_party_size_multiplier(party_size, params)
+        base_estimate = higher_priority_count * params['simple_time_per_person'] * multiplier
         
         # Clamp result between minimum and maximum wait time and set source
         if base_estimate < minimum_wait_time:
@@ -500,9 +1174,161 @@ class WaitingListEnterprise(models.Model):
             source = f'Maximum wait time limit ({maximum_wait_time} min) - {higher_priority_count} customers ahead'
         else:
             source = f'Based on current queue position ({higher_priority_count} customers ahead)'
+        if multiplier != 1.0:
+            source += f', x{multiplier:g} for party of {party_size}'
         
         return (base_estimate, source)
     
+    @api.model
+    def recompute_queue_estimates(self, company_id=None, floor_id=None):
+        """
+        Re-estimate the wait time of every active entry of a queue in one pass.
+        
+        The active queue is fetched with a single ordered query, positions are
+        derived by walking it in arrival order with running per-priority counts,
+        and all estimates are written back with one UPDATE; the updated records
+        are then marked modified so that stored fields depending on the
+        estimate (variance, accuracy) are recomputed. Entries in manual
+        calculation mode keep their host-entered value.
+        
+        :param company_id: company to recompute (defaults to the current company)
+        :param floor_id: restrict to one floor (False for entries without floor);
+                         None recomputes every floor of the company
+        Returns the number of entries updated.
+        """
+        company_id = company_id or self.env.company.id
+        params = self._get_estimation_params()
+        
+        self.flush_model([
+            'status', 'company_id', 'floor_id', 'priority', 'create_date',
+            'party_size', 'calculation_type', 'queue_length_at_arrival', 'occupied_tables_at_arrival',
+        ])
+        floor_filter = ''
+        query_params = {'company_id': company_id, 'states': tuple(QUEUE_STATES)}
+        if floor_id is not None:
+            floor_filter = 'AND floor_id IS NOT DISTINCT FROM %(floor_id)s'
+            query_params['floor_id'] = floor_id or None
+        self.env.cr.execute(f"""
+            SELECT id, floor_id, priority, create_date, party_size, status, calculation_type,
+                   queue_length_at_arrival, occupied_tables_at_arrival
+              FROM waiting_list
+             WHERE company_id = %(company_id)s
+               AND status IN %(states)s
+               {floor_filter}
+          ORDER BY floor_id NULLS FIRST, create_date, id
+        """, query_params)
+        rows = self.env.cr.dictfetchall()
+        
+        historical_cache = {}
+        model = self._get_wait_model(company_id)
+        updates = []
+        for floor, queue in groupby(rows, key=lambda row: row['floor_id']):
+            forecast = self._get_turnover_forecast(company_id, floor or False) if params['use_table_turnover'] else {}
+            # Parties seen so far (strictly earlier arrival) per priority level 0-5
+            priority_counts = [0] * 6
+            for _arrival, arrivals in groupby(queue, key=lambda row: row['create_date']):
+                arrivals = list(arrivals)
+                for row in arrivals:
+                    if row['status'] not in ['waiting', 'ready'] or row['calculation_type'] == 'manual':
+                        continue
+                    priority = int(row['priority'] or 0)
+                    ahead_count = sum(priority_counts[priority:])
+                    higher_priority_count = sum(priority_counts[priority + 1:])
+                    
+                    entry_time = row['create_date']
+                    if model and row['calculation_type'] == 'model':
+                        updates.append((
+                            row['id'],
+                            self._predict_model_wait_time(
+                                model, entry_time, row['party_size'], row['queue_length_at_arrival'],
+                                row['occupied_tables_at_arrival'], row['priority']),
+                            self._get_model_source(model),
+                            0,
+                            0,
+                        ))
+                        continue
+                    
+                    if row['id'] in forecast:
+                        updates.append((
+                            row['id'],
+                            self._get_turnover_wait_time(entry_time, forecast[row['id']]),
+                            self._get_turnover_source(),
+                            0,
+                            0,
+                        ))
+                        continue
+                    
+                    cache_key = (entry_time.replace(minute=0, second=0, microsecond=0), row['party_size'])
+                    if cache_key not in historical_cache:
+                        historical_cache[cache_key] = self._get_historical_estimate(
+                            company_id, row['party_size'], entry_time, params)
+                    historical = historical_cache[cache_key]
+                    
+                    if historical['average'] > 0:
+                        queue_adjustment = ahead_count * params['queue_time_per_person']
+                        updates.append((
+                            row['id'],
+                            historical['average'] + queue_adjustment,
+                            self._get_historical_source(entry_time),
+                            historical['p50'] + queue_adjustment,
+                            historical['p90'] + queue_adjustment,
+                        ))
+                    else:
+                        estimated_time, source = self._compose_simple_estimate(
+                            higher_priority_count, params, row['party_size'])
+                        updates.append((row['id'], estimated_time, source, 0, 0))
+                
+                for row in arrivals:
+                    priority_counts[int(row['priority'] or 0)] += 1
+        
+        if not updates:
+            return 0
+        
+        ids, estimates, sources, p50s, p90s = zip(*updates)
+        self.env.cr.execute("""
+            UPDATE waiting_list AS wl
+               SET estimated_wait_time = v.estimated_wait_time,
+                   wait_time_source = v.wait_time_source,
+                   estimated_wait_p50 = v.estimated_wait_p50,
+                   estimated_wait_p90 = v.estimated_wait_p90,
+                   write_uid = %s,
+                   write_date = NOW() AT TIME ZONE 'UTC'
+              FROM unnest(%s::int[], %s::float8[], %s::varchar[], %s::float8[], %s::float8[])
+                   AS v(id, estimated_wait_time, wait_time_source, estimated_wait_p50, estimated_wait_p90)
+             WHERE wl.id = v.id
+        """, (self.env.uid, list(ids), list(estimates), list(sources), list(p50s), list(p90s)))
+        updated_fields = ['estimated_wait_time', 'wait_time_source', 'estimated_wait_p50', 'estimated_wait_p90']
+        self.invalidate_model(updated_fields + ['write_uid', 'write_date'])
+        # Recompute the stored fields depending on the estimates
+        self.browse(ids).modified(updated_fields)
+        
+        return len(updates)
+    
+    def _recompute_affected_queues(self, queues=None):
+        """Recompute the queues the records belong to (or the given (company, floor) queues)"""
+        if queues is None:
+            queues = {(r.company_id.id, r.floor_id.id) for r in self}
+        for company_id, floor_id in queues:
+            self.recompute_queue_estimates(company_id, floor_id)
+    
+    def _schedule_queue_recompute(self, queues):
+        """Recompute the (company, floor) queues once, before the transaction commits
+        
+        Hosts seat parties one record at a time: collecting the queues and
+        recomputing them in a precommit hook makes it one pass per queue per
+        transaction instead of one per written record.
+        """
+        data = self.env.cr.precommit.data
+        if 'waiting_list.queues_to_recompute' not in data:
+            data['waiting_list.queues_to_recompute'] = set()
+            self.env.cr.precommit.add(self._recompute_scheduled_queues)
+        data['waiting_list.queues_to_recompute'].update(queues)
+    
+    def _recompute_scheduled_queues(self):
+        """Precommit hook of _schedule_queue_recompute()"""
+        queues = self.env.cr.precommit.data.pop('waiting_list.queues_to_recompute', set())
+        self._recompute_affected_queues(queues)
+    
     def _default_pos_config_id(self):
         """Get the last used POS config for current user, or first available"""
         # Try user's last used POS
@@ -586,6 +1412,7 @@ class WaitingListEnterprise(models.Model):
             if suitable_tables:
                 self.table_id = suitable_tables[0]
     
+    @instrumented
     def action_assign_table(self):
         """Assign a table to the waiting customer"""
         self.ensure_one()
@@ -683,25 +1510,18 @@ class WaitingListEnterprise(models.Model):
             'status': 'called'
         })
         
-        # Trigger immediate send (or let cron handle it)
-        try:
-            notification.action_send()
-            message = _('Customer %s will be notified via %s that table %s is ready') % (
-                self.customer_id.name,
-                dict(notification._fields['notification_type'].selection).get(notification_type),
-                self.table_id.display_name
-            )
-            notification_title = _('Notification Queued')
-        except Exception as e:
-            _logger.error('Failed to send notification immediately: %s', str(e))
-            message = _('Notification queued for %s. Will be sent shortly.') % self.customer_id.name
-            notification_title = _('Notification Queued')
+        # Already dispatched by create_notification (sent after commit)
+        message = _('Customer %s will be notified via %s that table %s is ready') % (
+            self.customer_id.name,
+            dict(notification._fields['notification_type'].selection).get(notification_type),
+            self.table_id.display_name
+        )
         
         return {
             'type': 'ir.actions.client',
             'tag': 'display_notification',
             'params': {
-                'title': notification_title,
+                'title': _('Notification Queued'),
                 'message': message,
                 'type': 'success',
                 'sticky': False,
@@ -756,11 +1576,9 @@ class WaitingListEnterprise(models.Model):
         if self.calculation_type == 'manual':
             raise UserError(_('Cannot recalculate wait time in Manual mode. Please switch to Auto Calculation or adjust the Manual Wait Time field.'))
         
-        estimated_time, source = self._calculate_estimated_wait_time()
-        self.write({
-            'estimated_wait_time': estimated_time,
-            'wait_time_source': source
-        })
+        # Refresh the whole queue of this floor, not just this entry
+        self._recompute_affected_queues()
+        estimated_time, source = self.estimated_wait_time, self.wait_time_source
         
         # Show notification and reload form to display updated value
         return {
@@ -823,9 +1641,14 @@ class WaitingListEnterprise(models.Model):
                 ))
     
     @api.model
+    @instrumented
     def create(self, vals):
         """Override create to send initial queue notification or auto-seat walk-ins"""
         record = super(WaitingListEnterprise, self).create(vals)
+        record._invalidate_queue_index()
+        
+        # Keep the floor state at arrival for the regression model
+        record.write(record._prepare_arrival_snapshot())
         
         # Calculate estimated wait time if not provided
         if record.status in ['waiting', 'ready'] and not record.estimated_wait_time:
@@ -837,11 +1660,7 @@ class WaitingListEnterprise(models.Model):
                 })
             else:
                 # Auto calculation
-                estimated_time, source = record._calculate_estimated_wait_time()
-                record.write({
-                    'estimated_wait_time': estimated_time,
-                    'wait_time_source': source
-                })
+                record.write(record._prepare_wait_time_estimate())
         
         # Walk-in workflow: auto-seat if table is selected
         if record.waiting_type == 'walkin' and record.table_id:
@@ -867,6 +1686,11 @@ class WaitingListEnterprise(models.Model):
     
     def write(self, vals):
         """Override write to auto-seat walk-ins when table is assigned"""
+        # Queues the records leave when their floor or company changes
+        queues = set()
+        if (QUEUE_ESTIMATE_FIELDS | QUEUE_INDEX_FIELDS).intersection(vals):
+            queues = {(r.company_id.id, r.floor_id.id) for r in self}
+        
         # Before write, check if we're assigning a table to a walk-in
         for record in self:
             # Check if table is being assigned and it's a walk-in
@@ -883,8 +1707,40 @@ class WaitingListEnterprise(models.Model):
                 })
                 _logger.info('Walk-in %s auto-seated at table via write', record.name)
         
-        return super(WaitingListEnterprise, self).write(vals)
+        # Record when the table is released, to learn table turn times
+        if vals.get('status') == 'done' and 'done_time' not in vals:
+            vals['done_time'] = fields.Datetime.now()
+        
+        result = super(WaitingListEnterprise, self).write(vals)
+        
+        # Feed the wait time statistics as soon as parties are seated, and
+        # correct them when a seated party is edited or un-seated
+        if WAIT_STATS_FIELDS.intersection(vals):
+            self.env['waiting.list.wait.stats'].sudo()._sync_wait_times(self)
+        
+        if queues:
+            queues.update((r.company_id.id, r.floor_id.id) for r in self)
+        if QUEUE_INDEX_FIELDS.intersection(vals):
+            self._invalidate_queue_index(queues)
+        
+        # Seating, cancelling, a priority or floor change makes the estimates
+        # of the rest of the queue stale (of the old and the new floor)
+        if QUEUE_ESTIMATE_FIELDS.intersection(vals):
+            self._schedule_queue_recompute(queues)
+        
+        return result
+    
+    def unlink(self):
+        """Override unlink to drop the cached queue indexes and counted wait times"""
+        self.env['waiting.list.wait.stats'].sudo()._sync_wait_times(
+            self.filtered('wait_stats_wait'), removed=True
+        )
+        queues = {(record.company_id.id, record.floor_id.id) for record in self}
+        result = super(WaitingListEnterprise, self).unlink()
+        self._invalidate_queue_index(queues)
+        return result
     
+    @instrumented
     def action_send_queue_notification(self):
         """Send notification that customer has been added to queue"""
         self.ensure_one()
@@ -907,10 +1763,9 @@ class WaitingListEnterprise(models.Model):
             'scheduled_time': fields.Datetime.now(),
         })
         
-        # Try to send immediately
+        # Sent after commit by the notification cron (or right away when configured)
         try:
-            notification.action_send()
-            _logger.info('Queue notification sent to %s for waiting list %s', self.customer_name, self.name)
+            notification._dispatch()
         except Exception as e:
             _logger.error('Failed to send queue notification: %s', str(e))
         
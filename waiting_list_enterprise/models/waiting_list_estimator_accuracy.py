@@ -0,0 +1,158 @@
+# -*- coding: utf-8 -*-
+
+from odoo import models, fields, api
+from datetime import timedelta
+import logging
+
+_logger = logging.getLogger(__name__)
+
+# An estimate within this many minutes of the actual wait counts as a hit
+ESTIMATOR_HIT_TOLERANCE = 5
+
+
+class WaitingListEstimatorAccuracy(models.Model):
+    """Daily accuracy of each wait time estimator per company
+
+    One row sums the errors of one estimator over the parties seated on a day:
+    the estimate shown to guests ('live') and the shadow estimates computed in
+    the background by every registered estimator.
+    """
+
+    _name = 'waiting.list.estimator.accuracy'
+    _description = 'Waiting List Estimator Accuracy'
+    _order = 'date desc, mean_absolute_error asc'
+    _rec_name = 'estimator'
+
+    company_id = fields.Many2one(
+        'res.company',
+        string='Company',
+        required=True,
+        ondelete='cascade',
+        index=True
+    )
+
+    date = fields.Date(
+        string='Date',
+        required=True,
+        help='Day the parties were seated (UTC)'
+    )
+
+    estimator = fields.Selection(
+        selection='_selection_estimator',
+        string='Estimator',
+        required=True
+    )
+
+    entry_count = fields.Integer(
+        string='Seated Parties',
+        help='Number of seated parties with an estimate from this estimator'
+    )
+
+    total_abs_error = fields.Float(
+        string='Total Absolute Error (minutes)'
+    )
+
+    total_error = fields.Float(
+        string='Total Error (minutes)',
+        help='Sum of estimate minus actual wait; positive means over-estimation'
+    )
+
+    hit_count = fields.Integer(
+        string='Hits',
+        help='Estimates within %d minutes of the actual wait' % ESTIMATOR_HIT_TOLERANCE
+    )
+
+    mean_absolute_error = fields.Float(
+        string='Mean Absolute Error (minutes)',
+        compute='_compute_accuracy',
+        store=True,
+        aggregator='avg'
+    )
+
+    bias = fields.Float(
+        string='Bias (minutes)',
+        compute='_compute_accuracy',
+        store=True,
+        aggregator='avg',
+        help='Average of estimate minus actual wait'
+    )
+
+    hit_rate = fields.Float(
+        string='Hit Rate (%)',
+        compute='_compute_accuracy',
+        store=True,
+        aggregator='avg'
+    )
+
+    _sql_constraints = [
+        ('estimator_day_uniq', 'unique(company_id, date, estimator)',
+         'Only one accuracy rollup per company, day and estimator is allowed.'),
+    ]
+
+    @api.model
+    def _selection_estimator(self):
+        """Shown estimate plus every registered shadow estimator"""
+        return [('live', 'Shown Estimate')] + list(self.env['waiting.list']._get_shadow_estimators().items())
+
+    @api.depends('entry_count', 'total_abs_error', 'total_error', 'hit_count')
+    def _compute_accuracy(self):
+        """Compute mean errors and hit rate from the daily sums"""
+        for rollup in self:
+            if rollup.entry_count:
+                rollup.mean_absolute_error = rollup.total_abs_error / rollup.entry_count
+                rollup.bias = rollup.total_error / rollup.entry_count
+                rollup.hit_rate = rollup.hit_count * 100.0 / rollup.entry_count
+            else:
+                rollup.mean_absolute_error = 0.0
+                rollup.bias = 0.0
+                rollup.hit_rate = 0.0
+
+    @api.model
+    def _rollup(self, date_from):
+        """Recompute the rollups of every day from date_from until today
+
+        The estimates are read from the seated entries in one grouped query;
+        the rollups of those days are replaced, so the job can be re-run.
+        Returns the number of rollups written.
+        """
+        self.env['waiting.list'].flush_model([
+            'status', 'company_id', 'seated_time', 'actual_wait_time',
+            'estimated_wait_time', 'shadow_estimates',
+        ])
+        self.env.cr.execute("""
+            WITH estimates AS (
+                SELECT wl.company_id,
+                       wl.seated_time::date AS date,
+                       est.key AS estimator,
+                       est.value::float8 - wl.actual_wait_time AS error
+                  FROM waiting_list wl
+            CROSS JOIN LATERAL jsonb_each_text(
+                           COALESCE(wl.shadow_estimates, '{}'::jsonb)
+                           || CASE WHEN wl.estimated_wait_time > 0
+                                   THEN jsonb_build_object('live', wl.estimated_wait_time)
+                                   ELSE '{}'::jsonb END
+                       ) AS est
+                 WHERE wl.status IN ('seated', 'done')
+                   AND wl.seated_time >= %(date_from)s
+                   AND wl.actual_wait_time > 0
+            )
+            SELECT company_id, date, estimator,
+                   COUNT(*) AS entry_count,
+                   SUM(ABS(error)) AS total_abs_error,
+                   SUM(error) AS total_error,
+                   COUNT(*) FILTER (WHERE ABS(error) <= %(tolerance)s) AS hit_count
+              FROM estimates
+          GROUP BY 1, 2, 3
+        """, {'date_from': date_from, 'tolerance': ESTIMATOR_HIT_TOLERANCE})
+        estimators = dict(self._selection_estimator())
+        vals_list = [row for row in self.env.cr.dictfetchall() if row['estimator'] in estimators]
+
+        self.search([('date', '>=', date_from)]).unlink()
+        self.create(vals_list)
+        _logger.info('Rolled up estimator accuracy since %s: %d rows', date_from, len(vals_list))
+        return len(vals_list)
+
+    @api.model
+    def _rollup_recent(self, days=2):
+        """Recompute the rollups of the last `days` days (today included)"""
+        return self._rollup(fields.Date.today() - timedelta(days=days - 1))
@@ -2,11 +2,41 @@
 
 from odoo import models, fields, api, _
 from odoo.exceptions import UserError
+from odoo.tools import sql
+from collections import defaultdict
 from datetime import timedelta
 import logging
+import random
+import uuid
+from odoo.addons.waiting_list_base.models.waiting_list_logging import log_operation, mask_phone
+from odoo.addons.waiting_list_base.models.waiting_list_perf import instrumented
 
 _logger = logging.getLogger(__name__)
 
+# Claims older than this (minutes) are considered abandoned and released
+NOTIFICATION_CLAIM_TIMEOUT = 15
+
+# Server action code of the cron sending the queued notifications
+DISPATCH_CRON_CODE = 'model._cron_process_pending_notifications()'
+
+# sms.sms states of a message handed over to the provider
+SMS_SENT_STATES = ('process', 'pending', 'sent')
+
+# Retry backoff after a failed send (minutes): doubles per attempt, capped
+RETRY_BACKOFF_BASE = 1
+RETRY_BACKOFF_MAX = 60
+
+
+def retry_backoff(attempt):
+    """Delay before the next attempt after `attempt` failed ones, with jitter
+    
+    Exponential (1, 2, 4, ... minutes, capped) with "equal jitter": half the
+    delay is fixed, the other half random, so notifications that failed
+    together do not all retry at the same moment.
+    """
+    delay = min(RETRY_BACKOFF_BASE * 2 ** max(attempt - 1, 0), RETRY_BACKOFF_MAX)
+    return timedelta(minutes=delay / 2 + random.uniform(0, delay / 2))
+
 
 class WaitingListNotification(models.Model):
     """Queue for waiting list notifications to be sent via SMS/WhatsApp"""
@@ -65,6 +95,17 @@ class WaitingListNotification(models.Model):
         help='When this notification should be sent'
     )
     
+    next_attempt_at = fields.Datetime(
+        string='Next Attempt',
+        compute='_compute_next_attempt_at',
+        store=True,
+        readonly=False,
+        precompute=True,
+        copy=False,
+        help='When the pending notification is due: the scheduled time, then postponed '
+             'with exponential backoff after each failed attempt'
+    )
+    
     sent_time = fields.Datetime(
         string='Sent Time',
         readonly=True,
@@ -106,6 +147,34 @@ class WaitingListNotification(models.Model):
         help='Link to Odoo SMS record if SMS module is used'
     )
     
+    # Dispatch claim: set when a worker moves the notification to processing
+    claim_token = fields.Char(
+        string='Claim Token',
+        readonly=True,
+        index=True,
+        copy=False,
+        help='Token of the worker processing this notification'
+    )
+    
+    claimed_at = fields.Datetime(
+        string='Claimed At',
+        readonly=True,
+        copy=False
+    )
+    
+    def init(self):
+        """Partial index of the due pending notifications (dispatcher claims)"""
+        sql.create_index(
+            self.env.cr, 'waiting_list_notification_pending_next_attempt_idx', self._table,
+            ['next_attempt_at', 'id'], where="state = 'pending'",
+        )
+    
+    @api.depends('scheduled_time')
+    def _compute_next_attempt_at(self):
+        """A new notification is due at its scheduled time"""
+        for notification in self:
+            notification.next_attempt_at = notification.scheduled_time or fields.Datetime.now()
+    
     @api.model
     def _prepare_message_content(self, waiting_list):
         """Prepare notification message content based on waiting list entry"""
@@ -159,39 +228,71 @@ Thank you for waiting - {waiting_list.company_id.name}"""
         # Prepare message
         message = self._prepare_message_content(waiting_list)
         
-        # Create notification record
-        notification = self.create({
-            'waiting_list_id': waiting_list.id,
-            'notification_type': notification_type,
-            'phone_number': phone_number,
-            'message': message,
-            'state': 'pending',
-            'scheduled_time': scheduled_time or fields.Datetime.now(),
-        })
-        
-        _logger.info(
-            'Created %s notification #%d for waiting list %s (customer: %s)',
-            notification_type, notification.id, waiting_list.name, waiting_list.customer_name
-        )
-        
-        # Try to send immediately instead of waiting for cron
-        try:
-            _logger.info('Attempting to send notification #%d immediately', notification.id)
-            notification.action_send()
-            _logger.info('Notification #%d sent immediately', notification.id)
-        except Exception as e:
-            _logger.warning('Failed to send notification #%d immediately, will retry via cron: %s', 
-                          notification.id, str(e))
-            # Leave it in pending state for cron to retry
+        with log_operation(_logger, 'notification.create', waiting_list=waiting_list.id, type=notification_type) as op:
+            # Create notification record
+            notification = self.create({
+                'waiting_list_id': waiting_list.id,
+                'notification_type': notification_type,
+                'phone_number': phone_number,
+                'message': message,
+                'state': 'pending',
+                'scheduled_time': scheduled_time or fields.Datetime.now(),
+            })
+            op.set(notification=notification.id)
+            
+            # Sent after commit by the notification cron (or right away when configured)
+            try:
+                notification._dispatch()
+            except Exception as e:
+                # Leave it in pending state for cron to retry
+                _logger.warning('Immediate send of notification #%d failed, will retry via cron: %s', notification.id, e)
+                op.set(status='error', error=type(e).__name__)
+            op.set(state=notification.state)
         
         return notification
     
+    def _dispatch(self):
+        """Get the queued notifications sent without blocking the host's request
+        
+        By default the notifications are only enqueued: the notification cron
+        is triggered and runs once the current transaction is committed, so
+        host actions never wait on the SMS/WhatsApp provider nor hold locks
+        meanwhile. With the "Send Notifications Immediately" setting (or when
+        the cron is missing) they are sent inline as before.
+        """
+        if not self:
+            return True
+        cron = self._get_dispatch_cron()
+        if not cron or self.env['waiting.list.settings']._get_snapshot()['send_notifications_inline']:
+            return self.action_send()
+        
+        now = fields.Datetime.now()
+        for next_attempt_at in set(self.mapped('next_attempt_at')):
+            cron._trigger(at=max(next_attempt_at or now, now))
+        return True
+    
+    @api.model
+    def _get_dispatch_cron(self):
+        """Active cron sending the queued notifications (created by the install hook)"""
+        return self.env['ir.cron'].sudo().search([
+            ('code', '=', DISPATCH_CRON_CODE),
+            ('active', '=', True),
+        ], limit=1)
+    
+    @instrumented
     def action_send(self):
-        """Send the notification immediately"""
-        for notification in self:
-            if notification.state in ('sent', 'cancelled'):
-                continue
-            
+        """Send the notification immediately
+        
+        Plain SMS notifications are sent together as one batch (see
+        _send_sms_batch), the other channels one notification at a time.
+        """
+        to_send = self.filtered(lambda n: n.state not in ('sent', 'cancelled'))
+        sms_notifications = to_send.filtered(lambda n: n.notification_type == 'sms')
+        if sms_notifications and 'sms.sms' in self.env:
+            sms_notifications._send_sms_batch()
+            to_send -= sms_notifications
+        
+        for notification in to_send:
             notification.write({
                 'state': 'processing',
                 'retry_count': notification.retry_count + 1
@@ -209,18 +310,16 @@ Thank you for waiting - {waiting_list.company_id.name}"""
                     # Send both SMS and WhatsApp - try both even if one fails
                     try:
                         notification._send_sms()
-                        _logger.info('SMS sent successfully for notification #%d', notification.id)
                     except Exception as e:
                         error_messages.append(f'SMS failed: {str(e)}')
-                        _logger.error('SMS failed for notification #%d: %s', notification.id, str(e))
+                        _logger.warning('SMS failed for notification #%d: %s', notification.id, e)
                         success = False
                     
                     try:
                         notification._send_whatsapp()
-                        _logger.info('WhatsApp sent successfully for notification #%d', notification.id)
                     except Exception as e:
                         error_messages.append(f'WhatsApp failed: {str(e)}')
-                        _logger.error('WhatsApp failed for notification #%d: %s', notification.id, str(e))
+                        _logger.warning('WhatsApp failed for notification #%d: %s', notification.id, e)
                         success = False
                     
                     # If at least one succeeded, mark as sent
@@ -240,39 +339,103 @@ Thank you for waiting - {waiting_list.company_id.name}"""
                     'error_message': ' | '.join(error_messages) if error_messages else False,
                 })
                 
-                _logger.info('Sent %s notification #%d successfully', notification.notification_type, notification.id)
+                _logger.debug('Sent %s notification #%d', notification.notification_type, notification.id)
                 
             except Exception as e:
                 error_msg = str(e)
-                _logger.error('Failed to send notification #%d: %s', notification.id, error_msg)
-                
-                # Check if we should retry
-                if notification.retry_count >= notification.max_retries:
-                    notification.write({
-                        'state': 'failed',
-                        'error_message': error_msg,
-                    })
-                else:
-                    # Reset to pending for retry
-                    notification.write({
-                        'state': 'pending',
-                        'error_message': error_msg,
-                    })
+                _logger.warning('Failed to send notification #%d (attempt %d): %s',
+                                notification.id, notification.retry_count, error_msg)
+                notification._handle_send_failure(error_msg)
         
         return True
     
+    def _handle_send_failure(self, error_msg):
+        """Fail the notifications out of retries, postpone the others
+        
+        A notification with retries left goes back to pending and is retried
+        after an exponential backoff.
+        """
+        exhausted = self.filtered(lambda n: n.retry_count >= n.max_retries)
+        exhausted.write({
+            'state': 'failed',
+            'error_message': error_msg,
+        })
+        now = fields.Datetime.now()
+        for notification in self - exhausted:
+            notification.write({
+                'state': 'pending',
+                'error_message': error_msg,
+                'next_attempt_at': now + retry_backoff(notification.retry_count),
+            })
+    
+    def _send_sms_batch(self):
+        """Send SMS notifications as one batch
+        
+        All the sms.sms records are created at once and sent together (the SMS
+        module groups them into IAP requests of its batch size), then the SMS
+        states are mapped back: the sent notifications are updated in a single
+        write, the failed ones per error.
+        """
+        with log_operation(_logger, 'sms.batch', size=len(self)) as op:
+            for retry_count, notifications in self.grouped('retry_count').items():
+                notifications.write({
+                    'state': 'processing',
+                    'retry_count': retry_count + 1,
+                })
+            
+            sms_records = self.env['sms.sms'].create([{
+                'number': notification.phone_number,
+                'body': notification.message,
+                'partner_id': notification.customer_id.id,
+            } for notification in self])
+            
+            # Link each notification to its SMS in one statement
+            self.flush_recordset(['sms_id'])
+            self.env.cr.execute("""
+                UPDATE waiting_list_notification AS notification
+                   SET sms_id = link.sms_id
+                  FROM unnest(%s::int[], %s::int[]) AS link(id, sms_id)
+                 WHERE notification.id = link.id
+            """, (self.ids, sms_records.ids))
+            self.invalidate_recordset(['sms_id'])
+            
+            try:
+                sms_records.send(unlink_failed=False, raise_exception=True)
+            except Exception as e:
+                # Provider unreachable: the whole batch is retried later
+                _logger.warning('Failed to send a batch of %d SMS: %s', len(self), e)
+                sms_records.filtered(lambda sms: sms.state == 'outgoing').write({'state': 'canceled'})
+                self._handle_send_failure(str(e))
+                op.set(sent=0, failed=len(self))
+                return False
+            
+            sent = self.browse()
+            failed = defaultdict(self.browse)
+            for notification, sms in zip(self, sms_records):
+                if sms.state in SMS_SENT_STATES:
+                    sent |= notification
+                else:
+                    failed[_('SMS failed: %s') % (sms.failure_type or sms.state)] |= notification
+            
+            sent.write({
+                'state': 'sent',
+                'sent_time': fields.Datetime.now(),
+                'error_message': False,
+            })
+            for error_msg, notifications in failed.items():
+                notifications._handle_send_failure(error_msg)
+            op.set(sent=len(sent), failed=len(self) - len(sent))
+        return True
+    
     def _send_sms(self):
         """Send SMS using Odoo SMS module"""
         self.ensure_one()
         
         # Check if SMS module is installed
-        if not hasattr(self.env['ir.model'], 'search') or \
-           not self.env['ir.model'].search([('model', '=', 'sms.sms')], limit=1):
+        if 'sms.sms' not in self.env:
             # SMS module not installed, just log the message
-            _logger.warning(
-                'SMS module not installed. Would send SMS to %s: %s',
-                self.phone_number, self.message
-            )
+            _logger.warning('SMS module not installed. Would send SMS to %s', mask_phone(self.phone_number))
+            _logger.debug('Unsent SMS body: %s', self.message)
             # For demo/testing without SMS module, we'll just mark as sent
             return True
         
@@ -292,32 +455,16 @@ Thank you for waiting - {waiting_list.company_id.name}"""
         """Send WhatsApp message using whatsapp_waitinglist module integration"""
         self.ensure_one()
         
-        _logger.info('=== _send_whatsapp called for notification #%d ===', self.id)
-        _logger.info('Notification type: %s, State: %s, Phone: %s', 
-                     self.notification_type, self.state, self.phone_number)
-        
         # Check if whatsapp_waitinglist module is installed
-        has_method = hasattr(self, 'action_send_whatsapp')
-        _logger.info('Has action_send_whatsapp method: %s', has_method)
-        
-        if has_method:
-            # Use the whatsapp_waitinglist module method
-            _logger.info('Using whatsapp_waitinglist module to send WhatsApp notification #%d', self.id)
-            try:
-                result = self.action_send_whatsapp()
-                _logger.info('action_send_whatsapp returned: %s', result)
-                return result
-            except Exception as e:
-                _logger.error('action_send_whatsapp failed: %s', str(e), exc_info=True)
-                raise
+        if hasattr(self, 'action_send_whatsapp'):
+            # Use the whatsapp_waitinglist module method (logs its own summary line)
+            return self.action_send_whatsapp()
         
         # Fallback to Odoo Enterprise WhatsApp module if whatsapp_waitinglist not installed
         # Check if WhatsApp module is installed
         if not hasattr(self.env, 'whatsapp.message'):
-            _logger.warning(
-                'WhatsApp module not installed. Would send WhatsApp to %s: %s',
-                self.phone_number, self.message
-            )
+            _logger.warning('WhatsApp module not installed. Would send WhatsApp to %s', mask_phone(self.phone_number))
+            _logger.debug('Unsent WhatsApp body: %s', self.message)
             return True
         
         # Get the default WhatsApp account
@@ -351,10 +498,8 @@ Thank you for waiting - {waiting_list.company_id.name}"""
             # Send the message
             wa_message._send()
             
-            _logger.info(
-                'WhatsApp notification sent to %s for waiting list %s',
-                self.phone_number, self.waiting_list_id.name
-            )
+            _logger.debug('WhatsApp notification sent to %s for waiting list %s',
+                          mask_phone(formatted_number), self.waiting_list_id.id)
             
             return True
             
@@ -363,24 +508,19 @@ Thank you for waiting - {waiting_list.company_id.name}"""
             raise UserError(_('Failed to send WhatsApp message: %s') % str(e))
     
     def _format_phone_for_whatsapp(self, phone_number):
-        """Format phone number for WhatsApp (remove spaces, dashes, etc.)"""
+        """Format phone number for WhatsApp in E.164 form (+<country code><number>)
+        
+        Parsed by the shared waiting.list.phone engine; numbers without
+        international prefix get the customer country code, or the company's.
+        """
         if not phone_number:
             return ''
         
-        # Remove common separators
-        formatted = phone_number.replace(' ', '').replace('-', '').replace('(', '').replace(')', '')
-        
-        # Ensure it starts with +
-        if not formatted.startswith('+'):
-            # Try to add country code if customer has country
-            if self.customer_id and self.customer_id.country_id:
-                country_code = self.customer_id.country_id.phone_code
-                if country_code and not formatted.startswith(str(country_code)):
-                    formatted = f'+{country_code}{formatted}'
-                else:
-                    formatted = f'+{formatted}'
-            else:
-                formatted = f'+{formatted}'
+        default_country_code = self.customer_id.country_id.phone_code or None
+        formatted = self.env['waiting.list.phone'].to_e164(phone_number, default_country_code)
+        if not formatted:
+            # Unparsable number: keep the digits as they are
+            formatted = '+' + ''.join(filter(str.isdigit, phone_number))
         
         return formatted
     
@@ -397,10 +537,7 @@ Thank you for waiting - {waiting_list.company_id.name}"""
                 subject=_('Waiting List - Table Ready'),
             )
         
-        _logger.info(
-            'Phone call notification logged for %s: %s',
-            self.phone_number, self.message
-        )
+        _logger.debug('Phone call notification logged for %s', mask_phone(self.phone_number))
         
         return True
     
@@ -417,30 +554,102 @@ Thank you for waiting - {waiting_list.company_id.name}"""
             'state': 'pending',
             'retry_count': 0,
             'error_message': False,
+            'next_attempt_at': fields.Datetime.now(),
         })
         return True
     
     @api.model
-    def _cron_process_pending_notifications(self):
-        """Scheduled action to process pending notifications"""
-        # Find notifications that should be sent now
-        pending_notifications = self.search([
-            ('state', '=', 'pending'),
-            ('scheduled_time', '<=', fields.Datetime.now()),
-        ], limit=100)  # Process in batches of 100
-        
-        _logger.info('=== Cron: Processing pending notifications ===')
-        _logger.info('Found %d pending notifications to process', len(pending_notifications))
-        
-        if pending_notifications:
-            for notif in pending_notifications:
-                _logger.info('Processing notification #%d: type=%s, phone=%s', 
-                           notif.id, notif.notification_type, notif.phone_number)
-            pending_notifications.action_send()
+    def _claim_pending(self, limit, notification_types=None, company_id=None):
+        """Atomically claim a batch of due pending notifications for this worker
+        
+        Only notifications whose next attempt is due are taken, oldest first,
+        along the partial index on pending rows. The batch is moved from
+        pending to processing in one UPDATE; rows locked by another worker's
+        claim are skipped (FOR UPDATE SKIP LOCKED),
+        so concurrent crons drain the queue without double sends or lock
+        waits. Returns the claimed notifications.
+        """
+        self.flush_model(['state', 'next_attempt_at', 'notification_type', 'company_id'])
+        conditions = ["state = 'pending'", "next_attempt_at <= NOW() AT TIME ZONE 'UTC'"]
+        params = {'token': uuid.uuid4().hex, 'limit': limit}
+        if notification_types:
+            conditions.append("notification_type = ANY(%(types)s)")
+            params['types'] = list(notification_types)
+        if company_id:
+            conditions.append("company_id = %(company_id)s")
+            params['company_id'] = company_id
+        
+        self.env.cr.execute(f"""
+            UPDATE waiting_list_notification
+               SET state = 'processing',
+                   claim_token = %(token)s,
+                   claimed_at = NOW() AT TIME ZONE 'UTC'
+             WHERE id IN (
+                    SELECT id
+                      FROM waiting_list_notification
+                     WHERE {' AND '.join(conditions)}
+                  ORDER BY next_attempt_at, id
+                     LIMIT %(limit)s
+                       FOR UPDATE SKIP LOCKED
+                   )
+         RETURNING id
+        """, params)
+        claimed = self.browse([row[0] for row in self.env.cr.fetchall()])
+        self.invalidate_model(['state', 'claim_token', 'claimed_at'])
+        return claimed
+    
+    @api.model
+    def _release_stale_claims(self):
+        """Put notifications claimed by a crashed worker back to pending"""
+        self.flush_model(['state', 'claimed_at'])
+        self.env.cr.execute("""
+            UPDATE waiting_list_notification
+               SET state = 'pending',
+                   claim_token = NULL
+             WHERE id IN (
+                    SELECT id
+                      FROM waiting_list_notification
+                     WHERE state = 'processing'
+                       AND claimed_at < NOW() AT TIME ZONE 'UTC' - make_interval(mins => %s)
+                       FOR UPDATE SKIP LOCKED
+                   )
+        """, (NOTIFICATION_CLAIM_TIMEOUT,))
+        released = self.env.cr.rowcount
+        if released:
+            self.invalidate_model(['state', 'claim_token'])
+            _logger.warning('Released %d notifications claimed more than %d minutes ago',
+                            released, NOTIFICATION_CLAIM_TIMEOUT)
+        return released
+    
+    @api.model
+    @instrumented
+    def _cron_process_pending_notifications(self, company_id=None, limit=100):
+        """Scheduled action to process pending notifications
+        
+        Claims its batch with _claim_pending(), so several cron workers (or one
+        cron per company, with company_id) can run at the same time.
+        """
+        with log_operation(_logger, 'notification.cron', company=company_id) as op:
+            self._release_stale_claims()
+            pending_notifications = self._claim_pending(limit, company_id=company_id)
+            
+            if _logger.isEnabledFor(logging.DEBUG):
+                _logger.debug('Processing notifications %s', pending_notifications.ids)
+            if pending_notifications:
+                pending_notifications.action_send()
+            
+            states = pending_notifications.mapped('state')
+            op.set(
+                processed=len(pending_notifications),
+                sent=states.count('sent'),
+                retry=states.count('pending'),
+                failed=states.count('failed'),
+            )
         
         return True
     
     @api.model
+    @instrumented
     def _cron_cleanup_old_notifications(self):
         """Clean up old sent/cancelled notifications"""
         # Delete notifications older than 30 days
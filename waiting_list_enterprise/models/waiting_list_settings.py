@@ -0,0 +1,28 @@
+# -*- coding: utf-8 -*-
+
+from odoo import models, api
+
+
+class WaitingListSettings(models.AbstractModel):
+    """Add the wait time estimation and notification parameters to the settings snapshot"""
+
+    _inherit = 'waiting.list.settings'
+
+    @api.model
+    def _get_settings_spec(self):
+        spec = super()._get_settings_spec()
+        spec.update({
+            'historical_days': ('waiting_list_enterprise.historical_days', int, 7),
+            'hour_tolerance': ('waiting_list_enterprise.hour_tolerance', int, 1),
+            'queue_time_per_person': ('waiting_list_enterprise.queue_time_per_person', int, 1),
+            'simple_time_per_person': ('waiting_list_enterprise.simple_time_per_person', int, 1),
+            'minimum_wait_time': ('waiting_list_enterprise.minimum_wait_time', int, 10),
+            'maximum_wait_time': ('waiting_list_enterprise.maximum_wait_time', int, 60),
+            'use_table_turnover': ('waiting_list_enterprise.use_table_turnover', bool, False),
+            'large_party_threshold': ('waiting_list_enterprise.large_party_threshold', int, 6),
+            'large_party_multiplier': ('waiting_list_enterprise.large_party_multiplier', float, 1.5),
+            'medium_party_threshold': ('waiting_list_enterprise.medium_party_threshold', int, 4),
+            'medium_party_multiplier': ('waiting_list_enterprise.medium_party_multiplier', float, 1.2),
+            'send_notifications_inline': ('waiting_list_enterprise.send_notifications_inline', bool, False),
+        })
+        return spec
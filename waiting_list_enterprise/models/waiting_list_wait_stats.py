@@ -0,0 +1,415 @@
+# -*- coding: utf-8 -*-
+
+from odoo import models, fields, api
+from bisect import bisect_right
+from collections import defaultdict
+from datetime import timedelta
+import json
+import logging
+import math
+
+_logger = logging.getLogger(__name__)
+
+# Fixed wait time histogram bin edges (minutes). Bin i covers [edge i, edge i+1);
+# waits beyond the last edge are counted in the last bin.
+WAIT_HISTOGRAM_EDGES = (0, 5, 10, 15, 20, 25, 30, 40, 50, 60, 75, 90, 120, 180, 240)
+WAIT_HISTOGRAM_BINS = len(WAIT_HISTOGRAM_EDGES) - 1
+
+
+def wait_histogram_bin(wait):
+    """Index of the histogram bin a wait time (minutes) falls into"""
+    return max(0, min(bisect_right(WAIT_HISTOGRAM_EDGES, wait) - 1, WAIT_HISTOGRAM_BINS - 1))
+
+
+def add_wait_increment(increments, company_id, bucket_start, party_size, wait, sign=1):
+    """Add (sign=1) or subtract (sign=-1) one wait time to the increments of its bucket
+
+    increments maps (company_id, bucket_start, party_size) to
+    [count, total, total of squares, histogram].
+    """
+    increment = increments[(company_id, bucket_start, party_size)]
+    increment[0] += sign
+    increment[1] += sign * wait
+    increment[2] += sign * wait * wait
+    increment[3][wait_histogram_bin(wait)] += sign
+
+
+def wait_histogram_quantile(histogram, quantile):
+    """Approximate a quantile (0-1) of a wait time histogram, interpolating inside the bin"""
+    total = sum(histogram)
+    if not total:
+        return 0.0
+    target = quantile * total
+    cumulative = 0
+    for index, count in enumerate(histogram):
+        if count and cumulative + count >= target:
+            lower, upper = WAIT_HISTOGRAM_EDGES[index], WAIT_HISTOGRAM_EDGES[index + 1]
+            return lower + (target - cumulative) / count * (upper - lower)
+        cumulative += count
+    return float(WAIT_HISTOGRAM_EDGES[-1])
+
+
+class WaitingListWaitStats(models.Model):
+    """Running wait time statistics per company, arrival hour and party size
+
+    One row holds count, sum and sum of squares of the actual wait times of all
+    parties of a given size that arrived during the same hour. Rows are updated
+    in place when a party is seated, so estimations read a handful of buckets
+    instead of scanning the waiting list history.
+    """
+
+    _name = 'waiting.list.wait.stats'
+    _description = 'Waiting List Wait Time Statistics'
+    _order = 'bucket_start desc, party_size asc'
+    _rec_name = 'bucket_start'
+
+    company_id = fields.Many2one(
+        'res.company',
+        string='Company',
+        required=True,
+        ondelete='cascade',
+        index=True
+    )
+
+    bucket_start = fields.Datetime(
+        string='Arrival Hour',
+        required=True,
+        help='Start of the hour during which the parties arrived (UTC)'
+    )
+
+    weekday = fields.Integer(
+        string='Day of Week',
+        required=True,
+        help='Day of week of the arrival hour (0=Monday, 6=Sunday)'
+    )
+
+    hour = fields.Integer(
+        string='Hour of Day',
+        required=True,
+        help='Hour of day of the arrival hour (0-23, UTC)'
+    )
+
+    party_size = fields.Integer(
+        string='Number of Guests',
+        required=True
+    )
+
+    entry_count = fields.Integer(
+        string='Seated Parties',
+        default=0,
+        help='Number of seated parties aggregated in this bucket'
+    )
+
+    total_wait = fields.Float(
+        string='Total Wait (minutes)',
+        default=0.0,
+        help='Sum of actual wait times in this bucket'
+    )
+
+    total_wait_sq = fields.Float(
+        string='Sum of Squared Waits',
+        default=0.0,
+        help='Sum of squared actual wait times, used for the standard deviation'
+    )
+
+    wait_histogram = fields.Json(
+        string='Wait Histogram',
+        help='Number of seated parties per fixed wait time bin (see WAIT_HISTOGRAM_EDGES). '
+             'Histograms of several buckets merge by adding them bin by bin.'
+    )
+
+    average_wait = fields.Float(
+        string='Average Wait (minutes)',
+        compute='_compute_wait_statistics'
+    )
+
+    wait_stddev = fields.Float(
+        string='Wait Std. Deviation (minutes)',
+        compute='_compute_wait_statistics'
+    )
+
+    _sql_constraints = [
+        ('bucket_uniq', 'unique(company_id, bucket_start, party_size)',
+         'Only one statistics bucket per company, arrival hour and party size is allowed.'),
+    ]
+
+    @api.depends('entry_count', 'total_wait', 'total_wait_sq')
+    def _compute_wait_statistics(self):
+        """Compute mean and standard deviation from the running sums"""
+        for stats in self:
+            if stats.entry_count:
+                mean = stats.total_wait / stats.entry_count
+                variance = max(stats.total_wait_sq / stats.entry_count - mean * mean, 0.0)
+                stats.average_wait = mean
+                stats.wait_stddev = math.sqrt(variance)
+            else:
+                stats.average_wait = 0.0
+                stats.wait_stddev = 0.0
+
+    @api.model
+    def _sync_wait_times(self, entries, removed=False):
+        """Bring the buckets in line with the current wait times of entries
+
+        Every entry records the wait it is counted with (wait_stats_wait, with
+        the company and party size of its bucket): the old contribution is
+        subtracted and the new one added, so seating an entry again or
+        correcting its seated time never counts it twice, and un-seating,
+        cancelling or deleting it (removed=True) takes it out again.
+        """
+        increments = defaultdict(lambda: [0, 0.0, 0.0, [0] * WAIT_HISTOGRAM_BINS])
+        contributions = {}
+        for entry in entries:
+            if not entry.create_date:
+                continue
+            old = new = None
+            if entry.wait_stats_wait:
+                old = (entry.wait_stats_company_id.id, entry.wait_stats_party_size, entry.wait_stats_wait)
+            if not removed and entry.status in ('seated', 'done') and entry.actual_wait_time > 0:
+                new = (entry.company_id.id, entry.party_size, entry.actual_wait_time)
+            if old == new:
+                continue
+            bucket_start = entry.create_date.replace(minute=0, second=0, microsecond=0)
+            if old:
+                add_wait_increment(increments, old[0], bucket_start, old[1], old[2], sign=-1)
+            if new:
+                add_wait_increment(increments, new[0], bucket_start, new[1], new[2])
+            contributions[entry] = new
+
+        if not increments:
+            return False
+
+        self._apply_increments(increments)
+        if not removed:
+            for entry, new in contributions.items():
+                entry.write({
+                    'wait_stats_company_id': new[0] if new else False,
+                    'wait_stats_party_size': new[1] if new else 0,
+                    'wait_stats_wait': new[2] if new else 0.0,
+                })
+        return True
+
+    def _apply_increments(self, increments):
+        """Add signed increments to their buckets
+
+        Each bucket is upserted with a single INSERT ... ON CONFLICT, so the
+        cost does not depend on how much history has been collected.
+        """
+        self.flush_model()
+        for (company_id, bucket_start, party_size), (count, total, total_sq, histogram) in increments.items():
+            # Histograms are merged bin by bin, a fixed number of additions
+            self.env.cr.execute("""
+                INSERT INTO waiting_list_wait_stats
+                       (company_id, bucket_start, weekday, hour, party_size,
+                        entry_count, total_wait, total_wait_sq, wait_histogram,
+                        create_uid, create_date, write_uid, write_date)
+                VALUES (%(company_id)s, %(bucket_start)s, %(weekday)s, %(hour)s, %(party_size)s,
+                        %(count)s, %(total)s, %(total_sq)s, %(histogram)s::jsonb,
+                        %(uid)s, NOW() AT TIME ZONE 'UTC', %(uid)s, NOW() AT TIME ZONE 'UTC')
+                ON CONFLICT (company_id, bucket_start, party_size) DO UPDATE
+                   SET entry_count = waiting_list_wait_stats.entry_count + EXCLUDED.entry_count,
+                       total_wait = waiting_list_wait_stats.total_wait + EXCLUDED.total_wait,
+                       total_wait_sq = waiting_list_wait_stats.total_wait_sq + EXCLUDED.total_wait_sq,
+                       wait_histogram = (
+                           SELECT jsonb_agg(COALESCE(old_bin.cnt::int, 0) + COALESCE(new_bin.cnt::int, 0)
+                                            ORDER BY COALESCE(old_bin.idx, new_bin.idx))
+                             FROM jsonb_array_elements_text(COALESCE(waiting_list_wait_stats.wait_histogram, '[]'::jsonb))
+                                  WITH ORDINALITY AS old_bin(cnt, idx)
+                        FULL JOIN jsonb_array_elements_text(EXCLUDED.wait_histogram)
+                                  WITH ORDINALITY AS new_bin(cnt, idx)
+                                  ON old_bin.idx = new_bin.idx
+                       ),
+                       write_uid = EXCLUDED.write_uid,
+                       write_date = EXCLUDED.write_date
+            """, {
+                'company_id': company_id,
+                'bucket_start': bucket_start,
+                'weekday': bucket_start.weekday(),
+                'hour': bucket_start.hour,
+                'party_size': party_size,
+                'count': count,
+                'total': total,
+                'total_sq': total_sq,
+                'histogram': json.dumps(histogram),
+                'uid': self.env.uid,
+            })
+        self.invalidate_model()
+        return True
+
+    @api.model
+    def _rebuild_from_history(self, company_ids=None):
+        """Rebuild all buckets from the seated/done waiting list entries
+
+        Used as backfill after installation or upgrade, and to repair the
+        statistics after historical entries were edited manually.
+        Returns the number of buckets created.
+        """
+        self.env['waiting.list'].flush_model([
+            'status', 'create_date', 'actual_wait_time', 'party_size', 'company_id',
+        ])
+        self.flush_model()
+
+        company_filter = ''
+        params = {'edges': list(WAIT_HISTOGRAM_EDGES), 'last_bin': WAIT_HISTOGRAM_BINS - 1}
+        if company_ids:
+            company_filter = 'AND company_id IN %(company_ids)s'
+            params['company_ids'] = tuple(company_ids)
+
+        self.env.cr.execute(f"""
+            DELETE FROM waiting_list_wait_stats
+             WHERE TRUE {company_filter}
+        """, params)
+        # One row per bucket and histogram bin, folded into buckets below
+        self.env.cr.execute(f"""
+            SELECT company_id,
+                   DATE_TRUNC('hour', create_date) AS bucket_start,
+                   party_size,
+                   LEAST(WIDTH_BUCKET(actual_wait_time, %(edges)s::float8[]) - 1, %(last_bin)s) AS bin,
+                   COUNT(*) AS entry_count,
+                   SUM(actual_wait_time) AS total_wait,
+                   SUM(actual_wait_time * actual_wait_time) AS total_wait_sq
+              FROM waiting_list
+             WHERE status IN ('seated', 'done')
+               AND create_date IS NOT NULL
+               AND actual_wait_time > 0
+               {company_filter}
+          GROUP BY 1, 2, 3, 4
+        """, params)
+
+        buckets = {}
+        for row in self.env.cr.dictfetchall():
+            key = (row['company_id'], row['bucket_start'], row['party_size'])
+            if key not in buckets:
+                buckets[key] = {
+                    'company_id': row['company_id'],
+                    'bucket_start': row['bucket_start'],
+                    'weekday': row['bucket_start'].weekday(),
+                    'hour': row['bucket_start'].hour,
+                    'party_size': row['party_size'],
+                    'entry_count': 0,
+                    'total_wait': 0.0,
+                    'total_wait_sq': 0.0,
+                    'wait_histogram': [0] * WAIT_HISTOGRAM_BINS,
+                }
+            bucket = buckets[key]
+            bucket['entry_count'] += row['entry_count']
+            bucket['total_wait'] += row['total_wait']
+            bucket['total_wait_sq'] += row['total_wait_sq']
+            bucket['wait_histogram'][row['bin']] += row['entry_count']
+
+        self.create(list(buckets.values()))
+        bucket_count = len(buckets)
+
+        # What every entry is now counted with, for the incremental updates
+        self.env.cr.execute(f"""
+            UPDATE waiting_list
+               SET (wait_stats_wait, wait_stats_company_id, wait_stats_party_size) = (
+                       CASE WHEN counted THEN actual_wait_time ELSE 0 END,
+                       CASE WHEN counted THEN company_id END,
+                       CASE WHEN counted THEN party_size ELSE 0 END
+                   )
+              FROM (
+                    SELECT id AS entry_id,
+                           status IN ('seated', 'done') AND create_date IS NOT NULL
+                           AND actual_wait_time > 0 AS counted
+                      FROM waiting_list
+                     WHERE TRUE {company_filter}
+                   ) AS entry
+             WHERE waiting_list.id = entry.entry_id
+        """, params)
+        self.env['waiting.list'].invalidate_model(['wait_stats_wait', 'wait_stats_company_id', 'wait_stats_party_size'])
+
+        _logger.info('Rebuilt %d wait time statistics buckets', bucket_count)
+        return bucket_count
+
+    @api.model
+    def _get_wait_buckets(self, company_id, party_size, entry_time, historical_days, hour_tolerance):
+        """Aggregate the buckets of the lookback window by match criteria
+
+        The bucket of the arrival hour also holds the waits of the parties
+        that arrived after the entry, so that hour is read from the waiting
+        list history instead, up to the arrival time (a few entries along the
+        company and creation date index).
+
+        Returns a list of dicts with keys same_party, same_day, same_hour,
+        entry_count, total_wait and histogram (at most eight rows); the
+        histogram of each row is the bin-wise sum of its buckets.
+        """
+        entry_bucket = entry_time.replace(minute=0, second=0, microsecond=0)
+        lookback_bucket = entry_bucket - timedelta(days=historical_days)
+
+        self.flush_model()
+        self.env.cr.execute("""
+            WITH matched AS (
+                SELECT party_size = %(party_size)s AS same_party,
+                       weekday = %(day_of_week)s AS same_day,
+                       ABS(hour - %(hour_of_day)s) <= %(hour_tolerance)s AS same_hour,
+                       entry_count, total_wait, wait_histogram
+                  FROM waiting_list_wait_stats
+                 WHERE company_id = %(company_id)s
+                   AND bucket_start >= %(lookback)s
+                   AND bucket_start < %(entry_bucket)s
+            ), bins AS (
+                SELECT same_party, same_day, same_hour,
+                       bin.idx - 1 AS bin, SUM(bin.cnt::int) AS bin_count
+                  FROM matched
+            CROSS JOIN LATERAL jsonb_array_elements_text(COALESCE(wait_histogram, '[]'::jsonb))
+                       WITH ORDINALITY AS bin(cnt, idx)
+              GROUP BY 1, 2, 3, 4
+            )
+            SELECT matched.same_party, matched.same_day, matched.same_hour,
+                   SUM(matched.entry_count) AS entry_count,
+                   SUM(matched.total_wait) AS total_wait,
+                   (SELECT jsonb_object_agg(bins.bin, bins.bin_count)
+                      FROM bins
+                     WHERE bins.same_party = matched.same_party
+                       AND bins.same_day = matched.same_day
+                       AND bins.same_hour = matched.same_hour) AS histogram
+              FROM matched
+          GROUP BY 1, 2, 3
+        """, {
+            'party_size': party_size,
+            'day_of_week': entry_time.weekday(),
+            'hour_of_day': entry_time.hour,
+            'hour_tolerance': hour_tolerance,
+            'company_id': company_id,
+            'lookback': lookback_bucket,
+            'entry_bucket': entry_bucket,
+        })
+        buckets = self.env.cr.dictfetchall()
+        for bucket in buckets:
+            histogram = [0] * WAIT_HISTOGRAM_BINS
+            for index, count in (bucket['histogram'] or {}).items():
+                histogram[int(index)] = count
+            bucket['histogram'] = histogram
+
+        rows = {(bucket['same_party'], bucket['same_day'], bucket['same_hour']): bucket for bucket in buckets}
+        self.env['waiting.list'].flush_model(['company_id', 'create_date', 'status', 'actual_wait_time', 'party_size'])
+        self.env.cr.execute("""
+            SELECT party_size = %(party_size)s AS same_party, actual_wait_time
+              FROM waiting_list
+             WHERE company_id = %(company_id)s
+               AND create_date >= %(entry_bucket)s
+               AND create_date < %(entry_time)s
+               AND status IN ('seated', 'done')
+               AND actual_wait_time > 0
+        """, {
+            'party_size': party_size,
+            'company_id': company_id,
+            'entry_bucket': entry_bucket,
+            'entry_time': entry_time,
+        })
+        for same_party, wait in self.env.cr.fetchall():
+            bucket = rows.get((same_party, True, True))
+            if bucket is None:
+                bucket = rows[(same_party, True, True)] = {
+                    'same_party': same_party,
+                    'same_day': True,
+                    'same_hour': True,
+                    'entry_count': 0,
+                    'total_wait': 0.0,
+                    'histogram': [0] * WAIT_HISTOGRAM_BINS,
+                }
+            bucket['entry_count'] += 1
+            bucket['total_wait'] += wait
+            bucket['histogram'][wait_histogram_bin(wait)] += 1
+        return list(rows.values())
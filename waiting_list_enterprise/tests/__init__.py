@@ -0,0 +1,7 @@
+# -*- coding: utf-8 -*-
+
+from . import test_notification_claim
+from . import test_notification_retry
+from . import test_sms_batch
+from . import test_wait_histogram
+from . import test_wait_stats
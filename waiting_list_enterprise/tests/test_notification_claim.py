@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+
+from datetime import timedelta
+
+from odoo import fields
+from odoo.tests.common import TransactionCase
+
+
+class TestNotificationClaim(TransactionCase):
+
+    def setUp(self):
+        super(TestNotificationClaim, self).setUp()
+        self.Notification = self.env['waiting.list.notification']
+        self.entry = self.env['waiting.list'].create({
+            'customer_name': 'Notification Customer',
+            'customer_mobile': '0507654322',
+            'party_size': 2,
+            'auto_send_queue_notification': False,
+        })
+        # Only the notifications of the test are pending
+        self.Notification.search([('state', '=', 'pending')]).write({'state': 'cancelled'})
+
+    def _create_notification(self, notification_type='sms', minutes=-1):
+        return self.Notification.create({
+            'waiting_list_id': self.entry.id,
+            'notification_type': notification_type,
+            'phone_number': '+971507654322',
+            'message': 'Your table is ready',
+            'scheduled_time': fields.Datetime.now() + timedelta(minutes=minutes),
+        })
+
+    def test_claim_pending(self):
+        """Test only due notifications of the requested types are claimed, once"""
+        due = self._create_notification('sms', minutes=-5)
+        later = self._create_notification('sms', minutes=60)
+        other_type = self._create_notification('call', minutes=-5)
+        
+        claimed = self.Notification._claim_pending(10, notification_types=['sms'])
+        self.assertEqual(claimed, due)
+        self.assertEqual(due.state, 'processing')
+        self.assertTrue(due.claim_token)
+        self.assertTrue(due.claimed_at)
+        self.assertEqual(later.state, 'pending')
+        self.assertEqual(other_type.state, 'pending')
+        
+        # Already claimed: never handed out twice
+        self.assertFalse(self.Notification._claim_pending(10, notification_types=['sms']))
+
+    def test_claim_pending_oldest_first(self):
+        """Test the claim takes the notifications due first, up to the limit"""
+        first = self._create_notification(minutes=-30)
+        second = self._create_notification(minutes=-20)
+        third = self._create_notification(minutes=-10)
+        
+        self.assertEqual(self.Notification._claim_pending(2), first | second)
+        self.assertEqual(self.Notification._claim_pending(2), third)
@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+
+from datetime import timedelta
+
+from odoo import fields
+from odoo.tests.common import TransactionCase
+
+from odoo.addons.waiting_list_enterprise.models.waiting_list_notification import (
+    RETRY_BACKOFF_MAX, retry_backoff,
+)
+
+
+class TestNotificationRetry(TransactionCase):
+
+    def setUp(self):
+        super(TestNotificationRetry, self).setUp()
+        self.Notification = self.env['waiting.list.notification']
+        self.entry = self.env['waiting.list'].create({
+            'customer_name': 'Notification Customer',
+            'customer_mobile': '0507654322',
+            'party_size': 2,
+            'auto_send_queue_notification': False,
+        })
+        # Only the notifications of the test are pending
+        self.Notification.search([('state', '=', 'pending')]).write({'state': 'cancelled'})
+
+    def test_retry_backoff(self):
+        """Test the retry delay doubles per attempt, with equal jitter, up to the cap"""
+        for attempt, delay in ((1, 1), (2, 2), (3, 4), (4, 8), (20, RETRY_BACKOFF_MAX)):
+            for _i in range(10):
+                backoff = retry_backoff(attempt)
+                self.assertGreaterEqual(backoff, timedelta(minutes=delay / 2))
+                self.assertLessEqual(backoff, timedelta(minutes=delay))
+        self.assertLessEqual(retry_backoff(0), timedelta(minutes=1))
+
+    def test_next_attempt_defaults_to_schedule(self):
+        """Test a new notification is due at its scheduled time"""
+        scheduled_time = fields.Datetime.now() - timedelta(minutes=5)
+        notification = self.Notification.create({
+            'waiting_list_id': self.entry.id,
+            'notification_type': 'sms',
+            'phone_number': '+971507654322',
+            'message': 'Your table is ready',
+            'scheduled_time': scheduled_time,
+        })
+        self.assertEqual(notification.next_attempt_at, scheduled_time)
+
+    def test_claim_skips_postponed(self):
+        """Test a notification postponed after a failed attempt is only claimed once due again"""
+        notification = self.Notification.create({
+            'waiting_list_id': self.entry.id,
+            'notification_type': 'sms',
+            'phone_number': '+971507654322',
+            'message': 'Your table is ready',
+            'scheduled_time': fields.Datetime.now() - timedelta(minutes=5),
+        })
+        notification.next_attempt_at = fields.Datetime.now() + retry_backoff(1)
+        self.assertFalse(self.Notification._claim_pending(10))
+        
+        notification.next_attempt_at = fields.Datetime.now() - timedelta(minutes=1)
+        self.assertEqual(self.Notification._claim_pending(10), notification)
@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+
+from unittest.mock import patch
+
+from odoo import fields
+from odoo.tests.common import TransactionCase
+
+
+class TestSmsBatch(TransactionCase):
+
+    def setUp(self):
+        super(TestSmsBatch, self).setUp()
+        self.Notification = self.env['waiting.list.notification']
+        self.entry = self.env['waiting.list'].create({
+            'customer_name': 'Notification Customer',
+            'customer_mobile': '0507654322',
+            'party_size': 2,
+            'auto_send_queue_notification': False,
+        })
+
+    def _create_notification(self):
+        return self.Notification.create({
+            'waiting_list_id': self.entry.id,
+            'notification_type': 'sms',
+            'phone_number': '+971507654322',
+            'message': 'Your table is ready',
+        })
+
+    def test_sms_batch_states(self):
+        """Test the SMS states of a batch are mapped back onto the notifications"""
+        delivered = self._create_notification()
+        rejected = self._create_notification()
+        notifications = delivered | rejected
+        
+        def send(sms_records, *args, **kwargs):
+            sms_records[0].state = 'pending'
+            sms_records[1].write({'state': 'error', 'failure_type': 'sms_number_format'})
+        
+        with patch.object(type(self.env['sms.sms']), 'send', send):
+            self.assertTrue(notifications._send_sms_batch())
+        
+        self.assertEqual(delivered.sms_id.number, '+971507654322')
+        self.assertEqual(delivered.state, 'sent')
+        self.assertTrue(delivered.sent_time)
+        self.assertFalse(delivered.error_message)
+        # Retries left: back to pending after the backoff
+        self.assertEqual(rejected.state, 'pending')
+        self.assertEqual(rejected.retry_count, 1)
+        self.assertIn('sms_number_format', rejected.error_message)
+        self.assertGreater(rejected.next_attempt_at, fields.Datetime.now())
+
+    def test_sms_batch_provider_error(self):
+        """Test the whole batch is retried later when the provider cannot be reached"""
+        notifications = self._create_notification() | self._create_notification()
+        
+        def send(sms_records, *args, **kwargs):
+            raise ConnectionError('Provider unreachable')
+        
+        with patch.object(type(self.env['sms.sms']), 'send', send):
+            self.assertFalse(notifications._send_sms_batch())
+        
+        self.assertEqual(set(notifications.mapped('state')), {'pending'})
+        self.assertEqual(set(notifications.mapped('sms_id.state')), {'canceled'})
+        self.assertIn('Provider unreachable', notifications[0].error_message)
+
+    def test_sms_batch_retries_exhausted(self):
+        """Test a notification out of retries fails instead of going back to pending"""
+        notification = self._create_notification()
+        notification.write({'retry_count': notification.max_retries - 1})
+        
+        def send(sms_records, *args, **kwargs):
+            sms_records.write({'state': 'error', 'failure_type': 'sms_server'})
+        
+        with patch.object(type(self.env['sms.sms']), 'send', send):
+            notification._send_sms_batch()
+        
+        self.assertEqual(notification.state, 'failed')
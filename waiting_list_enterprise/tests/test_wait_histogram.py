@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+
+from odoo.tests.common import TransactionCase
+
+from odoo.addons.waiting_list_enterprise.models.waiting_list_wait_stats import (
+    WAIT_HISTOGRAM_BINS, WAIT_HISTOGRAM_EDGES, wait_histogram_bin, wait_histogram_quantile,
+)
+
+
+class TestWaitHistogram(TransactionCase):
+
+    def _histogram(self, *waits):
+        histogram = [0] * WAIT_HISTOGRAM_BINS
+        for wait in waits:
+            histogram[wait_histogram_bin(wait)] += 1
+        return histogram
+
+    def test_histogram_bins(self):
+        """Test wait times fall into their bin, out of range ones into the first or last"""
+        self.assertEqual(wait_histogram_bin(0), 0)
+        self.assertEqual(wait_histogram_bin(4.9), 0)
+        self.assertEqual(wait_histogram_bin(5), 1)
+        self.assertEqual(wait_histogram_bin(-3), 0)
+        self.assertEqual(wait_histogram_bin(1000), WAIT_HISTOGRAM_BINS - 1)
+
+    def test_quantile_empty(self):
+        """Test the quantile of an empty histogram is zero"""
+        self.assertEqual(wait_histogram_quantile([0] * WAIT_HISTOGRAM_BINS, 0.5), 0.0)
+
+    def test_quantile_interpolation(self):
+        """Test quantiles are interpolated linearly inside their bin"""
+        # Four waits in the 10-15 minutes bin
+        histogram = self._histogram(11, 12, 13, 14)
+        self.assertAlmostEqual(wait_histogram_quantile(histogram, 0.5), 12.5)
+        self.assertAlmostEqual(wait_histogram_quantile(histogram, 1.0), 15.0)
+        self.assertAlmostEqual(wait_histogram_quantile(histogram, 0.25), 11.25)
+
+    def test_quantile_across_bins(self):
+        """Test the quantile lands in the bin reaching the target count"""
+        # Two waits in 0-5, two in 20-25
+        histogram = self._histogram(1, 2, 21, 22)
+        self.assertAlmostEqual(wait_histogram_quantile(histogram, 0.5), 5.0)
+        self.assertAlmostEqual(wait_histogram_quantile(histogram, 0.75), 22.5)
+        self.assertAlmostEqual(wait_histogram_quantile(histogram, 0.9), 24.0)
+
+    def test_quantile_last_bin(self):
+        """Test the quantile stays within the histogram range"""
+        histogram = self._histogram(500)
+        self.assertLessEqual(wait_histogram_quantile(histogram, 0.95), WAIT_HISTOGRAM_EDGES[-1])
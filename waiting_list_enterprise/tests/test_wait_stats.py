@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+
+from datetime import timedelta
+
+from odoo.tests.common import TransactionCase
+
+
+class TestWaitStats(TransactionCase):
+
+    def setUp(self):
+        super(TestWaitStats, self).setUp()
+        self.WaitingList = self.env['waiting.list']
+        self.WaitStats = self.env['waiting.list.wait.stats']
+        self.party_size = 7
+
+    def _create_entry(self):
+        return self.WaitingList.create({
+            'customer_name': 'Wait Stats Customer',
+            'customer_mobile': '0507654321',
+            'party_size': self.party_size,
+            'auto_send_queue_notification': False,
+        })
+
+    def _seat(self, entry, minutes):
+        entry.write({
+            'status': 'seated',
+            'seated_time': entry.create_date + timedelta(minutes=minutes),
+        })
+
+    def _bucket(self, entry):
+        return self.WaitStats.search([
+            ('company_id', '=', entry.company_id.id),
+            ('bucket_start', '=', entry.create_date.replace(minute=0, second=0, microsecond=0)),
+            ('party_size', '=', self.party_size),
+        ])
+
+    def test_seating_adds_wait_once(self):
+        """Test seating an entry upserts its bucket, and seating it again replaces the wait"""
+        entry = self._create_entry()
+        self._seat(entry, 20)
+        bucket = self._bucket(entry)
+        self.assertEqual(bucket.entry_count, 1)
+        self.assertAlmostEqual(bucket.total_wait, 20.0)
+        self.assertAlmostEqual(entry.wait_stats_wait, 20.0)
+
+        self._seat(entry, 30)
+        bucket.invalidate_recordset()
+        self.assertEqual(bucket.entry_count, 1)
+        self.assertAlmostEqual(bucket.total_wait, 30.0)
+        self.assertAlmostEqual(bucket.total_wait_sq, 900.0)
+        self.assertEqual(sum(bucket.wait_histogram), 1)
+
+    def test_second_entry_same_bucket(self):
+        """Test two seated entries of the same hour share one bucket"""
+        first = self._create_entry()
+        second = self._create_entry()
+        self._seat(first, 10)
+        self._seat(second, 20)
+        bucket = self._bucket(first)
+        self.assertEqual(len(bucket), 1)
+        self.assertEqual(bucket.entry_count, 2)
+        self.assertAlmostEqual(bucket.average_wait, 15.0)
+
+    def test_cancel_and_unlink_subtract_wait(self):
+        """Test un-seating and deleting entries take their wait out of the bucket"""
+        cancelled = self._create_entry()
+        deleted = self._create_entry()
+        self._seat(cancelled, 10)
+        self._seat(deleted, 20)
+        bucket = self._bucket(cancelled)
+
+        cancelled.write({'status': 'cancelled'})
+        bucket.invalidate_recordset()
+        self.assertEqual(bucket.entry_count, 1)
+        self.assertAlmostEqual(bucket.total_wait, 20.0)
+        self.assertFalse(cancelled.wait_stats_wait)
+
+        deleted.unlink()
+        bucket.invalidate_recordset()
+        self.assertEqual(bucket.entry_count, 0)
+        self.assertAlmostEqual(bucket.total_wait, 0.0)
+
+    def test_wait_buckets_exclude_later_arrivals(self):
+        """Test the arrival hour only counts the waits of the parties that arrived earlier"""
+        earlier = self._create_entry()
+        later = self._create_entry()
+        self._seat(earlier, 10)
+        self._seat(later, 30)
+        hour = earlier.create_date.replace(minute=0, second=0, microsecond=0)
+        self.env.cr.execute("UPDATE waiting_list SET create_date = %s WHERE id = %s",
+                            (hour + timedelta(minutes=10), earlier.id))
+        self.env.cr.execute("UPDATE waiting_list SET create_date = %s WHERE id = %s",
+                            (hour + timedelta(minutes=40), later.id))
+        self.WaitingList.invalidate_model(['create_date'])
+
+        buckets = self.WaitStats._get_wait_buckets(
+            earlier.company_id.id, self.party_size, hour + timedelta(minutes=20), 0, 0)
+        buckets = [bucket for bucket in buckets if bucket['same_party']]
+        self.assertEqual(len(buckets), 1)
+        self.assertTrue(buckets[0]['same_day'] and buckets[0]['same_hour'])
+        self.assertEqual(buckets[0]['entry_count'], 1)
+        self.assertAlmostEqual(buckets[0]['total_wait'], 10.0)
+
+    def test_rebuild_from_history(self):
+        """Test rebuilding the buckets from history, then updating them incrementally"""
+        first = self._create_entry()
+        second = self._create_entry()
+        self._seat(first, 10)
+        self._seat(second, 30)
+        self.env.cr.execute("DELETE FROM waiting_list_wait_stats")
+        self.WaitStats.invalidate_model()
+
+        self.assertTrue(self.WaitStats._rebuild_from_history())
+        bucket = self._bucket(first)
+        self.assertEqual(bucket.entry_count, 2)
+        self.assertAlmostEqual(bucket.total_wait, 40.0)
+        self.assertAlmostEqual(first.wait_stats_wait, 10.0)
+
+        # Correcting a rebuilt entry replaces its wait instead of adding it
+        self._seat(first, 20)
+        bucket.invalidate_recordset()
+        self.assertEqual(bucket.entry_count, 2)
+        self.assertAlmostEqual(bucket.total_wait, 50.0)
@@ -2,7 +2,7 @@
 
 {
     'name': 'WhatsApp - Waiting List',
-    'version': '18.0.1.2.0',
+    'version': '18.0.1.5.0',
     'category': 'WhatsApp',
     'summary': 'Send WhatsApp notifications for waiting list updates',
     'description': """
@@ -26,6 +26,7 @@ Features:
 * Integration with waiting.list.notification model
 * Configuration settings for templates
 * Fallback to SMS if WhatsApp fails
+* Parallel sending with a per-account send rate, throughput report
     """,
     'author': 'Mazen',
     'website': 'https://www.odoo.com',
@@ -40,6 +41,8 @@ Features:
         'views/res_config_settings_views.xml',
         'views/waiting_list_notification_views.xml',
         'views/waiting_list_views.xml',
+        'views/whatsapp_account_views.xml',
+        'views/waiting_list_whatsapp_throughput_views.xml',
     ],
     'demo': [],
     'installable': True,
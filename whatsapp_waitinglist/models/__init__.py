@@ -1,7 +1,10 @@
 # -*- coding: utf-8 -*-
 
 from . import res_config_settings
+from . import waiting_list_settings
 from . import waiting_list_notification
 from . import waiting_list
 from . import whatsapp_composer
 from . import whatsapp_template
+from . import whatsapp_account
+from . import waiting_list_whatsapp_throughput
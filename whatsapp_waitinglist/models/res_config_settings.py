@@ -62,6 +62,15 @@ class ResConfigSettings(models.TransientModel):
         help='WhatsApp template for custom notifications'
     )
 
+    waitinglist_whatsapp_send_workers = fields.Integer(
+        string='WhatsApp Sending Threads',
+        config_parameter='whatsapp_waitinglist.send_workers',
+        default=4,
+        help='Number of WhatsApp messages of a batch sent in parallel by the notification crons '
+             '(each thread uses a database connection); the send rate of each WhatsApp account '
+             'still applies'
+    )
+
     @api.constrains('waitinglist_queue_template_id', 'waitinglist_ready_template_id', 
                     'waitinglist_cancel_template_id', 'waitinglist_noshow_template_id', 
                     'waitinglist_survey_template_id', 'waitinglist_custom_template_id')
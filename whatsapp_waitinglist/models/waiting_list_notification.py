@@ -2,10 +2,18 @@
 
 from odoo import models, fields, api, _
 from odoo.exceptions import UserError
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import logging
+import threading
+import time
+from odoo.addons.waiting_list_base.models.waiting_list_logging import log_operation, mask_phone
+from odoo.addons.waiting_list_base.models.waiting_list_perf import instrumented
 
 _logger = logging.getLogger(__name__)
 
+# Upper bound of the sending threads (each one holds one database connection)
+MAX_SEND_WORKERS = 16
+
 
 class WaitingListNotification(models.Model):
     _inherit = 'waiting.list.notification'
@@ -25,12 +33,24 @@ class WaitingListNotification(models.Model):
         ('survey', 'Survey'),
         ('custom', 'Custom'),
     ], string='Template Type', help='Type of notification to determine WhatsApp template')
+    
+    wa_account_id = fields.Many2one(
+        'whatsapp.account',
+        string='WhatsApp Account',
+        readonly=True,
+        help='Account the WhatsApp message was sent through'
+    )
+    
+    send_duration_ms = fields.Float(
+        string='Send Time (ms)',
+        readonly=True,
+        help='Duration of the provider call, rate limit wait excluded'
+    )
 
     @api.model_create_multi
     def create(self, vals_list):
         """Override create to automatically use WhatsApp if enabled"""
-        ICP = self.env['ir.config_parameter'].sudo()
-        whatsapp_enabled = ICP.get_param('whatsapp_waitinglist.enabled')
+        whatsapp_enabled = self.env['waiting.list.settings']._get_snapshot()['whatsapp_enabled']
         
         if whatsapp_enabled:
             for vals in vals_list:
@@ -44,11 +64,9 @@ class WaitingListNotification(models.Model):
                 # Auto-select WhatsApp template if not already set
                 if not vals.get('wa_template_id') and vals.get('notification_type') in ['whatsapp', 'sms_whatsapp']:
                     template_type = vals.get('template_type', 'custom')
-                    _logger.info('Auto-selecting WhatsApp template for template_type: %s', template_type)
                     template_id = self._get_template_by_type(template_type)
                     if template_id:
                         vals['wa_template_id'] = template_id
-                        _logger.info('Selected WhatsApp template ID: %s for template_type: %s', template_id, template_type)
                     else:
                         _logger.warning('No WhatsApp template found for template_type: %s', template_type)
         
@@ -57,29 +75,24 @@ class WaitingListNotification(models.Model):
     @api.model
     def _get_template_by_type(self, template_type):
         """Get WhatsApp template ID based on explicit template type"""
-        ICP = self.env['ir.config_parameter'].sudo()
-        
         template_map = {
-            'queue_added': 'whatsapp_waitinglist.queue_template_id',
-            'ready': 'whatsapp_waitinglist.ready_template_id',
-            'cancel': 'whatsapp_waitinglist.cancel_template_id',
-            'no_show': 'whatsapp_waitinglist.noshow_template_id',
-            'survey': 'whatsapp_waitinglist.survey_template_id',
-            'custom': 'whatsapp_waitinglist.custom_template_id',
+            'queue_added': 'whatsapp_queue_template_id',
+            'ready': 'whatsapp_ready_template_id',
+            'cancel': 'whatsapp_cancel_template_id',
+            'no_show': 'whatsapp_noshow_template_id',
+            'survey': 'whatsapp_survey_template_id',
+            'custom': 'whatsapp_custom_template_id',
         }
         
-        param_name = template_map.get(template_type, 'whatsapp_waitinglist.custom_template_id')
-        template_id = ICP.get_param(param_name)
+        setting_name = template_map.get(template_type, 'whatsapp_custom_template_id')
+        template_id = self.env['waiting.list.settings']._get_snapshot()[setting_name]
         
-        _logger.info('Looking up WhatsApp template for type "%s" using param "%s": found ID %s', 
-                    template_type, param_name, template_id or 'None')
+        _logger.debug('WhatsApp template for type "%s" (setting "%s"): %s', template_type, setting_name, template_id)
         
         if template_id:
             # Verify template exists
             template = self.env['whatsapp.template'].sudo().browse(int(template_id))
             if template.exists():
-                _logger.info('Template verified: %s (ID: %s, Status: %s)', 
-                           template.name, template.id, template.status)
                 return int(template_id)
             else:
                 _logger.warning('Template ID %s does not exist in system', template_id)
@@ -87,14 +100,11 @@ class WaitingListNotification(models.Model):
         
         return False
 
+    @instrumented
     def action_send_whatsapp(self):
         """Send WhatsApp notification for waiting list entry"""
         self.ensure_one()
         
-        _logger.info('=== action_send_whatsapp called for notification #%d ===', self.id)
-        _logger.info('Notification type: %s, State: %s, Template Type: %s', 
-                    self.notification_type, self.state, self.template_type or 'Not Set')
-        
         if self.notification_type not in ['whatsapp', 'sms_whatsapp']:
             _logger.warning("Notification %s is not configured for WhatsApp (type: %s)", 
                           self.id, self.notification_type)
@@ -112,119 +122,195 @@ class WaitingListNotification(models.Model):
             self.write({'state': 'failed', 'error_message': 'No phone number provided'})
             raise UserError(_('No phone number provided'))
         
-        try:
-            # Update state to processing
-            self.write({'state': 'processing'})
-            
-            # Get WhatsApp account
-            wa_account = self.env['whatsapp.account'].search([], limit=1)
-            if not wa_account:
-                raise UserError(_('No WhatsApp Business Account configured. Please configure one in Settings > Technical > WhatsApp.'))
-            
-            # Format phone number for WhatsApp
-            formatted_number = self._format_phone_for_whatsapp(phone)
-            
-            # Get WhatsApp template from notification record
-            if not self.wa_template_id:
-                # Try to auto-select based on template_type
-                if self.template_type:
-                    _logger.info('No template assigned, attempting auto-selection for template_type: %s', self.template_type)
-                    template_id = self._get_template_by_type(self.template_type)
-                    if template_id:
-                        self.write({'wa_template_id': template_id})
-                        _logger.info('Auto-assigned template ID: %s', template_id)
-                    else:
+        with log_operation(_logger, 'whatsapp.send', notification=self.id, template_type=self.template_type) as op:
+            try:
+                # Get WhatsApp template, auto-selected from template_type if not set
+                template = self._get_whatsapp_template()
+                if not template:
+                    if self.template_type:
                         raise UserError(_('No WhatsApp template configured for template type "%s". Please configure it in Settings > Technical > Parameters.') % self.template_type)
-                else:
                     raise UserError(_('No WhatsApp template configured for this notification and no template_type specified.'))
-            
-            _logger.info('Using WhatsApp template: %s (ID: %s) for template_type: %s', 
-                        self.wa_template_id.name, self.wa_template_id.id, self.template_type or 'Not Set')
-            
-            # Create composer and send template message
-            composer = self.env['whatsapp.composer'].create({
-                'res_model': 'waiting.list',
-                'res_ids': str([self.waiting_list_id.id]),
-                'wa_template_id': self.wa_template_id.id,
-                'phone': formatted_number,
-            })
-            
-            # Send the message
-            composer._send_whatsapp_template()
-            
-            _logger.info('WhatsApp template sent to %s', formatted_number)
-            
-            self.write({
-                'state': 'sent',
-                'sent_time': fields.Datetime.now(),
-                'error_message': False,
-            })
-            _logger.info("WhatsApp sent successfully for notification %s to %s", self.id, formatted_number)
-            return True
-            
-        except Exception as e:
-            error_msg = str(e)
-            _logger.error("Failed to send WhatsApp for notification %s: %s", self.id, error_msg)
-            self.write({
-                'state': 'failed',
-                'error_message': error_msg,
-            })
-            raise UserError(_('Failed to send WhatsApp message: %s') % error_msg)
+                
+                # Get WhatsApp account
+                wa_account = self._get_whatsapp_account()
+                if not wa_account:
+                    raise UserError(_('No WhatsApp Business Account configured. Please configure one in Settings > Technical > WhatsApp.'))
+                
+                # Format phone number for WhatsApp
+                formatted_number = self._format_phone_for_whatsapp(phone)
+                op.set(phone=mask_phone(formatted_number), template=template.id)
+                
+                # Respect the send rate of the account before writing on the
+                # notification, so that its row is not locked during the wait.
+                # Only the crons wait for the rate: a host request never sleeps.
+                # The sending threads have taken their token already
+                waited = self.env.context.get('whatsapp_rate_waited')
+                if waited is None:
+                    waited = wa_account.sudo()._acquire_send_token(
+                        wait=bool(self.env.context.get('whatsapp_rate_wait')))
+                
+                # Claimed notifications are processing already
+                if self.state != 'processing':
+                    self.write({'state': 'processing'})
+                
+                # Create composer and send template message
+                composer = self.env['whatsapp.composer'].create({
+                    'res_model': 'waiting.list',
+                    'res_ids': str([self.waiting_list_id.id]),
+                    'wa_template_id': template.id,
+                    'phone': formatted_number,
+                })
+                start = time.perf_counter()
+                composer._send_whatsapp_template()
+                send_duration_ms = (time.perf_counter() - start) * 1000
+                op.set(account=wa_account.id, rate_wait_ms=round(waited * 1000))
+                
+                self.write({
+                    'state': 'sent',
+                    'sent_time': fields.Datetime.now(),
+                    'error_message': False,
+                    'wa_template_id': template.id,
+                    'wa_account_id': wa_account.id,
+                    'send_duration_ms': send_duration_ms,
+                })
+                return True
+                
+            except Exception as e:
+                error_msg = str(e)
+                _logger.debug("WhatsApp error for notification %s: %s", self.id, error_msg)
+                self.write({
+                    'state': 'failed',
+                    'error_message': error_msg,
+                })
+                raise UserError(_('Failed to send WhatsApp message: %s') % error_msg)
+    
+    def _get_whatsapp_template(self):
+        """Template of the notification, or the configured one of its template type"""
+        self.ensure_one()
+        if self.wa_template_id or not self.template_type:
+            return self.wa_template_id
+        return self.env['whatsapp.template'].browse(self._get_template_by_type(self.template_type))
+    
+    def _get_whatsapp_account(self):
+        """Account the notification is sent through: its template's, or the first one"""
+        self.ensure_one()
+        return self._get_whatsapp_template().wa_account_id or self.env['whatsapp.account'].search([], limit=1)
     
     def _format_phone_for_whatsapp(self, phone_number):
-        """Format phone number for WhatsApp (remove spaces, dashes, etc.)"""
+        """Format phone number for WhatsApp in E.164 form (+<country code><number>)
+        
+        Parsed by the shared waiting.list.phone engine; numbers without
+        international prefix get the customer country code, or the company's.
+        """
         if not phone_number:
             return ''
         
-        # Remove common separators
-        formatted = phone_number.replace(' ', '').replace('-', '').replace('(', '').replace(')', '')
-        
-        # Ensure it starts with +
-        if not formatted.startswith('+'):
-            # Try to add country code if customer has country
-            if self.customer_id and self.customer_id.country_id:
-                country_code = self.customer_id.country_id.phone_code
-                if country_code and not formatted.startswith(str(country_code)):
-                    formatted = f'+{country_code}{formatted}'
-                else:
-                    formatted = f'+{formatted}'
-            else:
-                formatted = f'+{formatted}'
+        default_country_code = self.customer_id.country_id.phone_code or None
+        formatted = self.env['waiting.list.phone'].to_e164(phone_number, default_country_code)
+        if not formatted:
+            # Unparsable number: keep the digits as they are
+            formatted = '+' + ''.join(filter(str.isdigit, phone_number))
         
         return formatted
 
-    @api.model
-    def _cron_send_whatsapp_notifications(self):
-        """Cron job to send pending WhatsApp notifications"""
-        pending_notifications = self.search([
-            ('state', '=', 'pending'),
-            ('notification_type', 'in', ['whatsapp', 'sms_whatsapp']),
-        ], limit=50)  # Process in batches
+    def _send_whatsapp_one(self):
+        """Send one claimed WhatsApp notification, scheduling a retry on failure
         
-        _logger.info("Processing %s pending WhatsApp notifications", len(pending_notifications))
+        The attempt is counted after the provider call, so that nothing is
+        written on the claimed row while the message is sent. Returns True if
+        the message was sent.
+        """
+        self.ensure_one()
+        error = False
+        try:
+            with self.env.cr.savepoint():
+                sent = bool(self.action_send_whatsapp())
+        except Exception as e:
+            _logger.debug("Error processing notification %s: %s", self.id, e)
+            sent, error = False, str(e)
+        self.write({'retry_count': self.retry_count + 1})
+        if error:
+            self._handle_send_failure(error)
+        return sent
+    
+    def _send_whatsapp_parallel(self):
+        """Send claimed WhatsApp notifications from a bounded pool of threads
         
-        success_count = 0
-        failed_count = 0
+        Each thread sends one notification at a time in its own cursor and
+        transaction, which also takes the token of the account bucket (and
+        commits it) before the send: one connection per thread. The claimed
+        batch must be committed by the caller, so that the threads do not wait
+        on its locks (see _cron_send_whatsapp_notifications). Falls back to
+        sending in the current transaction for a single notification, a single
+        worker or during tests.
         
-        for notification in pending_notifications:
-            try:
-                result = notification.action_send_whatsapp()
-                if result:
-                    success_count += 1
-                    _logger.info("Notification %s sent successfully", notification.id)
-                else:
-                    failed_count += 1
-                    _logger.warning("Notification %s failed to send", notification.id)
-            except Exception as e:
-                failed_count += 1
-                _logger.error("Error processing notification %s: %s", notification.id, str(e))
-                # Mark as failed if not already updated
-                if notification.state == 'pending':
-                    notification.write({
-                        'state': 'failed',
-                        'error_message': str(e),
-                    })
-                continue
-        
-        _logger.info("WhatsApp notification cron completed: %s sent, %s failed", success_count, failed_count)
+        Returns the number of notifications sent.
+        """
+        workers = self.env['waiting.list.settings']._get_snapshot()['whatsapp_send_workers']
+        workers = min(max(workers, 1), MAX_SEND_WORKERS, len(self))
+        if workers <= 1 or getattr(threading.current_thread(), 'testing', False):
+            return sum(notification._send_whatsapp_one() for notification in self)
+        
+        registry = self.env.registry
+        dbname = self.env.cr.dbname
+        uid, context, su = self.env.uid, self.env.context, self.env.su
+        
+        def send(notification_id):
+            threading.current_thread().dbname = dbname
+            with registry.cursor() as cr:
+                env = api.Environment(cr, uid, context, su=su)
+                notification = env['waiting.list.notification'].browse(notification_id)
+                wa_account = notification._get_whatsapp_account()
+                waited = wa_account.sudo()._acquire_send_token(cr=cr) if wa_account else 0.0
+                return notification.with_context(whatsapp_rate_waited=waited)._send_whatsapp_one()
+        
+        sent = 0
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='waiting_list_whatsapp') as executor:
+            futures = {executor.submit(send, notification_id): notification_id for notification_id in self.ids}
+            for future in as_completed(futures):
+                # One failed thread (e.g. lost connection) must not lose the other results
+                try:
+                    sent += future.result()
+                except Exception:
+                    _logger.exception('WhatsApp notification %s could not be sent', futures[future])
+        
+        # Sent from other transactions: re-read the notifications
+        self.invalidate_recordset()
+        return sent
+    
+    def _send_whatsapp_batch(self):
+        """Send a claimed batch of WhatsApp notifications and log its throughput"""
+        with log_operation(_logger, 'whatsapp.batch', size=len(self)) as op:
+            start = time.perf_counter()
+            sent = self._send_whatsapp_parallel()
+            elapsed = time.perf_counter() - start
+            op.set(sent=sent, failed=len(self) - sent, per_second=round(sent / elapsed, 1) if elapsed else sent)
+        return sent
+    
+    @api.model
+    def _cron_process_pending_notifications(self, company_id=None, limit=100):
+        """Wait for the send rate of the WhatsApp accounts in the notification cron"""
+        return super(
+            WaitingListNotification, self.with_context(whatsapp_rate_wait=True)
+        )._cron_process_pending_notifications(company_id=company_id, limit=limit)
+    
+    @api.model
+    @instrumented
+    def _cron_send_whatsapp_notifications(self):
+        """Cron job to send pending WhatsApp notifications"""
+        with log_operation(_logger, 'whatsapp.cron') as op:
+            # Claimed atomically: never overlaps the batch of the notification cron.
+            # sms_whatsapp notifications are left to the notification cron, which
+            # sends both their SMS and WhatsApp halves (action_send)
+            pending_notifications = self._claim_pending(50, notification_types=['whatsapp'])
+            # The claim is committed before the sending threads start
+            if pending_notifications and not getattr(threading.current_thread(), 'testing', False):
+                self.env.cr.commit()
+            
+            success_count = pending_notifications.with_context(
+                whatsapp_rate_wait=True,
+            )._send_whatsapp_batch() if pending_notifications else 0
+            
+            op.set(processed=len(pending_notifications), sent=success_count,
+                   failed=len(pending_notifications) - success_count)
         return True
@@ -0,0 +1,24 @@
+# -*- coding: utf-8 -*-
+
+from odoo import models, api
+
+
+class WaitingListSettings(models.AbstractModel):
+    """Add the WhatsApp parameters to the waiting list settings snapshot"""
+
+    _inherit = 'waiting.list.settings'
+
+    @api.model
+    def _get_settings_spec(self):
+        spec = super()._get_settings_spec()
+        spec.update({
+            'whatsapp_enabled': ('whatsapp_waitinglist.enabled', bool, False),
+            'whatsapp_queue_template_id': ('whatsapp_waitinglist.queue_template_id', int, False),
+            'whatsapp_ready_template_id': ('whatsapp_waitinglist.ready_template_id', int, False),
+            'whatsapp_cancel_template_id': ('whatsapp_waitinglist.cancel_template_id', int, False),
+            'whatsapp_noshow_template_id': ('whatsapp_waitinglist.noshow_template_id', int, False),
+            'whatsapp_survey_template_id': ('whatsapp_waitinglist.survey_template_id', int, False),
+            'whatsapp_custom_template_id': ('whatsapp_waitinglist.custom_template_id', int, False),
+            'whatsapp_send_workers': ('whatsapp_waitinglist.send_workers', int, 4),
+        })
+        return spec
@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+
+from odoo import models, fields, tools
+
+
+class WaitingListWhatsAppThroughput(models.Model):
+    """WhatsApp messages sent per minute and account over the last 7 days"""
+
+    _name = 'waiting.list.whatsapp.throughput'
+    _description = 'Waiting List WhatsApp Throughput'
+    _auto = False
+    _order = 'minute desc'
+    _rec_name = 'minute'
+
+    minute = fields.Datetime(string='Minute', readonly=True)
+    wa_account_id = fields.Many2one('whatsapp.account', string='WhatsApp Account', readonly=True)
+    sent_count = fields.Integer(string='Messages / Minute', readonly=True, aggregator='max')
+    send_ms_avg = fields.Float(string='Send Time avg (ms)', readonly=True, aggregator='avg')
+    send_ms_p95 = fields.Float(string='Send Time p95 (ms)', readonly=True, aggregator='max')
+
+    def init(self):
+        tools.drop_view_if_exists(self.env.cr, self._table)
+        self.env.cr.execute(f"""
+            CREATE OR REPLACE VIEW {self._table} AS (
+                SELECT ROW_NUMBER() OVER (ORDER BY date_trunc('minute', sent_time), wa_account_id) AS id,
+                       date_trunc('minute', sent_time) AS minute,
+                       wa_account_id,
+                       COUNT(*) AS sent_count,
+                       AVG(send_duration_ms) AS send_ms_avg,
+                       percentile_cont(0.95) WITHIN GROUP (ORDER BY send_duration_ms) AS send_ms_p95
+                  FROM waiting_list_notification
+                 WHERE state = 'sent'
+                   AND wa_account_id IS NOT NULL
+                   AND sent_time >= (NOW() AT TIME ZONE 'UTC') - INTERVAL '7 days'
+              GROUP BY date_trunc('minute', sent_time), wa_account_id
+            )
+        """)
@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+
+from odoo import models, fields
+import time
+from .whatsapp_rate_limit import acquire_token, create_bucket_table
+
+# Default provider call rate of an account (messages per second) and burst size
+DEFAULT_RATE_LIMIT = 20.0
+DEFAULT_RATE_BURST = 20
+
+
+class WhatsAppAccount(models.Model):
+    _inherit = 'whatsapp.account'
+
+    waiting_list_rate_limit = fields.Float(
+        string='Waiting List Send Rate',
+        default=DEFAULT_RATE_LIMIT,
+        help='Maximum waiting list messages sent per second through this account (0 for no limit)'
+    )
+    
+    waiting_list_rate_burst = fields.Integer(
+        string='Waiting List Burst',
+        default=DEFAULT_RATE_BURST,
+        help='Messages that can be sent at once before the send rate applies'
+    )
+
+    def init(self):
+        """Send rate buckets of the accounts, shared by every worker"""
+        super().init()
+        create_bucket_table(self.env.cr)
+
+    def _acquire_send_token(self, wait=True, cr=None):
+        """Take a token of the send rate of the account before a provider call
+        
+        The token is taken in a separate transaction, committed right away so
+        that concurrent senders only queue on the bucket row for a moment:
+        in `cr` when given (a sending thread's own cursor, with nothing else to
+        commit yet), else in a new cursor. Without `wait` (a message sent from
+        a host request), the token is counted but the send does not wait for
+        the refill.
+        
+        Returns the seconds waited.
+        """
+        self.ensure_one()
+        rate, burst = self.waiting_list_rate_limit, self.waiting_list_rate_burst
+        if cr is None:
+            with self.env.registry.cursor() as token_cr:
+                delay = acquire_token(token_cr, self.id, rate, burst)
+        else:
+            delay = acquire_token(cr, self.id, rate, burst)
+            cr.commit()
+        if not wait or not delay:
+            return 0.0
+        time.sleep(delay)
+        return delay
@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+"""Token bucket rate limiting of the WhatsApp provider calls
+
+Each whatsapp.account has a bucket of `burst` tokens refilled at `rate`
+tokens per second; a send takes a token, waiting for the refill when the
+bucket is empty. Bursts (a large table clearing and several parties
+notified at once) go out immediately up to the bucket size, then at the
+allowed rate.
+
+The bucket state is one row per account in the database, shared by every
+worker process and sending thread. A token is taken under the row lock
+(SELECT ... FOR UPDATE) in its own short transaction, and the wait happens
+after that transaction is committed, so the lock is never held during a
+wait nor during a provider call.
+"""
+
+BUCKET_TABLE = 'waiting_list_whatsapp_rate_bucket'
+
+
+def take_token(tokens, elapsed, rate, burst):
+    """Take one token of a bucket that held `tokens` tokens `elapsed` seconds ago
+
+    The token is always taken: an empty bucket goes into debt, so concurrent
+    senders line up at the allowed rate instead of polling for tokens.
+
+    :return: (tokens left, seconds to wait before sending)
+    """
+    tokens = min(float(burst), tokens + max(elapsed, 0.0) * rate) - 1
+    return tokens, -tokens / rate if tokens < 0 else 0.0
+
+
+def create_bucket_table(cr):
+    """Create the table of the account buckets"""
+    cr.execute(f"""
+        CREATE TABLE IF NOT EXISTS {BUCKET_TABLE} (
+            account_id INTEGER PRIMARY KEY,
+            tokens DOUBLE PRECISION NOT NULL,
+            updated_at TIMESTAMP WITH TIME ZONE NOT NULL
+        )
+    """)
+
+
+def acquire_token(cr, account_id, rate, burst):
+    """Take a token of the bucket of an account, in the transaction of `cr`
+
+    :param account_id: whatsapp.account id
+    :param rate: tokens per second (no limit if not positive)
+    :param burst: bucket size
+    :return: seconds to wait before sending
+    """
+    if not rate or rate <= 0:
+        return 0.0
+    burst = max(int(burst or 1), 1)
+    cr.execute(f"""
+        INSERT INTO {BUCKET_TABLE} (account_id, tokens, updated_at)
+             VALUES (%s, %s, clock_timestamp())
+        ON CONFLICT (account_id) DO NOTHING
+    """, (account_id, burst))
+    cr.execute(f"""
+        SELECT tokens, EXTRACT(EPOCH FROM clock_timestamp() - updated_at), clock_timestamp()
+          FROM {BUCKET_TABLE}
+         WHERE account_id = %s
+           FOR UPDATE
+    """, (account_id,))
+    tokens, elapsed, now = cr.fetchone()
+    tokens, wait = take_token(tokens, float(elapsed), rate, burst)
+    cr.execute(f"""
+        UPDATE {BUCKET_TABLE}
+           SET tokens = %s, updated_at = %s
+         WHERE account_id = %s
+    """, (tokens, now, account_id))
+    return wait
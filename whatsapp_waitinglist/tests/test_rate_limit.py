@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+
+from odoo.tests.common import TransactionCase
+
+from odoo.addons.whatsapp_waitinglist.models.whatsapp_rate_limit import BUCKET_TABLE, acquire_token, take_token
+
+
+class TestRateLimit(TransactionCase):
+
+    def setUp(self):
+        super(TestRateLimit, self).setUp()
+        # Bucket of an account id no whatsapp.account uses
+        self.account_id = -1
+
+    def test_take_token_full_bucket(self):
+        """Test a full bucket lets a burst through without waiting"""
+        tokens = 3.0
+        for expected in (2.0, 1.0, 0.0):
+            tokens, wait = take_token(tokens, 0.0, 1.0, 3)
+            self.assertAlmostEqual(tokens, expected)
+            self.assertEqual(wait, 0.0)
+
+    def test_take_token_empty_bucket(self):
+        """Test an empty bucket goes into debt and senders line up at the rate"""
+        tokens, wait = take_token(0.0, 0.0, 2.0, 5)
+        self.assertAlmostEqual(tokens, -1.0)
+        self.assertAlmostEqual(wait, 0.5)
+        tokens, wait = take_token(tokens, 0.0, 2.0, 5)
+        self.assertAlmostEqual(wait, 1.0)
+
+    def test_take_token_refill(self):
+        """Test tokens are refilled with the elapsed time, up to the bucket size"""
+        tokens, wait = take_token(0.0, 1.5, 2.0, 5)
+        self.assertAlmostEqual(tokens, 2.0)
+        self.assertEqual(wait, 0.0)
+        tokens, wait = take_token(0.0, 3600.0, 2.0, 5)
+        self.assertAlmostEqual(tokens, 4.0)
+        # Clock going backwards never removes tokens
+        tokens, wait = take_token(1.0, -10.0, 2.0, 5)
+        self.assertAlmostEqual(tokens, 0.0)
+
+    def test_acquire_token(self):
+        """Test the bucket of an account is shared through its database row"""
+        cr = self.env.cr
+        self.assertEqual(acquire_token(cr, self.account_id, 1.0, 2), 0.0)
+        self.assertEqual(acquire_token(cr, self.account_id, 1.0, 2), 0.0)
+        self.assertAlmostEqual(acquire_token(cr, self.account_id, 1.0, 2), 1.0, delta=0.1)
+        
+        cr.execute(f"SELECT tokens FROM {BUCKET_TABLE} WHERE account_id = %s", (self.account_id,))
+        self.assertLess(cr.fetchone()[0], 0)
+
+    def test_acquire_token_no_limit(self):
+        """Test an account without send rate never waits nor keeps a bucket"""
+        for _i in range(5):
+            self.assertEqual(acquire_token(self.env.cr, self.account_id, 0, 2), 0.0)
+        self.env.cr.execute(f"SELECT 1 FROM {BUCKET_TABLE} WHERE account_id = %s", (self.account_id,))
+        self.assertFalse(self.env.cr.fetchone())